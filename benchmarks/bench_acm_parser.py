@@ -0,0 +1,118 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "clustering"))
+from acm_parser import NotAnArticlePage, parse_acm_html
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "acm")
+
+
+def parse_with_beautifulsoup(html, url):
+    """
+    The BeautifulSoup parser ACM_yaml_generator.py used before acm_parser.py, kept as the baseline.
+    """
+    page = BeautifulSoup(html, "lxml")
+
+    references = []
+    for ref in page.find_all("div", attrs={"class": "citation-content"}):
+        references.append(ref.text)
+
+    title = page.find("div", attrs={"class": "core-publication-title"}).text
+
+    abstract_section = page.find("section", attrs={"property": "abstract"})
+    abstract_paragraphs = abstract_section.find_all("div", attrs={"role": "paragraph"})
+    abstract = "\n".join([a.text for a in abstract_paragraphs])
+
+    keywords_section = page.find("section", attrs={"id": "sec-terms"})
+    keywords_elements = keywords_section.find_all("a")
+    keywords = ",".join([k.text for k in keywords_elements])
+
+    return {'abstract': abstract, 'keywords': keywords, 'title': title, 'url': url, 'references': references}
+
+
+def load_fixtures(folder):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        raise FileNotFoundError(f"No .html fixtures in {folder}")
+    return pages
+
+
+def check_fixtures(pages):
+    """
+    Split fixtures into article pages and pages without content, and check both parsers agree on the former.
+    """
+    articles = {}
+    for name, html in pages.items():
+        try:
+            paper = parse_acm_html(html, name)
+        except NotAnArticlePage:
+            print(f"[!] {name}: no article content (needs a browser)")
+            continue
+        expected = parse_with_beautifulsoup(html, name)
+        if paper != expected:
+            diff = [k for k in expected if paper.get(k) != expected[k]]
+            raise AssertionError(f"{name}: lxml parser differs from BeautifulSoup on {diff}")
+        print(f"[✓] {name}: {len(html) / 1024:.0f} KiB, {len(paper['references'])} references, outputs match")
+        articles[name] = html
+    return articles
+
+
+def time_parser(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, html in pages.items():
+            parse(html, name)
+    elapsed = time.perf_counter() - start
+    return repeat * len(pages) / elapsed
+
+
+def run_benchmark(folder=DEFAULT_FIXTURES, repeat=20, output=None):
+    """
+    Compare pages/second of the lxml parser against the BeautifulSoup baseline on saved ACM pages.
+
+    Args:
+        folder: Folder of saved article pages (*.html), e.g. written by ACM_yaml_generator.py --save-html
+        repeat: Passes over the fixtures per parser
+        output: Optional JSON file for the results
+    """
+    articles = check_fixtures(load_fixtures(folder))
+    if not articles:
+        raise ValueError(f"No article pages among the fixtures in {folder}")
+
+    # One untimed pass each so imports and caches do not count against either parser
+    time_parser(parse_with_beautifulsoup, articles, 1)
+    time_parser(parse_acm_html, articles, 1)
+
+    results = {
+        "pages": len(articles),
+        "repeat": repeat,
+        "beautifulsoup_pages_per_s": round(time_parser(parse_with_beautifulsoup, articles, repeat), 1),
+        "lxml_pages_per_s": round(time_parser(parse_acm_html, articles, repeat), 1),
+    }
+    results["speedup"] = round(results["lxml_pages_per_s"] / results["beautifulsoup_pages_per_s"], 2)
+
+    print(f"\nBeautifulSoup: {results['beautifulsoup_pages_per_s']:8.1f} pages/s")
+    print(f"lxml XPath:    {results['lxml_pages_per_s']:8.1f} pages/s  ({results['speedup']}x)")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ACM page parser against the BeautifulSoup baseline.")
+    parser.add_argument("-f", "--fixtures", default=DEFAULT_FIXTURES, help="Folder of saved ACM article pages")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="Passes over the fixtures (default: 20)")
+    parser.add_argument("-o", "--output", help="Optional JSON results file")
+    args = parser.parse_args()
+
+    run_benchmark(args.fixtures, args.repeat, args.output)
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchmarks.corpus import CorpusGenerator
+from common.db_loader import COLUMNS, SQLiteLoader, load, pipeline_rows
+
+
+def write_synthetic_outputs(folder, count, clusters=200, seed=0):
+    """
+    Pipeline outputs for count papers without documents: papers.yaml, qualified_papers.yaml (90%) and a
+    cluster tree. Titles and abstracts come from the benchmark corpus vocabulary.
+    """
+    generator = CorpusGenerator(seed)
+    rng = random.Random(seed)
+    papers = [{"id": f"synthetic_{i:06d}", "title": generator.sentence(4, 10)[:-1],
+               "abstract": generator.paragraph(rng.randint(4, 8)), "url": f"https://arxiv.org/abs/2401.{i:05d}",
+               "keywords": ", ".join(rng.choices(generator.vocabulary, k=4))} for i in range(count)]
+    with open(os.path.join(folder, "papers.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump({"papers": papers}, f, allow_unicode=True, sort_keys=False,
+                  Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper))
+    qualified = [{"title": p["title"], "id": p["id"]} for p in papers if rng.random() < 0.9]
+    with open(os.path.join(folder, "qualified_papers.yaml"), "w", encoding="utf-8") as f:
+        yaml.dump({"papers": qualified}, f, allow_unicode=True, sort_keys=False)
+
+    members = {}
+    for p in qualified:
+        for c in rng.sample(range(clusters), rng.choice((1, 1, 2))):
+            members.setdefault(c, []).append({"id": p["id"], "title": p["title"]})
+    for c, cluster_papers in members.items():
+        # The layout of paper_classifier.write_cluster
+        cluster_folder = os.path.join(folder, "clusters", f"Topic {c % 20}", f"Sub-topic {c}")
+        os.makedirs(cluster_folder, exist_ok=True)
+        with open(os.path.join(cluster_folder, "papers.yaml"), "w", encoding="utf-8") as f:
+            yaml.safe_dump({"papers": cluster_papers}, f, allow_unicode=True, sort_keys=False)
+    return len(qualified)
+
+
+def row_at_a_time(rows, database):
+    """
+    The baseline: one INSERT and one commit per row.
+    """
+    loader = SQLiteLoader(database)
+    loader.ensure_schema()
+    sql = f"INSERT INTO papers ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+    start = time.perf_counter()
+    for row in rows:
+        loader.conn.execute(sql, row)
+    elapsed = time.perf_counter() - start
+    loader.close()
+    return len(rows) / elapsed
+
+
+def run_benchmark(count=100_000, batch_size=2000, baseline_rows=5000, output=None):
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        qualified = write_synthetic_outputs(folder, count)
+        print(f"{count} synthetic papers, {qualified} qualified, written in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        rows = list(pipeline_rows(os.path.join(folder, "papers.yaml"), os.path.join(folder, "qualified_papers.yaml"),
+                                  os.path.join(folder, "clusters")))
+        read_s = time.perf_counter() - start
+
+        database = os.path.join(folder, "papers.sqlite3")
+        results = {
+            "papers": count,
+            "rows": len(rows),
+            "read_rows_per_s": round(len(rows) / read_s, 1),
+            "row_at_a_time_rows_per_s": round(row_at_a_time(rows[:baseline_rows],
+                                                            os.path.join(folder, "baseline.sqlite3")), 1),
+            "insert": load(iter(rows), database, batch_size),
+            "rerun_unchanged": load(iter(rows), database, batch_size),
+        }
+        changed = [row[:2] + (row[2] + " Revised.",) + row[3:] for row in rows[::10]]
+        results["rerun_10pct_changed"] = load(iter(changed), database, batch_size)
+        with sqlite3.connect(database) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0] == len(rows)
+
+    print(f"   read + join YAML           {results['read_rows_per_s']:>10.0f} rows/s")
+    print(f"   row-at-a-time baseline     {results['row_at_a_time_rows_per_s']:>10.0f} rows/s ({baseline_rows} rows)")
+    for name in ("insert", "rerun_unchanged", "rerun_10pct_changed"):
+        r = results[name]
+        print(f"   {name:<26} {r['rows_per_s']:>10.0f} rows/s ({r['rows']} rows, {r['written']} written, {r['seconds']}s)")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure rows/second of common/db_loader.py on a synthetic corpus.")
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="Synthetic papers (default: 100000)")
+    parser.add_argument("-b", "--batch-size", type=int, default=2000, help="Rows per transaction (default: 2000)")
+    parser.add_argument("--baseline-rows", type=int, default=5000,
+                        help="Rows for the row-at-a-time baseline (default: 5000)")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    run_benchmark(args.count, args.batch_size, args.baseline_rows, args.output)
@@ -0,0 +1,139 @@
+import argparse
+import os
+import random
+import re
+
+import yaml
+
+from typing import Dict, List
+
+SAMPLE_PAPERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs", "sample_papers.yaml")
+
+# Vocabulary added to the sample papers so generated text exercises the classifier keyword lists
+FILLER_WORDS = (
+    "model training dataset benchmark accuracy latency throughput energy cache memory processor compiler "
+    "graph network transformer attention convolution segmentation detection retrieval language translation "
+    "robot planning control scheduling distributed consensus storage database query optimization security "
+    "privacy encryption verification synthesis circuit FPGA accelerator sparse dense tensor kernel pipeline "
+    "evaluation baseline ablation prior work approach method results analysis"
+).split()
+
+VENUES = ["CVPR", "ICCV", "NeurIPS", "ICML", "ACL", "EMNLP", "ISCA", "MICRO", "HPCA", "ASPLOS", "OSDI", "SOSP",
+          "SIGMOD", "VLDB", "CCS", "USENIX Security", "DAC", "ICCAD", "ICRA", "CHI", "arXiv preprint"]
+
+SECTIONS = ["Related Work", "Background", "Design", "Implementation", "Evaluation", "Discussion", "Limitations"]
+
+# Heading styles produced by marker for different PDF layouts
+HEADING_STYLES = [
+    lambda i, name: f"# {name}",
+    lambda i, name: f"## {i}. {name}",
+    lambda i, name: f"# {'I II III IV V VI VII VIII IX X XI XII'.split()[i - 1]}. {name.upper()}",
+    lambda i, name: f"## **{i} {name}**",
+]
+
+
+def load_vocabulary(sample_yaml: str = SAMPLE_PAPERS) -> List[str]:
+    with open(sample_yaml, "r", encoding="utf-8") as f:
+        samples = yaml.safe_load(f)["papers"]
+    words = []
+    for paper in samples:
+        for field in ("title", "abstract", "keywords", "document"):
+            words.extend(re.findall(r"[A-Za-z][A-Za-z\-]+", paper.get(field) or ""))
+    return words + FILLER_WORDS
+
+
+class CorpusGenerator:
+    """
+    Deterministic synthetic paper corpus in the marker_runner.py output format.
+
+    Text is drawn from the vocabulary of docs/sample_papers.yaml plus domain filler words, with the heading
+    styles, abstract layouts and reference lists real conversions produce. A fraction of papers is
+    pathological: one very long section, a missing introduction, or non-English text.
+
+    Args:
+        seed: Random seed; the same seed and size always give the same corpus
+        pathological_rate: Fraction of pathological papers
+        sample_yaml: Sample papers the vocabulary is taken from
+    """
+
+    def __init__(self, seed: int = 0, pathological_rate: float = 0.05, sample_yaml: str = SAMPLE_PAPERS):
+        self.rng = random.Random(seed)
+        self.vocabulary = load_vocabulary(sample_yaml)
+        self.pathological_rate = pathological_rate
+
+    def sentence(self, min_words: int = 8, max_words: int = 24) -> str:
+        words = self.rng.choices(self.vocabulary, k=self.rng.randint(min_words, max_words))
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, sentences: int) -> str:
+        return " ".join(self.sentence() for _ in range(sentences))
+
+    def reference(self, i: int) -> str:
+        authors = ", ".join(f"{self.rng.choice('ABCDEFGHJKLMNPRSTW')}. {self.rng.choice(self.vocabulary).capitalize()}"
+                            for _ in range(self.rng.randint(1, 4)))
+        return (f"- [{i}] {authors}. {self.sentence(5, 12)[:-1]}. In *{self.rng.choice(VENUES)}*, "
+                f"{self.rng.randint(1995, 2025)}.")
+
+    def paper(self, index: int) -> Dict:
+        rng = self.rng
+        title = self.sentence(4, 10)[:-1]
+        abstract = self.paragraph(rng.randint(4, 8))
+        style = rng.choice(HEADING_STYLES)
+        kind = rng.choice(["long_section", "no_intro", "non_english"]) if rng.random() < self.pathological_rate else None
+
+        lines = [f"# {title}", "", f"{self.sentence(2, 4)} {self.sentence(2, 4)}", ""]
+        if rng.random() < 0.5:
+            lines += ["## Abstract", abstract, ""]
+        else:
+            lines += [f"**Abstract**—{abstract}", ""]
+        if rng.random() < 0.6:
+            lines += [f"*Index Terms*—{', '.join(rng.choices(FILLER_WORDS, k=5))}", ""]
+
+        names = ([] if kind == "no_intro" else ["Introduction"]) + rng.sample(SECTIONS, rng.randint(3, len(SECTIONS)))
+        for i, name in enumerate(names, 1):
+            lines += [style(i, name), ""]
+            paragraphs = rng.randint(2, 6)
+            if kind == "long_section" and i == 2:
+                # One conversion artifact: a whole chapter without headings or blank lines
+                lines.append(" ".join(self.paragraph(10) for _ in range(400)))
+            elif kind == "non_english":
+                lines += ["".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(200, 600)))
+                          for _ in range(paragraphs)]
+            else:
+                lines += [self.paragraph(rng.randint(3, 8)) for _ in range(paragraphs)]
+            lines.append("")
+
+        references = [self.reference(i) for i in range(1, rng.randint(10, 60))]
+        lines += ["# References", ""] + references
+
+        return {
+            "id": f"synthetic_{index:06d}",
+            "title": title,
+            "abstract": abstract,
+            "url": f"https://arxiv.org/abs/2401.{index:05d}",
+            "keywords": ", ".join(rng.choices(FILLER_WORDS, k=4)),
+            "document": "\n".join(lines),
+            "references": [r[2:] for r in references],
+        }
+
+    def papers(self, count: int) -> List[Dict]:
+        return [self.paper(i) for i in range(count)]
+
+
+def generate_corpus(count: int, seed: int = 0, pathological_rate: float = 0.05) -> List[Dict]:
+    return CorpusGenerator(seed, pathological_rate).papers(count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic paper corpus seeded from docs/sample_papers.yaml.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="Number of papers (default: 100)")
+    parser.add_argument("-o", "--output", required=True, help="Output YAML file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--pathological-rate", type=float, default=0.05,
+                        help="Fraction of papers with long sections, no introduction or non-English text (default: 0.05)")
+    args = parser.parse_args()
+
+    papers = generate_corpus(args.count, args.seed, args.pathological_rate)
+    with open(args.output, "w", encoding="utf-8") as f:
+        yaml.dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
+    print(f"[✓] Wrote {len(papers)} papers to {args.output}")
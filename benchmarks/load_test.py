@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("", "benchmarks", "clustering", "disqualified"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from corpus import generate_corpus
+from llm_topic_classifier import classify_paper_topic, count_ref_topics
+from merge_filter import check_paper
+from mock_llm_server import MockBehavior, MockState, serve
+from common.cascade import CASCADE
+from common.llm_config import CLASSIFIER_LLM, FILTER_LLM
+
+
+def percentiles(values: List[float]) -> Dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 3)
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1], 3)}
+
+
+def run_filter(paper: Dict) -> bool:
+    decisions = check_paper(paper).get("decisions", {})
+    return not any(str(d).startswith("ERROR") for d in decisions.values())
+
+
+def run_classifier(paper: Dict) -> bool:
+    classify_paper_topic(paper.get("keywords", ""), paper["title"], paper["abstract"],
+                         count_ref_topics(paper.get("references", [])))
+    return True
+
+
+STAGES = {"filter": (run_filter, FILTER_LLM), "classifier": (run_classifier, CLASSIFIER_LLM)}
+
+
+def load_test(stage: str, papers: int = 100, concurrency: int = 8, api_base: Optional[str] = None,
+              llm_retries: int = 0, seed: int = 0, server_options: Optional[Dict] = None,
+              cascade_model: Optional[str] = None, cascade_threshold: Optional[float] = None) -> Dict:
+    """
+    Push a synthetic corpus through one LLM stage with concurrent workers and report throughput,
+    per-paper latency percentiles and failures.
+
+    Args:
+        stage: "filter" (merge_filter.check_paper) or "classifier" (classify_paper_topic)
+        papers: Number of synthetic papers
+        concurrency: Papers processed in parallel
+        api_base: Existing OpenAI-compatible endpoint; an in-process mock server is started when omitted
+        llm_retries: litellm retries per call, to measure recovery from injected 429/500 errors
+        seed: Corpus seed
+        server_options: MockState arguments for the in-process server (latency, error_429, error_500, rpm,
+                        model_latency) plus disqualify_rate and low_confidence_rate
+        cascade_model: Cheap model tried first, to measure the throughput and escalation rate of a cascade
+        cascade_threshold: Confidence below which the cascade escalates
+    """
+    run, config = STAGES[stage]
+    server = None
+    if not api_base:
+        options = dict(server_options or {})
+        behavior = MockBehavior(options.pop("disqualify_rate", 0.1),
+                                low_confidence_rate=options.pop("low_confidence_rate", 0.2))
+        server = serve("127.0.0.1", 0, MockState(seed=seed, behavior=behavior, **options))
+        api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    config.configure(api_base=api_base, num_retries=llm_retries, cascade_model=cascade_model,
+                     cascade_threshold=cascade_threshold)
+
+    corpus = generate_corpus(papers, seed)
+    latencies = []
+    failures = 0
+
+    def process(paper):
+        start = time.time()
+        try:
+            ok = run(paper)
+        except Exception as e:
+            print(f"[ERROR] {paper['id']}: {e}")
+            ok = False
+        return ok, time.time() - start
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok, elapsed in pool.map(process, corpus):
+            latencies.append(elapsed)
+            failures += not ok
+    wall = time.time() - start
+
+    with urllib.request.urlopen(api_base.rstrip("/") + "/stats") as response:
+        server_stats = json.load(response)
+    if server:
+        server.shutdown()
+
+    return {
+        "stage": stage,
+        "model": config.describe(),
+        "papers": papers,
+        "concurrency": concurrency,
+        "llm_retries": llm_retries,
+        "wall_s": round(wall, 2),
+        "papers_per_s": round(papers / wall, 2),
+        "paper_latency_s": percentiles(latencies),
+        "failed_papers": failures,
+        "cascade": CASCADE.summary(),
+        "server": server_stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the filter or classifier against a mock LLM server.")
+    parser.add_argument("stage", choices=sorted(STAGES), help="Pipeline stage to drive")
+    parser.add_argument("-n", "--papers", type=int, default=100, help="Synthetic papers (default: 100)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Papers in flight (default: 8)")
+    parser.add_argument("--api-base", help="Use a running server instead of starting a mock in-process")
+    parser.add_argument("--llm-retries", type=int, default=0, help="litellm retries per call (default: 0)")
+    parser.add_argument("--latency", default="lognormal:0.5,0.4", help="In-process mock latency spec (default: lognormal:0.5,0.4)")
+    parser.add_argument("--error-429", type=float, default=0.0, help="In-process mock 429 rate (default: 0)")
+    parser.add_argument("--error-500", type=float, default=0.0, help="In-process mock 500 rate (default: 0)")
+    parser.add_argument("--rpm", type=int, default=0, help="In-process mock requests-per-minute limit (default: 0)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="In-process mock latency for one model, e.g. gpt-4o-mini=fixed:0.2 (repeatable)")
+    parser.add_argument("--low-confidence-rate", type=float, default=0.2,
+                        help="In-process mock fraction of low-confidence answers (default: 0.2)")
+    parser.add_argument("--cascade-model", help="Cheap model asked first by the stage's model cascade (default: off)")
+    parser.add_argument("--cascade-threshold", type=float, help="Confidence below which the cascade escalates")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and mock seed (default: 0)")
+    parser.add_argument("-o", "--output", help="Optional JSON results file")
+    args = parser.parse_args()
+
+    results = load_test(args.stage, args.papers, args.concurrency, args.api_base, args.llm_retries, args.seed,
+                        {"latency": args.latency, "error_429": args.error_429, "error_500": args.error_500, "rpm": args.rpm,
+                         "model_latency": dict(spec.split("=", 1) for spec in args.model_latency),
+                         "low_confidence_rate": args.low_confidence_rate},
+                        args.cascade_model, args.cascade_threshold)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
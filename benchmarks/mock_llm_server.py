@@ -0,0 +1,392 @@
+import argparse
+import ast
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Field values the pipeline schemas expect that cannot be read from the prompt
+FIELD_CHOICES = {
+    "better_paper": ["A", "B", "equal"],
+}
+
+DISQUALIFY_REASONS = ["No evaluation", "No related work", "No novelty", "Review only"]
+
+
+def parse_latency(spec: str):
+    """
+    Latency sampler from a spec string:
+        fixed:S, uniform:LO,HI, normal:MEAN,STD, lognormal:MEDIAN,SIGMA or exp:MEAN (seconds)
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    samplers = {
+        "fixed": lambda rng: values[0],
+        "uniform": lambda rng: rng.uniform(values[0], values[1]),
+        "normal": lambda rng: max(0.0, rng.gauss(values[0], values[1])),
+        "lognormal": lambda rng: values[0] * rng.lognormvariate(0.0, values[1]),
+        "exp": lambda rng: rng.expovariate(1.0 / values[0]),
+    }
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+    if kind not in samplers or len(values) != arity[kind]:
+        raise ValueError(f"Bad latency spec {spec!r}, expected one of fixed:S, uniform:LO,HI, normal:MEAN,STD, "
+                         "lognormal:MEDIAN,SIGMA, exp:MEAN")
+    return samplers[kind]
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def message_text(message: Dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def last_list_literal(text: str) -> List[str]:
+    """
+    Options offered in a prompt as a Python list literal, e.g. the topic and sub-category lists.
+    """
+    for match in reversed(list(re.finditer(r"\[[^\[\]]*\]", text))):
+        try:
+            values = ast.literal_eval(match.group(0))
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(values, list) and values and all(isinstance(v, str) for v in values):
+            return values
+    return []
+
+
+class MockBehavior:
+    """
+    Deterministic response content: the same request always gets the same answer.
+
+    Args:
+        disqualify_rate: Fraction of "Qualified./Disqualified:" prompts answered with a disqualification
+        empty_secondary_rate: Fraction of structured answers leaving a *secondary* field empty
+        low_confidence_rate: Fraction of answers whose "confidence" field or verdict-token logprob is low,
+                             i.e. that a model cascade should escalate
+    """
+
+    def __init__(self, disqualify_rate: float = 0.1, empty_secondary_rate: float = 0.5, low_confidence_rate: float = 0.2):
+        self.disqualify_rate = disqualify_rate
+        self.empty_secondary_rate = empty_secondary_rate
+        self.low_confidence_rate = low_confidence_rate
+
+    @staticmethod
+    def rng_for(request: Dict) -> random.Random:
+        key = json.dumps([request.get("model"), request.get("messages")], sort_keys=True, default=str)
+        return random.Random(hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def confidence(self, rng: random.Random) -> float:
+        if rng.random() < self.low_confidence_rate:
+            return round(rng.uniform(0.3, 0.75), 3)
+        return round(rng.uniform(0.9, 1.0), 3)
+
+    def logprobs(self, request: Dict, content: str) -> Dict:
+        """
+        OpenAI-style token logprobs of content. The first word carries the answer's confidence, every
+        other token is near-certain.
+        """
+        rng = random.Random(f"confidence:{self.rng_for(request).random()}")
+        answer_confidence = self.confidence(rng)
+        tokens = []
+        for text in re.findall(r"\s*\w+|\s*[^\w\s]", content):
+            first_word = not any(t["token"].strip().isalpha() for t in tokens) and text.strip().isalpha()
+            tokens.append({"token": text, "logprob": round(math.log(answer_confidence if first_word else 0.99), 6),
+                           "bytes": list(text.encode("utf-8")), "top_logprobs": []})
+        return {"content": tokens}
+
+    def structured(self, schema: Dict, prompt: str, rng: random.Random) -> Dict:
+        options = last_list_literal(prompt)
+        answer = {}
+        for name, prop in schema.get("properties", {}).items():
+            kind = prop.get("type")
+            if name == "confidence":
+                answer[name] = self.confidence(rng)
+            elif "enum" in prop:
+                answer[name] = rng.choice(prop["enum"])
+            elif kind == "boolean":
+                answer[name] = rng.random() < 0.1
+            elif kind in ("integer", "number"):
+                answer[name] = rng.randint(0, 10)
+            elif name in FIELD_CHOICES:
+                answer[name] = rng.choice(FIELD_CHOICES[name])
+            elif "reason" in name:
+                answer[name] = f"Synthetic reasoning {rng.randint(0, 9999)}."
+            elif options and ("topic" in name or "category" in name):
+                if "secondary" in name and rng.random() < self.empty_secondary_rate:
+                    answer[name] = ""
+                else:
+                    answer[name] = rng.choice(options)
+            else:
+                answer[name] = f"synthetic {name}"
+        return answer
+
+    def text(self, prompt: str, rng: random.Random) -> str:
+        if "Qualified. Reason:" in prompt and "Disqualified:" in prompt:
+            if rng.random() < self.disqualify_rate:
+                return f"Disqualified: {rng.choice(DISQUALIFY_REASONS)}. Reason: Synthetic verdict."
+            return "Qualified. Reason: Synthetic verdict."
+        return "OK"
+
+    def respond(self, request: Dict) -> str:
+        rng = self.rng_for(request)
+        messages = request.get("messages") or []
+        prompt = "\n".join(message_text(m) for m in messages if m.get("role") != "assistant")
+        last_user = next((message_text(m) for m in reversed(messages) if m.get("role") == "user"), prompt)
+
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            return json.dumps(self.structured(schema, last_user, rng))
+        if response_format.get("type") == "json_object":
+            return json.dumps({"answer": self.text(prompt, rng)})
+        return self.text(prompt, rng)
+
+
+class MockState:
+    """
+    Fault injection, rate limiting, prompt-prefix cache simulation and token accounting shared by all handlers.
+    """
+
+    def __init__(self, latency: str = "fixed:0", error_429: float = 0.0, error_500: float = 0.0, rpm: int = 0,
+                 seed: int = 0, behavior: Optional[MockBehavior] = None, model_latency: Optional[Dict[str, str]] = None):
+        self.sample_latency = parse_latency(latency)
+        self.latency_spec = latency
+        # Per-model overrides, e.g. a fast cheap tier and a slower strong tier of a model cascade
+        self.model_latency_spec = dict(model_latency or {})
+        self.model_latency = {model: parse_latency(spec) for model, spec in self.model_latency_spec.items()}
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.rpm = rpm
+        self.behavior = behavior or MockBehavior()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = Counter()
+            self.models = Counter()
+            self.tokens = Counter()
+            self.latencies: List[float] = []
+            self.window = deque()
+            self.prefixes = set()
+            self.started = time.time()
+
+    def admit(self) -> Optional[int]:
+        """
+        Decide the fate of one request: None to serve it, or an HTTP error status to return.
+        """
+        with self.lock:
+            now = time.time()
+            if self.rpm:
+                while self.window and now - self.window[0] > 60:
+                    self.window.popleft()
+                if len(self.window) >= self.rpm:
+                    return 429
+                self.window.append(now)
+            roll = self.rng.random()
+            if roll < self.error_429:
+                return 429
+            if roll < self.error_429 + self.error_500:
+                return 500
+            return None
+
+    def latency(self, model: Optional[str] = None) -> float:
+        sampler = self.model_latency.get(model or "", self.sample_latency)
+        with self.lock:
+            return sampler(self.rng)
+
+    def cached_tokens(self, messages: List[Dict]) -> int:
+        """
+        Simulate provider prompt caching: a repeated leading system message counts as cached.
+        """
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        prefix = message_text(messages[0])
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        with self.lock:
+            seen = key in self.prefixes
+            self.prefixes.add(key)
+        # Providers only cache prefixes of at least 1024 tokens
+        return count_tokens(prefix) if seen and count_tokens(prefix) >= 1024 else 0
+
+    def record(self, status: int, latency: float, usage: Optional[Dict] = None, model: Optional[str] = None):
+        with self.lock:
+            self.counts[str(status)] += 1
+            if model:
+                self.models[model] += 1
+            self.latencies.append(latency)
+            if usage:
+                self.tokens["prompt"] += usage["prompt_tokens"]
+                self.tokens["completion"] += usage["completion_tokens"]
+                self.tokens["cached"] += usage["prompt_tokens_details"]["cached_tokens"]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            elapsed = time.time() - self.started
+
+            def percentile(q):
+                return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 4) if latencies else 0.0
+
+            return {
+                "requests": sum(self.counts.values()),
+                "by_status": dict(self.counts),
+                "by_model": dict(self.models),
+                "tokens": dict(self.tokens),
+                "latency_s": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+                              "max": round(latencies[-1], 4) if latencies else 0.0},
+                "elapsed_s": round(elapsed, 2),
+                "requests_per_s": round(sum(self.counts.values()) / elapsed, 2) if elapsed else 0.0,
+                "config": {"latency": self.latency_spec, "model_latency": self.model_latency_spec,
+                           "error_429": self.error_429, "error_500": self.error_500, "rpm": self.rpm},
+            }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state: MockState = None
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str, kind: str, headers: Optional[Dict] = None):
+        self._send(status, {"error": {"message": message, "type": kind, "code": status}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/stats", "/v1/stats"):
+            self._send(200, self.state.stats())
+        elif self.path.rstrip("/") in ("/models", "/v1/models"):
+            self._send(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path in ("/reset", "/v1/reset"):
+            self.state.reset()
+            self._send(200, {"reset": True})
+            return
+        if path not in ("/chat/completions", "/v1/chat/completions"):
+            self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+            return
+
+        start = time.time()
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except json.JSONDecodeError:
+            self._error(400, "Request body is not JSON", "invalid_request_error")
+            return
+        if request.get("stream"):
+            self._error(400, "Streaming is not supported by the mock server", "invalid_request_error")
+            return
+
+        time.sleep(self.state.latency(request.get("model")))
+        status = self.state.admit()
+        if status == 429:
+            self.state.record(429, time.time() - start)
+            self._error(429, "Rate limit reached (injected)", "rate_limit_error", {"Retry-After": "1"})
+            return
+        if status == 500:
+            self.state.record(500, time.time() - start)
+            self._error(500, "Internal server error (injected)", "server_error")
+            return
+
+        content = self.state.behavior.respond(request)
+        messages = request.get("messages") or []
+        prompt_tokens = sum(count_tokens(message_text(m)) for m in messages)
+        completion_tokens = count_tokens(content)
+        max_tokens = request.get("max_tokens")
+        finish_reason = "stop"
+        if max_tokens and completion_tokens > max_tokens and not request.get("response_format"):
+            content = content[:4 * max_tokens]
+            completion_tokens = max_tokens
+            finish_reason = "length"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": self.state.cached_tokens(messages)},
+        }
+        self.state.record(200, time.time() - start, usage, request.get("model"))
+        choice = {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}
+        if request.get("logprobs"):
+            choice["logprobs"] = self.state.behavior.logprobs(request, content)
+        self._send(200, {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [choice],
+            "usage": usage,
+        })
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, state: Optional[MockState] = None, quiet: bool = True):
+    """
+    Start the mock server in a background thread and return it; stop it with server.shutdown().
+    """
+    handler = type("Handler", (MockHandler,), {"state": state or MockState(), "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server for load tests of the filter and classifier.")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--latency", default="lognormal:0.5,0.4",
+                        help="Latency distribution: fixed:S, uniform:LO,HI, normal:MEAN,STD, lognormal:MEDIAN,SIGMA, "
+                             "exp:MEAN (default: lognormal:0.5,0.4)")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429 (default: 0)")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Fraction of requests answered with 500 (default: 0)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s, 0 for unlimited (default: 0)")
+    parser.add_argument("--disqualify-rate", type=float, default=0.1,
+                        help="Fraction of filter prompts answered \"Disqualified:\" (default: 0.1)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Latency distribution for one model, e.g. gpt-4o-mini=fixed:0.2 (repeatable)")
+    parser.add_argument("--low-confidence-rate", type=float, default=0.2,
+                        help="Fraction of answers with a low confidence field or verdict logprob (default: 0.2)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and fault injection (default: 0)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    state = MockState(args.latency, args.error_429, args.error_500, args.rpm, args.seed,
+                      MockBehavior(args.disqualify_rate, low_confidence_rate=args.low_confidence_rate),
+                      dict(spec.split("=", 1) for spec in args.model_latency))
+    server = serve(args.host, args.port, state, quiet=not args.verbose)
+    print(f"Mock LLM server on http://{args.host}:{args.port}/v1 (latency {args.latency}, "
+          f"429 {args.error_429:.0%}, 500 {args.error_500:.0%}); stats at /stats")
+    print(f"Run stages against it with: CSRA_API_BASE=http://{args.host}:{args.port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(state.stats(), indent=2))
+        server.shutdown()
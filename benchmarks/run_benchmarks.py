@@ -0,0 +1,184 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("benchmarks", "clustering", "disqualified", "paper_downloading"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from corpus import generate_corpus
+from download_arxiv import trim_document
+from llm_topic_classifier import classify_text, count_ref_topics
+from marker_runner import extract_title_abstract, split_sections
+from merge_filter import extract_introduction, is_english
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SCALES = [10, 30, 100]
+
+# Stop repeating a benchmark once its timed runs add up to this many seconds
+MAX_REPEAT_SECONDS = 5.0
+
+# Differences below these are treated as noise when comparing against a baseline
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA_KIB = 256
+
+
+def _dump(papers):
+    stream = io.StringIO()
+    yaml.dump({"papers": papers}, stream, allow_unicode=True, sort_keys=False)
+    return stream.getvalue()
+
+
+# Each benchmark maps a corpus to (function, inputs); only the calls of function over inputs are measured
+BENCHMARKS: Dict[str, Callable[[List[Dict]], Tuple[Callable, List[tuple]]]] = {
+    "classify_text": lambda papers: (classify_text, [(p["abstract"],) for p in papers]),
+    "count_ref_topics": lambda papers: (count_ref_topics, [(p["references"],) for p in papers]),
+    "split_sections": lambda papers: (split_sections, [(p["document"],) for p in papers]),
+    "extract_title_abstract": lambda papers: (extract_title_abstract, [
+        (p["document"], split_sections(p["document"]), p["id"]) for p in papers]),
+    "extract_introduction": lambda papers: (extract_introduction, [(p["document"], p["abstract"]) for p in papers]),
+    "trim_document": lambda papers: (trim_document, [(p["document"],) for p in papers]),
+    "is_english": lambda papers: (is_english, [(p["document"],) for p in papers]),
+    "yaml_dump": lambda papers: (_dump, [(papers,)]),
+    "yaml_load": lambda papers: (yaml.safe_load, [(_dump(papers),)]),
+}
+
+
+def measure(function: Callable, inputs: List[tuple], repeat: int) -> Dict:
+    """
+    Best wall time over up to repeat runs, then the peak traced allocation of one more run.
+    """
+    best = float("inf")
+    total = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in inputs:
+            function(*args)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        if total > MAX_REPEAT_SECONDS:
+            break
+
+    tracemalloc.start()
+    for args in inputs:
+        function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_kib": round(peak / 1024, 1)}
+
+
+def run_suite(scales: List[int], repeat: int = 3, seed: int = 0, only: Optional[List[str]] = None) -> Dict:
+    """
+    Time every hot path on synthetic corpora of each size.
+
+    Args:
+        scales: Corpus sizes in papers
+        repeat: Timed runs per benchmark and scale, the fastest is kept
+        seed: Corpus seed; results are only comparable between runs with the same seed
+        only: Optional subset of benchmark names
+    """
+    names = only or list(BENCHMARKS)
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}, expected some of {sorted(BENCHMARKS)}")
+
+    results = {name: {} for name in names}
+    # Every smaller corpus is a prefix of the largest one, so documents are shared across scales
+    corpus = generate_corpus(max(scales), seed)
+    for scale in sorted(scales):
+        papers = corpus[:scale]
+        chars = sum(len(p["document"]) for p in papers)
+        print(f"\n== {scale} papers, {chars / 1e6:.1f}M document chars ==")
+        for name in names:
+            function, inputs = BENCHMARKS[name](papers)
+            result = measure(function, inputs, repeat)
+            result["ms_per_paper"] = round(1000 * result["seconds"] / scale, 4)
+            results[name][str(scale)] = result
+            print(f"  {name:<24} {result['seconds']:9.4f}s  {result['ms_per_paper']:9.3f} ms/paper  "
+                  f"peak {result['peak_kib']:10.1f} KiB")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "repeat": repeat,
+            "scales": sorted(scales),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.25) -> List[str]:
+    """
+    List benchmarks that got slower or use more memory than the baseline by more than threshold.
+    """
+    if current["meta"]["seed"] != baseline["meta"]["seed"]:
+        print(f"[!] Baseline seed {baseline['meta']['seed']} differs from {current['meta']['seed']}; "
+              "corpora are not the same")
+    if current["meta"]["machine"] != baseline["meta"]["machine"] or current["meta"]["python"] != baseline["meta"]["python"]:
+        print("[!] Baseline was recorded on a different machine or Python version; compare with care")
+
+    regressions = []
+    print(f"\n{'benchmark':<24} {'papers':>7} {'time':>8} {'memory':>8}")
+    for name, scales in current["results"].items():
+        for scale, result in scales.items():
+            base = baseline["results"].get(name, {}).get(scale)
+            if not base:
+                continue
+            time_ratio = result["seconds"] / base["seconds"] if base["seconds"] else 1.0
+            memory_ratio = result["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+            flags = []
+            if time_ratio > 1 + threshold and result["seconds"] - base["seconds"] > MIN_TIME_DELTA:
+                flags.append("time")
+            if memory_ratio > 1 + threshold and result["peak_kib"] - base["peak_kib"] > MIN_MEMORY_DELTA_KIB:
+                flags.append("memory")
+            marker = f"  <- {' and '.join(flags)} regression" if flags else ""
+            print(f"{name:<24} {scale:>7} {time_ratio:7.2f}x {memory_ratio:7.2f}x{marker}")
+            if flags:
+                regressions.append(f"{name}@{scale}: {', '.join(flags)}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline's text-processing hot paths on synthetic corpora.")
+    parser.add_argument("-s", "--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated corpus sizes (default: 10,30,100)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per benchmark, fastest kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("-b", "--bench", action="append", help="Run only this benchmark (repeatable)")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="Store results as the baseline (default: benchmarks/baseline.json)")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE,
+                        help="Compare against a baseline and exit 1 on regressions (default: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown or memory growth counted as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    current = run_suite([int(s) for s in args.scales.split(",")], args.repeat, args.seed, args.bench)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n[✓] Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n[✗] {len(regressions)} regressions: {'; '.join(regressions)}")
+            sys.exit(1)
+        print("\n[✓] No regressions")
@@ -1,82 +1,268 @@
 import yaml
 import os
 import argparse
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from selenium import webdriver
-from bs4 import BeautifulSoup
+from acm_parser import fetch_acm_html, parse_acm_html
 
-def update_yaml(url, output_file):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.profiling import PROFILER, add_profile_arguments
+
+def new_driver(headless=False):
+    options = webdriver.ChromeOptions()
+    options.add_argument("--no-sandbox")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+    return webdriver.Chrome(options=options)
+
+def prepare_output(output_file):
+    """
+    Makes sure the output file ends with the `papers:` block sequence so new papers can be appended
+    without rewriting the file. Returns the set of URLs already stored.
+    """
+    if not os.path.exists(output_file):
+        open(output_file, 'w').close()
+
+    with open(output_file,'r') as yamlfile, PROFILER.span("yaml_load"):
+        text = yamlfile.read()
+        yaml_content = yaml.safe_load(text)
+
+    if not yaml_content:
+        yaml_content = {}
+
+    papers = yaml_content.pop('papers', None) or []
+    if not yaml_content and text.startswith("papers:\n"):
+        return {p.get('url') for p in papers}
+
+    # Rewrite once to move `papers:` to the end of the file in block style
+    with open(output_file,'w') as yamlfile:
+        if yaml_content:
+            yaml.safe_dump(yaml_content, yamlfile, sort_keys=False)
+        if papers:
+            yaml.safe_dump({'papers': papers}, yamlfile, sort_keys=False)
+        else:
+            yamlfile.write("papers:\n")
+
+    return {p.get('url') for p in papers}
+
+def append_paper(paper, output_file):
+    """
+    Appends one paper to the `papers:` list at the end of the output file.
+    """
+    with open(output_file,'a') as yamlfile, PROFILER.span("yaml_dump"):
+        yamlfile.write(yaml.safe_dump([paper], sort_keys=False))
+        yamlfile.flush()
+        os.fsync(yamlfile.fileno())
+
+def update_yaml(url, output_file, driver=None, seen=None):
     """
     Scrapes an ACM digital library article page for paper information and stores in a yaml file.
 
     Args:
         url: ACM library article url
         output_file: Existing yaml file to update
-    
+        driver: Optional WebDriver to reuse; a new one is started and closed otherwise
+        seen: URLs already in output_file from prepare_output(), updated in place; the file is read when omitted
+
     """
-    if not os.path.exists(output_file):
-        open(output_file, 'w').close()
+    if seen is None:
+        seen = prepare_output(output_file)
+    if url in seen:
+        print(f"[SKIP] Already in {output_file}: {url}")
+        return
 
-    with open(output_file,'r') as yamlfile:
-        yaml_content = yaml.safe_load(yamlfile)
+    dr = driver or new_driver()
+    try:
+        with PROFILER.span("download"):
+            dr.get(url)
+        with PROFILER.span("html_parse"):
+            new_paper = parse_acm_html(dr.page_source, url)
+    finally:
+        if driver is None:
+            dr.quit()
 
-    if not yaml_content:
-        yaml_content = {}
+    append_paper(new_paper, output_file)
+    seen.add(url)
+    print(f"# of papers in YAML: {len(seen)}")
 
-    if not yaml_content.get('papers', None):
-        yaml_content['papers'] = []
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--no-sandbox")
+class DomainRateLimiter:
+    """
+    Spaces out requests to the same domain by at least min_interval seconds, across all threads.
+    """
 
-    dr = webdriver.Chrome(options=options)
-    dr.get(url)
-    page = BeautifulSoup(dr.page_source,"lxml")
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.next_slot = {}
+        self.lock = threading.Lock()
 
-    references = []
-    for ref in page.find_all("div", attrs={"class":"citation-content"}):
-        references.append(ref.text)
+    def wait(self, url):
+        domain = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(domain, now))
+            self.next_slot[domain] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
 
-    # references = " ".join(references)
 
-    title = page.find("div", attrs={"class": "core-publication-title"}).text
+def save_html(page_html, url, save_dir):
+    name = urlparse(url).path.strip("/").replace("/", "_") or "index"
+    with open(os.path.join(save_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+        f.write(page_html)
 
-    abstract_section = page.find("section", attrs={"property":"abstract"})
-    abstract_paragraphs = abstract_section.find_all("div", attrs={"role":"paragraph"})
-    abstract = "\n".join([a.text for a in abstract_paragraphs])
 
-    keywords_section = page.find("section", attrs={"id":"sec-terms"})
-    keywords_elements = keywords_section.find_all("a")
-    keywords = ",".join([k.text for k in keywords_elements])
+def scrape_batch(urls, output_file, workers=4, min_interval=2.0, retries=1, fetch="auto", save_dir=None):
+    """
+    Scrapes many ACM article pages with a pool of headless browsers kept alive for the whole run.
 
-    new_paper = {'abstract': abstract,
-                    'keywords': keywords,
-                    'title': title,
-                    'url': url,
-                    'references': references
-                }
+    Pages are fetched concurrently, one browser per worker, with requests to the same domain spaced by
+    min_interval seconds. Each paper is appended to output_file as soon as it is parsed, and URLs already
+    in the file are skipped, so an interrupted run can be restarted with the same URL list.
 
-    yaml_content['papers'].append(new_paper)
+    Args:
+        urls: ACM library article urls
+        output_file: Yaml file to append to
+        workers: Number of browser sessions
+        min_interval: Minimum seconds between requests to the same domain
+        retries: Extra attempts per URL, each with a fresh browser
+        fetch: "auto" tries a plain HTTP request first and only renders pages without content in a browser,
+               "browser" always renders
+        save_dir: Optional folder to keep the fetched HTML, e.g. as parser fixtures
+    """
+    seen = prepare_output(output_file)
+    pending = []
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            pending.append(url)
+    print(f"{len(urls)} urls, {len(urls) - len(pending)} already in {output_file}, {len(pending)} to scrape")
+    if not pending:
+        return
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
 
-    dr.close()
+    limiter = DomainRateLimiter(min_interval)
+    write_lock = threading.Lock()
+    # Browsers are started on first use, so runs served entirely over HTTP never launch one
+    drivers = queue.Queue()
+    for _ in range(min(workers, len(pending))):
+        drivers.put(None)
 
-    with open(output_file,'w') as yamlfile:
-        yaml.safe_dump(yaml_content, yamlfile)
+    done = 0
+    direct = 0
+    failed = []
+    start_time = time.time()
 
-    print(f"# of papers in YAML: {len(yaml_content['papers'])}")
+    def scrape(url):
+        nonlocal done, direct
+        driver = drivers.get()
+        try:
+            page_html = None
+            if fetch == "auto":
+                limiter.wait(url)
+                with PROFILER.span("download"):
+                    page_html = fetch_acm_html(url)
+            from_browser = page_html is None
+
+            for attempt in range(retries + 1):
+                try:
+                    if page_html is None:
+                        driver = driver or new_driver(headless=True)
+                        limiter.wait(url)
+                        with PROFILER.span("browser_download"):
+                            driver.get(url)
+                            page_html = driver.page_source
+                    with PROFILER.span("html_parse"):
+                        paper = parse_acm_html(page_html, url)
+                    break
+                except Exception as e:
+                    print(f"[ERROR] {url} (attempt {attempt + 1}): {e}")
+                    page_html = None
+                    if driver is not None:
+                        try:
+                            driver.quit()
+                        except Exception:
+                            pass
+                    driver = None
+            else:
+                failed.append(url)
+                return
+
+            if save_dir:
+                save_html(page_html, url, save_dir)
+            with write_lock:
+                append_paper(paper, output_file)
+                done += 1
+                direct += not from_browser
+                elapsed = time.time() - start_time
+                print(f"[{done}/{len(pending)}] {paper['title'].strip()[:80]} ({elapsed / done:.1f}s/paper)")
+        finally:
+            drivers.put(driver)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(scrape, pending))
+    finally:
+        while not drivers.empty():
+            driver = drivers.get()
+            if driver is not None:
+                driver.quit()
+
+    print(f"[✓] Added {done} papers to {output_file} in {time.time() - start_time:.1f}s "
+          f"({direct} without a browser)")
+    if failed:
+        print(f"[!] {len(failed)} urls failed, rerun with the same list to retry:")
+        for url in failed:
+            print(f"    {url}")
+
+
+def read_url_list(path):
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Download arXiv CS papers as PDFs or Markdown.")
+    parser = argparse.ArgumentParser(description="Scrape ACM digital library article pages into a paper YAML file.")
     parser.add_argument(
         "--output-file", "-o", type=str, required=True,
         help="Yaml file to update"
     )
+    parser.add_argument(
+        "--urls", "-u", type=str, default=None,
+        help="Text file with one ACM article url per line; scrape them in batch instead of prompting"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Headless browser sessions in batch mode (default: 4)")
+    parser.add_argument("--min-interval", type=float, default=2.0,
+                        help="Minimum seconds between requests to the same domain in batch mode (default: 2.0)")
+    parser.add_argument("--fetch", choices=["auto", "browser"], default="auto",
+                        help="Batch mode: 'auto' tries plain HTTP before rendering in a browser (default: auto)")
+    parser.add_argument("--save-html", type=str, default=None, help="Batch mode: folder to keep the fetched pages")
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    PROFILER.configure(args.profile, "ACM_yaml_generator", args.profile_dir)
 
-    while True:
-        url = input('Enter an ACM digital library article url (Enter DONE to stop):\n')
-        if url == "DONE":
-            break
-        update_yaml(url, args.output_file)
-
-
+    try:
+        if args.urls:
+            scrape_batch(read_url_list(args.urls), args.output_file, args.workers, args.min_interval,
+                         fetch=args.fetch, save_dir=args.save_html)
+        else:
+            # The file is read once per session; update_yaml only appends
+            seen = prepare_output(args.output_file)
+            driver = new_driver()
+            try:
+                while True:
+                    url = input('Enter an ACM digital library article url (Enter DONE to stop):\n')
+                    if url == "DONE":
+                        break
+                    update_yaml(url, args.output_file, driver, seen)
+            finally:
+                driver.quit()
+    finally:
+        PROFILER.finish()
@@ -0,0 +1,86 @@
+import requests
+
+from lxml import etree, html as lxml_html
+
+# Class tests match one token of a multi-class attribute, like BeautifulSoup's class_ matching
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+TITLE_XPATH = etree.XPath(f"(//div[{_has_class('core-publication-title')}])[1]")
+ABSTRACT_XPATH = etree.XPath("(//section[@property='abstract'])[1]//div[@role='paragraph']")
+KEYWORDS_XPATH = etree.XPath("(//section[@id='sec-terms'])[1]//a")
+REFERENCES_XPATH = etree.XPath(f"//div[{_has_class('citation-content')}]")
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class NotAnArticlePage(ValueError):
+    """
+    The HTML does not contain an ACM article, e.g. a JavaScript shell, a challenge page or an error page.
+    """
+
+
+def _text(element):
+    return "".join(element.itertext())
+
+
+def parse_acm_html(page_html, url):
+    """
+    Extracts paper information from the HTML of an ACM digital library article page.
+
+    Works on saved pages, browser-rendered pages and pages fetched over plain HTTP alike.
+
+    Args:
+        page_html: Page HTML as str or bytes
+        url: ACM library article url, stored with the paper
+
+    Returns:
+        Paper dict with abstract, keywords, title, url and references
+    """
+    if not page_html or not page_html.strip():
+        raise NotAnArticlePage(f"Empty page for {url}")
+    tree = lxml_html.document_fromstring(page_html)
+
+    title = TITLE_XPATH(tree)
+    if not title:
+        raise NotAnArticlePage(f"No publication title found for {url}")
+
+    return {'abstract': "\n".join(_text(p) for p in ABSTRACT_XPATH(tree)),
+            'keywords': ",".join(_text(k) for k in KEYWORDS_XPATH(tree)),
+            'title': _text(title[0]),
+            'url': url,
+            'references': [_text(r) for r in REFERENCES_XPATH(tree)]
+        }
+
+
+def has_article_content(page_html):
+    """
+    Whether the HTML already holds the article metadata, so no browser rendering is needed.
+    """
+    try:
+        tree = lxml_html.document_fromstring(page_html)
+    except (etree.ParserError, ValueError):
+        return False
+    return bool(TITLE_XPATH(tree)) and bool(ABSTRACT_XPATH(tree))
+
+
+def fetch_acm_html(url, timeout=30, session=None):
+    """
+    Fetches an article page over plain HTTP.
+
+    Returns:
+        The page HTML, or None when the response is not a complete article page (blocked, challenge page,
+        content rendered by JavaScript) and a browser is needed instead
+    """
+    try:
+        response = (session or requests).get(url, headers=HTTP_HEADERS, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"[!] Direct fetch failed for {url}: {e}")
+        return None
+    if response.status_code != 200 or not has_article_content(response.content):
+        return None
+    return response.text
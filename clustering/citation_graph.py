@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import yaml
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.cluster_index import cluster_files
+from common.dedup import arxiv_id
+from common.journal import paper_key
+from common.profiling import PROFILER
+
+DEFAULT_THRESHOLD = 0.8
+# Share of a node's score taken from its neighbours each iteration, the rest comes from its own seed label
+ALPHA = 0.85
+MAX_ITERATIONS = 30
+TOLERANCE = 1e-4
+HOLDOUT = 0.2
+SWEEP = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+# Shorter normalized segments ("neural networks", "in proceedings") would link unrelated papers
+MIN_TITLE_WORDS = 4
+SECONDARY_WEIGHT = 0.5
+EDGE_BLOCK = 1_000_000
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_SEGMENT_RE = re.compile(r"(?<=[a-z0-9)\]])[.?!](?:\s+|$)|[\"“”]|\*", re.IGNORECASE)
+_REF_ARXIV_RE = re.compile(r"(?<![\d.])(\d{4}\.\d{4,5})(?:v\d+)?(?![\d.])")
+
+
+def normalize_title(text: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+class TitleIndex:
+    """
+    Hash index from normalized titles and arXiv ids to node numbers, used to resolve reference strings.
+
+    A reference is split at sentence ends, quotes and emphasis, which is where reference styles put the
+    title, and each segment of at least MIN_TITLE_WORDS words is looked up whole, so resolving costs a
+    few dictionary lookups per reference.
+    """
+
+    def __init__(self):
+        self.titles: Dict[str, int] = {}
+        self.arxiv_ids: Dict[str, int] = {}
+
+    def add(self, node: int, title: str, paper: Optional[Dict] = None):
+        key = normalize_title(title or "")
+        if len(key.split()) >= MIN_TITLE_WORDS:
+            self.titles.setdefault(key, node)
+        found = arxiv_id(paper) if paper else None
+        if found:
+            self.arxiv_ids.setdefault(found[0], node)
+
+    def resolve(self, reference: str) -> Optional[int]:
+        for match in _REF_ARXIV_RE.finditer(reference):
+            node = self.arxiv_ids.get(match.group(1))
+            if node is not None:
+                return node
+        for segment in _SEGMENT_RE.split(reference):
+            key = normalize_title(segment)
+            if key.count(" ") + 1 >= MIN_TITLE_WORDS:
+                node = self.titles.get(key)
+                if node is not None:
+                    return node
+        return None
+
+
+def load_seed_records(cluster_dirs: List[str]) -> Dict[str, Dict]:
+    """
+    LLM-classified records of earlier paper_classifier.py runs, keyed by paper key. Records this stage
+    labelled are skipped, so propagated labels never seed (or get scored against) further propagation.
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    records = {}
+    for cluster_dir in cluster_dirs:
+        for path in sorted(cluster_files(cluster_dir)):
+            with open(os.path.join(cluster_dir, path), "r", encoding="utf-8") as f:
+                for record in (yaml.load(f, Loader=loader) or {}).get("papers") or []:
+                    if record.get("topics") and record.get("classified_by") != "citation_graph":
+                        records.setdefault(paper_key(record), record)
+    return records
+
+
+def build_graph(papers: List[Dict], seed_records: Dict[str, Dict]) -> Tuple[List[str], Dict[str, int], np.ndarray, Dict]:
+    """
+    Citation graph over the corpus and the seed papers.
+
+    Returns:
+        (node keys, node number by key, int32 array of undirected edges (2, E) with both directions,
+         resolution stats)
+    """
+    keys: List[str] = []
+    nodes: Dict[str, int] = {}
+    index = TitleIndex()
+
+    def node_of(key: str, title: str, paper: Optional[Dict] = None) -> int:
+        node = nodes.get(key)
+        if node is None:
+            node = nodes[key] = len(keys)
+            keys.append(key)
+        index.add(node, title, paper)
+        return node
+
+    for paper in papers:
+        node_of(paper_key(paper), paper.get("title", ""), paper)
+    for key, record in seed_records.items():
+        node_of(key, record.get("title", ""))
+
+    sources, targets = [], []
+    references = resolved = 0
+    for paper in papers:
+        source = nodes[paper_key(paper)]
+        for reference in paper.get("references") or []:
+            references += 1
+            target = index.resolve(str(reference))
+            if target is not None and target != source:
+                resolved += 1
+                sources.append(source)
+                targets.append(target)
+
+    edges = np.array([sources + targets, targets + sources], dtype=np.int32).reshape(2, -1)
+    if edges.shape[1]:
+        # Cited twice (e.g. the arXiv and the published version) still counts as one link
+        edges = np.unique(edges, axis=1)
+    stats = {"nodes": len(keys), "references": references, "resolved": resolved,
+             "resolution_rate": round(resolved / references, 4) if references else 0.0, "edges": edges.shape[1] // 2}
+    return keys, nodes, edges, stats
+
+
+def main_cluster(record: Dict) -> Tuple[str, str]:
+    topics = record["topics"]
+    return topics.get("main_topic", "Other"), topics.get("main_topic_sub", "")
+
+
+def propagate(edges: np.ndarray, n: int, seed_rows: np.ndarray, seed_labels: np.ndarray, k: int,
+              alpha: float = ALPHA, iterations: int = MAX_ITERATIONS, tolerance: float = TOLERANCE) -> np.ndarray:
+    """
+    Label spreading with clamped seeds: F ← alpha · D⁻¹AF + (1 - alpha) · Y, then seed rows reset to Y.
+
+    Args:
+        edges: (2, E) array from build_graph, sorted by its first row, with both directions of every link
+        seed_rows, seed_labels: (rows, label, weight) triples as parallel arrays, seed_labels is (S, 2)
+                                of label index and weight
+    Returns:
+        (n, k) float32 array of label scores; rows of nodes with no path to a seed stay zero
+    """
+    y = np.zeros((n, k), dtype=np.float32)
+    np.add.at(y, (seed_rows, seed_labels[:, 0].astype(np.int64)), seed_labels[:, 1])
+    seeded = np.unique(seed_rows)
+    y[seeded] /= y[seeded].sum(axis=1, keepdims=True)
+    if not edges.shape[1]:
+        return y
+
+    # Every link is stored both ways, so each node's neighbours are the second row of its run in the first
+    targets, sources = edges
+    degree = np.bincount(targets, minlength=n).astype(np.float32)
+    rows, starts = np.unique(targets, return_index=True)
+    # Gathering neighbour scores takes edges x labels floats, so large graphs are summed in blocks of rows
+    block_rows = max(1, int(len(rows) * EDGE_BLOCK / len(targets)))
+    blocks = [(rows[i:i + block_rows], starts[i:i + block_rows]) for i in range(0, len(rows), block_rows)]
+    scores = y.copy()
+    for _ in range(iterations):
+        updated = (1 - alpha) * y
+        for block, block_starts in blocks:
+            end = block_starts[-1] + degree[block[-1]].astype(np.int64)
+            gathered = scores[sources[block_starts[0]:end]]
+            updated[block] += alpha * np.add.reduceat(gathered, block_starts - block_starts[0], axis=0) / degree[block, None]
+        updated[seeded] = y[seeded]
+        change = np.abs(updated - scores).max()
+        scores = updated
+        if change < tolerance:
+            break
+    return scores
+
+
+class Labels:
+    """
+    Cluster labels of the seed records, with the topic each label belongs to.
+    """
+
+    def __init__(self, seed_records: Dict[str, Dict]):
+        self.clusters: List[Tuple[str, str]] = []
+        self.index: Dict[Tuple[str, str], int] = {}
+        for record in seed_records.values():
+            self.of(main_cluster(record))
+            topics = record["topics"]
+            if topics.get("secondary_topic"):
+                self.of((topics["secondary_topic"], topics.get("secondary_topic_sub", "")))
+        self.topics = sorted({topic for topic, _ in self.clusters})
+        topic_index = {topic: i for i, topic in enumerate(self.topics)}
+        self.topic_of = np.array([topic_index[topic] for topic, _ in self.clusters], dtype=np.int64)
+
+    def of(self, cluster: Tuple[str, str]) -> int:
+        if cluster not in self.index:
+            self.index[cluster] = len(self.clusters)
+            self.clusters.append(cluster)
+        return self.index[cluster]
+
+    def seed_arrays(self, seed_records: Dict[str, Dict], nodes: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        rows, labels = [], []
+        for key, record in seed_records.items():
+            rows.append(nodes[key])
+            labels.append((self.index[main_cluster(record)], 1.0))
+            topics = record["topics"]
+            if topics.get("secondary_topic"):
+                rows.append(nodes[key])
+                labels.append((self.index[(topics["secondary_topic"], topics.get("secondary_topic_sub", ""))],
+                               SECONDARY_WEIGHT))
+        return np.array(rows, dtype=np.int64), np.array(labels, dtype=np.float32).reshape(-1, 2)
+
+    def decide(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Most likely topic of each row, its share of the row's score, and the most likely cluster within it.
+        """
+        topic_scores = scores @ (self.topic_of[:, None] == np.arange(len(self.topics))).astype(np.float32)
+        mass = topic_scores.sum(axis=1)
+        topic = topic_scores.argmax(axis=1)
+        share = np.divide(topic_scores.max(axis=1), mass, out=np.zeros_like(mass), where=mass > 0)
+        within = np.where(self.topic_of[None, :] == topic[:, None], scores, -1.0)
+        return topic, share, within.argmax(axis=1)
+
+
+def evaluate_holdout(edges: np.ndarray, n: int, labels: Labels, seed_rows: np.ndarray, seed_labels: np.ndarray,
+                     true_topics: Dict[int, int], holdout: float = HOLDOUT, sweep=SWEEP, seed: int = 0) -> Dict:
+    """
+    Hide a random share of the seeds, propagate from the rest, and report for each threshold how many hidden
+    seeds would have been labelled (coverage) and how many of those match their LLM topic (agreement).
+    """
+    seeded = np.array(sorted(true_topics), dtype=np.int64)
+    if len(seeded) < 2:
+        return {}
+    rng = np.random.default_rng(seed)
+    hidden = rng.choice(seeded, size=max(1, int(round(holdout * len(seeded)))), replace=False)
+    keep = ~np.isin(seed_rows, hidden)
+    scores = propagate(edges, n, seed_rows[keep], seed_labels[keep], len(labels.clusters))
+    topic, share, _ = labels.decide(scores[hidden])
+    truth = np.array([true_topics[i] for i in hidden])
+    results = {}
+    for threshold in sweep:
+        decisive = share >= threshold
+        results[str(threshold)] = {
+            "coverage": round(float(decisive.mean()), 4),
+            "agreement": round(float((topic[decisive] == truth[decisive]).mean()), 4) if decisive.any() else None,
+        }
+    return {"hidden_seeds": len(hidden), "thresholds": results}
+
+
+def classified_record(paper: Dict, cluster: Tuple[str, str], share: float, links: int) -> Dict:
+    """
+    Cluster record in the shape paper_classifier.classify_paper returns.
+    """
+    return {
+        "topics": {
+            "main_topic": cluster[0],
+            "main_topic_reasoning": f"Citation graph: {share:.0%} of the topic weight propagated through "
+                                    f"{links} citation links to classified papers.",
+            "secondary_topic": "",
+            "secondary_topic_reasoning": "",
+            "main_topic_sub": cluster[1],
+            "secondary_topic_sub": "",
+        },
+        "id": paper.get("id", ""),
+        "title": paper.get("title", ""),
+        "classified_by": "citation_graph",
+    }
+
+
+def resolve_topics(papers: List[Dict], seed_records: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD,
+                   holdout: float = HOLDOUT, seed: int = 0) -> Tuple[Dict[str, Dict], Dict]:
+    """
+    Classify papers from the citation graph where the topic propagated from classified papers is decisive.
+
+    Args:
+        papers: Corpus with references
+        seed_records: Classified records (load_seed_records); corpus papers among them keep their record
+        threshold: Share of the propagated topic weight the top topic needs for a paper to be labelled
+        holdout: Share of seeds hidden to measure agreement with the LLM labels
+
+    Returns:
+        ({paper key: classified record} for seeded and decisive papers, report)
+    """
+    report = {"papers": len(papers), "seeds": len(seed_records), "threshold": threshold}
+    if not seed_records:
+        return {}, {**report, "labelled": 0, "seeded": 0, "coverage": 0.0}
+
+    with PROFILER.span("citation_graph"):
+        keys, nodes, edges, stats = build_graph(papers, seed_records)
+    report["graph"] = stats
+
+    labels = Labels(seed_records)
+    seed_rows, seed_labels = labels.seed_arrays(seed_records, nodes)
+    true_topics = {nodes[key]: labels.topics.index(main_cluster(r)[0]) for key, r in seed_records.items()}
+
+    with PROFILER.span("label_propagation"):
+        scores = propagate(edges, len(keys), seed_rows, seed_labels, len(labels.clusters))
+        report["holdout"] = evaluate_holdout(edges, len(keys), labels, seed_rows, seed_labels, true_topics, holdout,
+                                             seed=seed)
+
+    links = np.bincount(edges[1], minlength=len(keys)) if edges.shape[1] else np.zeros(len(keys), dtype=np.int64)
+    classified = {}
+    unlabelled = [p for p in papers if paper_key(p) not in seed_records]
+    rows = np.array([nodes[paper_key(p)] for p in unlabelled], dtype=np.int64)
+    topic, share, cluster = labels.decide(scores[rows]) if len(rows) else ([], [], [])
+    for i, paper in enumerate(unlabelled):
+        if share[i] >= threshold:
+            classified[paper_key(paper)] = classified_record(paper, labels.clusters[cluster[i]], float(share[i]),
+                                                             int(links[rows[i]]))
+    labelled = len(classified)
+    for paper in papers:
+        key = paper_key(paper)
+        if key in seed_records:
+            classified[key] = {**seed_records[key], "id": paper.get("id", ""), "title": paper.get("title", "")}
+
+    reached = int((share > 0).sum()) if len(rows) else 0
+    report.update({
+        "seeded": len(papers) - len(unlabelled),
+        "unlabelled": len(unlabelled),
+        "reached": reached,
+        "labelled": labelled,
+        "coverage": round(labelled / len(unlabelled), 4) if unlabelled else 0.0,
+        "topics": dict(Counter(r["topics"]["main_topic"] for k, r in classified.items()
+                               if r.get("classified_by") == "citation_graph").most_common()),
+    })
+    return classified, report
+
+
+def print_report(report: Dict):
+    graph = report.get("graph", {})
+    print(f"🕸  Citation graph: {graph.get('resolved', 0)} of {graph.get('references', 0)} references resolved "
+          f"({graph.get('resolution_rate', 0.0):.1%}), {graph.get('edges', 0)} links between {graph.get('nodes', 0)} papers")
+    print(f"   {report['seeds']} classified seeds, {report.get('seeded', 0)} of them in this corpus; "
+          f"{report['labelled']} of {report.get('unlabelled', report['papers'])} other papers labelled at threshold "
+          f"{report['threshold']} ({report['coverage']:.1%} coverage, {report.get('reached', 0)} reached by a seed)")
+    holdout = report.get("holdout") or {}
+    if holdout:
+        print(f"   Held-out seeds ({holdout['hidden_seeds']}):  threshold  coverage  agreement")
+        for threshold, row in holdout["thresholds"].items():
+            agreement = f"{row['agreement']:.1%}" if row["agreement"] is not None else "-"
+            print(f"   {'':<27}{threshold:>9} {row['coverage']:>9.1%} {agreement:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label papers from their citations to already classified papers.")
+    parser.add_argument("-f", "--file", required=True, help="Input yaml with papers and their references")
+    parser.add_argument("-s", "--seeds", nargs="+", required=True, help="paper_classifier.py output folders to seed from")
+    parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Top topic share needed to label a paper (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT,
+                        help=f"Share of seeds hidden to measure agreement (default: {HOLDOUT})")
+    parser.add_argument("-o", "--output", help="Write the labelled papers and the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        papers = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))["papers"]
+    classified, report = resolve_topics(papers, load_seed_records(args.seeds), args.threshold, args.holdout)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"report": report, "papers": classified}, f, indent=2, ensure_ascii=False)
@@ -2,12 +2,16 @@ import os
 import json
 import yaml
 import re
+import sys
 
 from collections import Counter
-from litellm import completion
-from pydantic import BaseModel 
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.cascade import cascade_completion, reported_confidence, response_content
+from common.llm_config import CLASSIFIER_LLM
+
 TOPICS = ["Artificial Intelligence", "Computer Vision", "Machine Learning", "Natural Language Processing", 
                     "The Web & Information Retrieval", "Computer Architecture", "Computer Networks", "Computer Security", "Databases", "Design Automation", 
                     "Embedded & Real-time Systems", "High-performance Computing", "Mobile Computing", "Measurement & Perf. Analysis", "Operating Systems", 
@@ -76,6 +80,13 @@ TOPIC_KEYWORDS = {
     "Visualization": ["visualization","data visualization","information visualization","scientific visualization","visual analytics","interactive visualization","graph visualization","network visualization","geovisualization","3D visualization","volume rendering","rendering","visual representation","visual encoding","data mapping","color mapping","visual perception","visual design","visual storytelling","dashboard","infographic","charting","plotting","heatmap","scatter plot","bar chart","line chart","tree map","flow visualization","time series visualization","multivariate visualization","spatial visualization","temporal visualization","visual analytics system","user interaction","visual data exploration","visual abstraction","glyph","animation","simulation visualization","dimensionality reduction","PCA","t-SNE","UMAP","visual encoding techniques","visual hierarchy","visual variables","perceptual principles","cognitive load","visual analytics workflow"]
 }
 
+# Compiled once: there are more keywords than re's pattern cache holds, so re.search recompiled them per reference
+_CONFERENCE_PATTERNS = [(topic, [re.compile(r'\b' + conf + r'\b') for conf in conferences])
+                        for topic, conferences in TOPIC_CONFERENCES.items()]
+_KEYWORD_PATTERNS = [(topic, [re.compile(r'\b' + keyword + r'\b', re.IGNORECASE) for keyword in keywords])
+                     for topic, keywords in TOPIC_KEYWORDS.items()]
+
+
 def classify_text(text: str):
     """
     Classify text based on keywords.
@@ -86,15 +97,15 @@ def classify_text(text: str):
     Returns:
         String containing the most likely classification
     """
-    for topic, conferences in TOPIC_CONFERENCES.items():
-        for conf in conferences:
-            if re.search(r'\b' + conf + r'\b', text):
+    for topic, patterns in _CONFERENCE_PATTERNS:
+        for pattern in patterns:
+            if pattern.search(text):
                 return topic
     
     scores = Counter()
-    for topic, keywords in TOPIC_KEYWORDS.items():
-        for keyword in keywords:
-            if re.search(r'\b' + keyword + r'\b', text, re.IGNORECASE):
+    for topic, patterns in _KEYWORD_PATTERNS:
+        for pattern in patterns:
+            if pattern.search(text):
                 scores[topic] += 1
 
     if scores:
@@ -122,31 +133,36 @@ def count_ref_topics(references: List[str]):
     return topic_counts
 
 
-def classify_paper_topic(
-    keywords: str,
-    title: str,
-    abstract: str,
-    reference_counts: Optional[Dict] = {},
-    api_key: Optional[str] = None
-) -> Dict:
-    
+class topics_structure(BaseModel):
+    main_topic: str
+    main_topic_reasoning: str
+    secondary_topic: str
+    secondary_topic_reasoning: str
+
+
+# The cascade's cheap tier also reports how sure it is, and is escalated when unsure or off the list
+class topics_confidence_structure(topics_structure):
+    confidence: float = Field(description="How certain the main topic is, from 0 to 1")
+
+
+class sub_topic_structure(BaseModel):
+    sub_category: str
+
+
+class sub_topic_confidence_structure(sub_topic_structure):
+    confidence: float = Field(description="How certain the sub-category is, from 0 to 1")
+
+
+def load_subcategories() -> Dict[str, List[str]]:
+    with open(os.path.join(os.path.dirname(__file__), "subcategories.yaml")) as yamlfile:
+        return yaml.safe_load(yamlfile)
+
+
+def topic_messages(keywords: str, title: str, abstract: str, reference_counts: Optional[Dict] = {}) -> List[Dict]:
     """
-    Classify a paper into a main topic based on its metadata.
-    
-    Args:
-        keywords: String containing keywords/index terms for the paper
-        title: The paper's title
-        abstract: The paper's abstract
-        reference_counts: Dictionary containing categories mapped to the # of references of those categories in the paper
-        api_key: OpenAI API key
-        
-    Returns:
-        Dictionary containing main and secondary topic classification, as well as reasonings for the decisions
+    Messages of the main/secondary topic request.
     """
-    if api_key is not None:
-        os.environ["OPENAI_API_KEY"] = api_key
-    
-    messages = [
+    return [
         {
             "role": "system",
             "content": [
@@ -169,21 +185,62 @@ def classify_paper_topic(
         },
     ]
 
-    class topics_structure(BaseModel):
-        main_topic: str
-        main_topic_reasoning: str
-        secondary_topic: str
-        secondary_topic_reasoning: str
+
+def subtopic_message(topic: str, subcategories: Dict[str, List[str]]) -> Dict:
+    """
+    User message asking for the sub-category of topic, sent after the topic request and its answer.
+    """
+    return {
+        "role": "user",
+        "content": [
+            {
+                "type": "text",
+                "text": f"Here is a list of sub-categories for {topic} papers: {subcategories.get(topic, []) + ["Other"]}. Pick the sub-category from this list that this paper fits into."
+            }
+        ],
+    }
+
+
+def classify_paper_topic(
+    keywords: str,
+    title: str,
+    abstract: str,
+    reference_counts: Optional[Dict] = {},
+    api_key: Optional[str] = None
+) -> Dict:
+    
+    """
+    Classify a paper into a main topic based on its metadata.
+    
+    Args:
+        keywords: String containing keywords/index terms for the paper
+        title: The paper's title
+        abstract: The paper's abstract
+        reference_counts: Dictionary containing categories mapped to the # of references of those categories in the paper
+        api_key: OpenAI API key
+        
+    Returns:
+        Dictionary containing main and secondary topic classification, as well as reasonings for the decisions
+    """
+    if api_key is not None:
+        os.environ["OPENAI_API_KEY"] = api_key
+    
+    messages = topic_messages(keywords, title, abstract, reference_counts)
 
     # Retry up to twice in case of error in structured response.
     for i in range(3):
         try:
-            response1 = completion(model="gpt-4o-mini", messages=messages, response_format=topics_structure)
+            response1, _, _ = cascade_completion(
+                CLASSIFIER_LLM, "classify_topic", reported_confidence,
+                lambda r: json.loads(response_content(r)).get('main_topic') not in TOPICS,
+                {"response_format": topics_confidence_structure},
+                retries=1 if i else 0, messages=messages, response_format=topics_structure)
             topics_dict = json.loads(response1['choices'][0]['message']['content'])
         except json.decoder.JSONDecodeError:
             continue
         else:
             break    
+    topics_dict.pop('confidence', None)
 
     # Default case for incorrect LLM output
     if topics_dict['main_topic'] not in TOPICS:
@@ -199,28 +256,20 @@ def classify_paper_topic(
         # No subcategories for paper's classified as Other or empty secondary categories
         if topics_dict[topic] != '' and topics_dict[topic] != 'Other':
 
-            # Load subcategory dictionary from file
-            with open(os.path.join(os.path.dirname(__file__), "subcategories.yaml")) as yamlfile:
-                all_subcategories = yaml.safe_load(yamlfile)
+            all_subcategories = load_subcategories()
 
             new_messages = messages.copy()
             new_messages.append(response1['choices'][0]['message'])
-            new_messages.append({
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"Here is a list of sub-categories for {topics_dict[topic]} papers: {all_subcategories.get(topics_dict[topic], []) + ["Other"]}. Pick the sub-category from this list that this paper fits into."
-                }
-            ],
-            })
-
-            class sub_topic_structure(BaseModel):
-                sub_category: str
+            new_messages.append(subtopic_message(topics_dict[topic], all_subcategories))
 
+            offered = all_subcategories.get(topics_dict[topic], []) + ["Other"]
             for i in range(3):
                 try:
-                    response2 = completion(model="gpt-4o-mini", messages=new_messages, response_format=sub_topic_structure)
+                    response2, _, _ = cascade_completion(
+                        CLASSIFIER_LLM, "classify_subtopic", reported_confidence,
+                        lambda r: json.loads(response_content(r)).get('sub_category') not in offered,
+                        {"response_format": sub_topic_confidence_structure},
+                        retries=1 if i else 0, messages=new_messages, response_format=sub_topic_structure)
                     response2_dict = json.loads(response2['choices'][0]['message']['content'])
                 except json.decoder.JSONDecodeError:
                     continue
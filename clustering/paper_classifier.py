@@ -1,13 +1,79 @@
 import yaml
 import os
 import argparse
+import sys
+import json
 
 from collections import defaultdict
-from typing import Optional
-from llm_topic_classifier import classify_paper_topic, count_ref_topics
+from typing import Dict, List, Optional, Tuple
+if __name__ == "__main__" and "--plan" in sys.argv:
+    # litellm downloads its cost map on import unless this is set, and --plan makes no network calls
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+from citation_graph import DEFAULT_THRESHOLD, load_seed_records, print_report, resolve_topics
+from llm_topic_classifier import (TOPICS, classify_paper_topic, count_ref_topics, load_subcategories, sub_topic_structure,
+                                  subtopic_message, topic_messages, topics_structure)
+from common.cascade import CASCADE
+from common.dedup import deduplicate
+from common.journal import paper_key
+from common.llm_config import CLASSIFIER_LLM, add_llm_arguments
+from common.metrics import METRICS
+from common.planner import History, Plan, add_plan_arguments
+from common.profiling import PROFILER, add_profile_arguments
+from common.sharding import select_shard, shard_of, shard_path
+from common.tokens import count_message_tokens, count_schema_tokens
+from common.yaml_stream import iter_papers
+
+# Sub-topic requests per topic request (main topic plus secondary topics), until metrics history has both stages
+DEFAULT_SUBTOPIC_RATE = 1.5
+
+
+def classify_paper(paper: Dict, api_key: Optional[str] = None) -> Dict:
+    """
+    Classify one paper into topics.
+
+    Args:
+        paper: Paper record with title, abstract, keywords and references
+        api_key: OpenAI API key
+
+    Returns:
+        Cluster record of the paper: its topics, id and title
+    """
+    with METRICS.timer("ref_topics"), PROFILER.span("regex_classification"):
+        reference_counts = count_ref_topics(paper.get('references', []))
+
+    topics = classify_paper_topic(paper.get('keywords', ""), paper.get('title', ""), paper.get('abstract', ""),
+                                  reference_counts, api_key)
+
+    classified_paper = {}
+    classified_paper['topics'] = topics
+    classified_paper['id'] = paper.get('id', "")
+    classified_paper['title'] = paper.get('title', "")
+    return classified_paper
+
+
+def paper_clusters(classified_paper: Dict) -> List[Tuple[str, str]]:
+    """
+    (topic, sub-topic) clusters a classified paper belongs to: its main topic and, if any, its secondary topic.
+    """
+    topics = classified_paper['topics']
+    clusters = [(topics['main_topic'], topics['main_topic_sub'])]
+    if topics['secondary_topic']:
+        clusters.append((topics['secondary_topic'], topics['secondary_topic_sub']))
+    return clusters
+
+
+def write_cluster(output_folder: str, topic: str, sub_topic: str, papers: List[Dict], file_name: str = "papers.yaml"):
+    output_path = os.path.join(output_folder, topic + "/" + sub_topic)
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, file_name), "w", encoding="utf-8") as f, PROFILER.span("yaml_dump"):
+        yaml.safe_dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
 
 
-def classify_papers(input_file: str, output_folder:str, api_key: Optional[str] = None):
+def classify_papers(input_file: str, output_folder:str, api_key: Optional[str] = None, metrics_dir: Optional[str] = None,
+                    shard_index: Optional[int] = None, shard_count: Optional[int] = None, model: Optional[str] = None,
+                    api_base: Optional[str] = None, llm_retries: Optional[int] = None, dedup: bool = False,
+                    cascade_model: Optional[str] = None, cascade_threshold: Optional[float] = None,
+                    citation_seeds: Optional[List[str]] = None, propagation_threshold: float = DEFAULT_THRESHOLD):
     """
     Classify papers and seperate them into clusters.
     
@@ -15,53 +81,140 @@ def classify_papers(input_file: str, output_folder:str, api_key: Optional[str] =
         input_file: Yaml file containing papers to classify
         output_folder: Folder to output clusters to
         api_key: OpenAI API key
+        metrics_dir: Folder for JSONL and Prometheus metrics files
+        shard_index: Index of the shard of papers to classify, written to papers.shard-I-of-N.yaml files
+        shard_count: Total number of shards
+        model: litellm model name, overrides $CSRA_CLASSIFIER_MODEL
+        api_base: OpenAI-compatible API base URL, overrides $CSRA_API_BASE
+        llm_retries: litellm retries on rate limits and server errors
+        dedup: Collapse near-duplicate papers before classifying; duplicates are kept as aliases
+        cascade_model: Cheaper model asked first, escalating to model below cascade_threshold self-reported confidence
+        cascade_threshold: Confidence below which the cascade escalates, overrides $CSRA_CLASSIFIER_CASCADE_THRESHOLD
+        citation_seeds: Cluster folders of earlier runs; papers whose citations to them decide a topic skip the LLM
+        propagation_threshold: Share of the propagated topic weight needed to label a paper from its citations
 
     """
         
+    METRICS.configure(metrics_dir, shard_path("paper_classifier", shard_index, shard_count))
+    CLASSIFIER_LLM.configure(model, api_base, llm_retries, cascade_model, cascade_threshold)
+    print(f"Model: {CLASSIFIER_LLM.describe()}")
     base_output_folder = output_folder
 
     os.makedirs(base_output_folder, exist_ok=True)
 
 
-    with open(input_file, encoding="utf-8") as yamlfile:
+    with open(input_file, encoding="utf-8") as yamlfile, PROFILER.span("yaml_load"):
         yaml_content = yaml.safe_load(yamlfile)
 
     output_dict = defaultdict(lambda: defaultdict(list))
 
     # Perform classification
-    for paper in yaml_content['papers']:
-        id = paper.get('id', "")
-        keywords = paper.get('keywords', "")
-        abstract = paper.get('abstract', "")
-        title = paper.get('title', "")
-        references = paper.get('references', [])
-        reference_counts = count_ref_topics(references)
-
-        topics = classify_paper_topic(keywords, title, abstract, reference_counts, api_key)
-
-        classified_paper = {}
-        classified_paper['topics'] = topics
-        classified_paper['id'] = id
-        classified_paper['title'] = title
-
-        output_dict[topics['main_topic']][topics['main_topic_sub']].append(classified_paper)
-
-        if topics['secondary_topic']:
-            output_dict[topics['secondary_topic']][topics['secondary_topic_sub']].append(classified_paper)
+    if dedup:
+        yaml_content['papers'], _ = deduplicate(yaml_content['papers'])
+
+    # Propagation needs the whole citation graph, so it runs before sharding and every shard sees the same result
+    resolved = {}
+    if citation_seeds:
+        resolved, report = resolve_topics(yaml_content['papers'], load_seed_records(citation_seeds), propagation_threshold)
+        print_report(report)
+        with open(os.path.join(base_output_folder, shard_path("citation_graph.json", shard_index, shard_count)), "w",
+                  encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for paper in select_shard(yaml_content['papers'], shard_index, shard_count):
+        classified_paper = resolved.get(paper_key(paper))
+        if classified_paper is not None:
+            METRICS.inc("llm_calls_avoided_total", stage="citation_graph")
+        else:
+            classified_paper = classify_paper(paper, api_key)
+        for topic, sub_topic in paper_clusters(classified_paper):
+            output_dict[topic][sub_topic].append(classified_paper)
 
     # Seperate papers into folders
     for topic in output_dict.keys():
         for sub_topic in output_dict[topic].keys():
-            output_path = os.path.join(base_output_folder, topic + "/" + sub_topic)
-        os.makedirs(output_path, exist_ok=True)
-        with open(os.path.join(output_path, "papers.yaml"), "w", encoding="utf-8") as f:
-            yaml.safe_dump({"papers": output_dict[topic][sub_topic]}, f, allow_unicode=True, sort_keys=False)
+            write_cluster(base_output_folder, topic, sub_topic, output_dict[topic][sub_topic],
+                          shard_path("papers.yaml", shard_index, shard_count))
+
+    CASCADE.report()
+    METRICS.finish()
+
+def plan_classification(input_file: str, metrics_dir: Optional[str] = None, shard_index: Optional[int] = None,
+                        shard_count: Optional[int] = None, model: Optional[str] = None, dedup: bool = False,
+                        cascade_model: Optional[str] = None, cascade_threshold: Optional[float] = None,
+                        concurrency: int = 1, requests_per_minute: Optional[float] = None,
+                        tokens_per_minute: Optional[float] = None, citation_seeds: Optional[List[str]] = None,
+                        propagation_threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """
+    Dry run of classify_papers(): stream the input, build each paper's topic request (with its
+    count_ref_topics output), count tokens locally and print projected calls, tokens, cost and wall clock.
+
+    Sub-topic requests resend the topic request with its answer and the chosen topic's sub-category list,
+    which is only known after the call, so they are counted with the mean list size and the historical
+    answer length and sub-topic rate (metrics in metrics_dir). Nothing is sent to the LLM.
+    """
+    CLASSIFIER_LLM.configure(model, None, None, cascade_model, cascade_threshold)
+    print(f"Model: {CLASSIFIER_LLM.describe()}")
+    history = History(metrics_dir)
+    model = CLASSIFIER_LLM.model
+    subtopic_rate = history.ratio("classify_subtopic", "classify_topic", DEFAULT_SUBTOPIC_RATE)
+    subcategories = load_subcategories()
+    topics = [t for t in TOPICS if t != "Other"]
+    subtopic_tokens = (sum(count_message_tokens([subtopic_message(t, subcategories)], model) for t in topics) / len(topics)
+                       + count_schema_tokens(sub_topic_structure, model) + history.completion_tokens("classify_topic"))
+    schema_tokens = count_schema_tokens(topics_structure, model)
+
+    papers = deduplicate(list(iter_papers(input_file)))[0] if dedup else iter_papers(input_file)
+    resolved = {}
+    if citation_seeds:
+        papers = list(papers)
+        resolved, report = resolve_topics(papers, load_seed_records(citation_seeds), propagation_threshold)
+        print_report(report)
+    plan = Plan(history)
+    for paper in papers:
+        if shard_count and shard_of(paper_key(paper), shard_count) != shard_index:
+            continue
+        plan.papers += 1
+        if paper_key(paper) in resolved:
+            plan.skip("resolved from citations")
+            continue
+        reference_counts = count_ref_topics(paper.get('references', []))
+        messages = topic_messages(paper.get('keywords', ""), paper.get('title', ""), paper.get('abstract', ""),
+                                  reference_counts)
+        prompt_tokens = count_message_tokens(messages, model) + schema_tokens
+        plan.add(CLASSIFIER_LLM, "classify_topic", prompt_tokens)
+        plan.add(CLASSIFIER_LLM, "classify_subtopic", prompt_tokens + subtopic_tokens, subtopic_rate)
+
+    print(f"Sub-topic requests per paper {subtopic_rate:.2f}" + (" (default)" if not history.requests("classify_topic") else ""))
+    return plan.report(concurrency, requests_per_minute, tokens_per_minute)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Filter papers by qualification status.")
     parser.add_argument("-f", "--file", required=True, help="Path to input yaml containing papers")
     parser.add_argument("-o", "--output", required=True, help="Path to output folder")
     parser.add_argument("-a", "--key", help="OpenAI API key")
+    parser.add_argument("--metrics-dir", help="Folder for JSONL and Prometheus metrics (default: $CSRA_METRICS_DIR)")
+    parser.add_argument("--shard-index", type=int, help="Index of the shard of papers to classify on this node (0-based)")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards; merge outputs with common/merge_shards.py")
+    parser.add_argument("--dedup", action="store_true", help="Collapse near-duplicate papers (common/dedup.py) before classifying")
+    parser.add_argument("--citation-seeds", action="append",
+                        help="Classified cluster folder to propagate topics from over citations; repeatable")
+    parser.add_argument("--propagation-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Top topic share needed to label a paper from its citations (default: {DEFAULT_THRESHOLD})")
+    add_llm_arguments(parser, CLASSIFIER_LLM)
+    add_plan_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-
-    classify_papers(args.file, args.output, args.key)
\ No newline at end of file
+    if args.plan:
+        plan_classification(args.file, args.metrics_dir, args.shard_index, args.shard_count, args.model, args.dedup,
+                            args.cascade_model, args.cascade_threshold, args.plan_concurrency, args.plan_rpm,
+                            args.plan_tpm, args.citation_seeds, args.propagation_threshold)
+        sys.exit(0)
+    PROFILER.configure(args.profile, "paper_classifier", args.profile_dir)
+
+    try:
+        classify_papers(args.file, args.output, args.key, args.metrics_dir, args.shard_index, args.shard_count,
+                        args.model, args.api_base, args.llm_retries, args.dedup, args.cascade_model,
+                        args.cascade_threshold, args.citation_seeds, args.propagation_threshold)
+    finally:
+        PROFILER.finish()
\ No newline at end of file
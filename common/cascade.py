@@ -0,0 +1,179 @@
+import json
+import math
+import threading
+import time
+
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+import litellm
+
+from common.llm_config import LLMConfig
+from common.metrics import METRICS
+from common.profiling import PROFILER
+
+
+def _field(value, key):
+    if value is None:
+        return None
+    return value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+
+
+def response_content(response) -> str:
+    return response["choices"][0]["message"]["content"] or ""
+
+
+def verdict_confidence(response) -> Optional[float]:
+    """
+    Probability of the first word of the answer, e.g. the "Qualified"/"Dis" token of a filter verdict,
+    from the response logprobs. None when the provider returned no logprobs.
+    """
+    logprobs = _field(_field(response["choices"][0], "logprobs"), "content")
+    for token in logprobs or []:
+        text = _field(token, "token") or ""
+        if any(c.isalpha() for c in text):
+            return math.exp(_field(token, "logprob"))
+    return None
+
+
+def reported_confidence(response) -> Optional[float]:
+    """
+    The "confidence" field of a structured answer, clamped to [0, 1]. None when it is missing or malformed.
+    """
+    try:
+        value = float(json.loads(response_content(response)).get("confidence"))
+    except (TypeError, ValueError, AttributeError, json.JSONDecodeError):
+        return None
+    return min(1.0, max(0.0, value))
+
+
+class CascadeStats:
+    """
+    Per-stage calls, latency and cost of each cascade tier, and why requests were escalated.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiers = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "cost_usd": 0.0})
+        self.escalations = defaultdict(int)
+        self.requests = defaultdict(int)
+
+    def record_call(self, stage: str, tier: str, model: str, response, elapsed: float):
+        try:
+            cost = litellm.completion_cost(completion_response=response)
+        except Exception:
+            cost = 0.0
+        with self._lock:
+            row = self.tiers[(stage, tier, model)]
+            row["calls"] += 1
+            row["seconds"] += elapsed
+            row["cost_usd"] += cost or 0.0
+
+    def record_request(self, stage: str, reason: Optional[str]):
+        with self._lock:
+            self.requests[stage] += 1
+            if reason:
+                self.escalations[(stage, reason)] += 1
+        if reason:
+            METRICS.inc("escalations_total", stage=stage, reason=reason)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            stages = {}
+            for stage, requests in self.requests.items():
+                escalated = sum(n for (s, _), n in self.escalations.items() if s == stage)
+                stages[stage] = {
+                    "requests": requests,
+                    "escalation_rate": round(escalated / requests, 3) if requests else 0.0,
+                    "escalations": {reason: n for (s, reason), n in self.escalations.items() if s == stage},
+                    "tiers": {
+                        tier: {"model": model, "calls": row["calls"],
+                               "mean_s": round(row["seconds"] / row["calls"], 3) if row["calls"] else 0.0,
+                               "cost_usd": round(row["cost_usd"], 6)}
+                        for (s, tier, model), row in sorted(self.tiers.items()) if s == stage
+                    },
+                }
+            return stages
+
+    def report(self) -> Dict:
+        summary = self.summary()
+        if summary:
+            print("\n🪜 Model cascade")
+        for stage, stats in sorted(summary.items()):
+            reasons = ", ".join(f"{reason} {n}" for reason, n in sorted(stats["escalations"].items())) or "none"
+            print(f"   {stage}: {stats['requests']} requests, {stats['escalation_rate']:.1%} escalated ({reasons})")
+            for tier, row in stats["tiers"].items():
+                print(f"      {tier:<6} {row['model']:<24} {row['calls']:>6} calls  {row['mean_s']:>7.3f}s mean  "
+                      f"${row['cost_usd']:.4f}")
+        return summary
+
+
+CASCADE = CascadeStats()
+
+
+def _total_tokens(response) -> int:
+    tokens = _field(_field(response, "usage"), "total_tokens")
+    return tokens if isinstance(tokens, int) else 0
+
+
+def cascade_completion(config: LLMConfig, stage: str, confidence: Callable[[object], Optional[float]],
+                       disagrees: Optional[Callable[[object], bool]] = None, cheap_kwargs: Optional[Dict] = None,
+                       retries: int = 0, **request) -> Tuple[object, float, int]:
+    """
+    One litellm completion through the stage's model cascade.
+
+    Without a cascade model this is a plain call to config.model. Otherwise the cheap model answers first
+    (with cheap_kwargs added or replacing request arguments, e.g. logprobs or a response format with a
+    confidence field), and the request
+    is repeated on config.model when confidence(response) is missing or below config.cascade_threshold,
+    or when disagrees(response) says the answer contradicts an earlier one. A cheap call that raises (rate
+    limits, server errors, a provider rejecting logprobs) escalates too, so the cascade is never less
+    reliable than config.model alone.
+
+    Returns:
+        (response that was used, total seconds and total tokens spent on the calls)
+    """
+    if not config.cascade_model:
+        start = time.time()
+        with PROFILER.span("llm_call"):
+            response = litellm.completion(**request, **config.completion_kwargs())
+        elapsed = time.time() - start
+        METRICS.record_llm_call(stage, config.model, response, elapsed, retries=retries)
+        return response, elapsed, _total_tokens(response)
+
+    start = time.time()
+    try:
+        with PROFILER.span("llm_call"):
+            response = litellm.completion(**{**request, **(cheap_kwargs or {})},
+                                          **config.completion_kwargs(config.cascade_model))
+    except Exception as e:
+        print(f"[!] {stage}: {config.cascade_model} failed ({type(e).__name__}), escalating to {config.model}")
+        response = None
+    cheap_elapsed = time.time() - start
+    cheap_tokens = _total_tokens(response) if response is not None else 0
+    if response is not None:
+        METRICS.record_llm_call(stage, config.cascade_model, response, cheap_elapsed, retries=retries)
+        CASCADE.record_call(stage, "cheap", config.cascade_model, response, cheap_elapsed)
+
+    score = confidence(response) if response is not None else None
+    if response is None:
+        reason = "cheap_error"
+    elif score is None:
+        reason = "no_confidence"
+    elif score < config.cascade_threshold:
+        reason = "low_confidence"
+    elif disagrees and disagrees(response):
+        reason = "disagreement"
+    else:
+        reason = None
+    CASCADE.record_request(stage, reason)
+    if not reason:
+        return response, cheap_elapsed, cheap_tokens
+
+    start = time.time()
+    with PROFILER.span("llm_call"):
+        response = litellm.completion(**request, **config.completion_kwargs())
+    elapsed = time.time() - start
+    METRICS.record_llm_call(stage, config.model, response, elapsed)
+    CASCADE.record_call(stage, "strong", config.model, response, elapsed)
+    return response, cheap_elapsed + elapsed, cheap_tokens + _total_tokens(response)
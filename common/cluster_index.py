@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import yaml
+
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.journal import paper_key
+from common.sharding import SHARD_FILE_RE
+
+INDEX_VERSION = 1
+INDEX_FILE = "cluster_index.json"
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def cluster_files(cluster_dir: str) -> Dict[str, os.stat_result]:
+    """
+    papers.yaml files under cluster_dir by relative path, with their stat. Shard outputs are skipped; merge
+    them with merge_shards.py first.
+    """
+    files = {}
+    for root, _, names in os.walk(cluster_dir):
+        for name in names:
+            if name.endswith((".yaml", ".yml")) and name.startswith("papers") and not SHARD_FILE_RE.search(name):
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, cluster_dir).replace(os.sep, "/")] = os.stat(path)
+    return files
+
+
+def cluster_of(relative_path: str) -> Tuple[str, str]:
+    """
+    (topic, sub-topic) of a cluster file; papers classified as "Other" sit directly in the topic folder.
+    """
+    parts = relative_path.split("/")[:-1]
+    return (parts[0] if parts else "", "/".join(parts[1:]))
+
+
+def build_index(cluster_dir: str, previous: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+    """
+    Compile the cluster tree written by paper_classifier.py into an index dict.
+
+    Files whose mtime and size match the previous index are reused without parsing them again.
+
+    Returns:
+        (index, {"parsed": n, "reused": n, "removed": n})
+    """
+    previous_files = (previous or {}).get("files", {})
+    previous_papers = (previous or {}).get("papers", [])
+    stats = {"parsed": 0, "reused": 0, "removed": 0}
+
+    papers: List[List[str]] = []
+    paper_ids: Dict[str, int] = {}
+
+    def paper_index(key: str, title: str) -> int:
+        i = paper_ids.get(key)
+        if i is None:
+            i = paper_ids[key] = len(papers)
+            papers.append([key, title])
+        elif title and not papers[i][1]:
+            papers[i][1] = title
+        return i
+
+    files = {}
+    for path, stat in sorted(cluster_files(cluster_dir).items()):
+        old = previous_files.get(path)
+        if old and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+            entries = [previous_papers[i] for i in old["papers"]]
+            stats["reused"] += 1
+        else:
+            with open(os.path.join(cluster_dir, path), "r", encoding="utf-8") as f:
+                records = (yaml.load(f, Loader=_LOADER) or {}).get("papers") or []
+            entries = [[paper_key(p), p.get("title", "")] for p in records]
+            stats["parsed"] += 1
+        topic, sub_topic = cluster_of(path)
+        files[path] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "topic": topic,
+            "sub_topic": sub_topic,
+            "papers": [paper_index(key, title) for key, title in entries],
+        }
+    stats["removed"] = len(set(previous_files) - set(files))
+
+    index = {"version": INDEX_VERSION, "built": round(time.time(), 3), "papers": papers, "files": files}
+    return index, stats
+
+
+def write_index(index: Dict, path: str):
+    # Written next to the target and renamed, so a reader never sees a half-written index
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def read_index(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class ClusterIndex:
+    """
+    Topic → sub-topic → papers, paper → clusters and title search over a compiled cluster index.
+
+    refresh() restats the cluster files and rebuilds incrementally when any of them changed, rewriting the
+    index file, so a long-running server keeps up with new classifier runs.
+    """
+
+    def __init__(self, cluster_dir: str, index_path: Optional[str] = None):
+        self.cluster_dir = cluster_dir
+        self.index_path = index_path or os.path.join(cluster_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self.last_build = {"parsed": 0, "reused": 0, "removed": 0}
+        self.index = read_index(self.index_path)
+        if self.index is None:
+            self.rebuild()
+        else:
+            self._derive()
+
+    def rebuild(self) -> Dict:
+        index, stats = build_index(self.cluster_dir, self.index)
+        write_index(index, self.index_path)
+        with self._lock:
+            self.index = index
+            self._derive()
+        self.last_build = stats
+        return stats
+
+    def refresh(self) -> Optional[Dict]:
+        """
+        Rebuild if any cluster file was added, removed or changed since the index was built.
+        """
+        current = cluster_files(self.cluster_dir)
+        known = self.index["files"]
+        if current.keys() == known.keys() and all(
+                known[p]["mtime_ns"] == s.st_mtime_ns and known[p]["size"] == s.st_size for p, s in current.items()):
+            return None
+        return self.rebuild()
+
+    def _derive(self):
+        self.tree = defaultdict(dict)
+        self.memberships = defaultdict(list)
+        for entry in self.index["files"].values():
+            cluster = (entry["topic"], entry["sub_topic"])
+            self.tree[entry["topic"]][entry["sub_topic"]] = entry["papers"]
+            for i in entry["papers"]:
+                self.memberships[i].append(cluster)
+        self.ids = {key: i for i, (key, _) in enumerate(self.index["papers"])}
+        self._tokens = None
+
+    def _token_index(self) -> Dict[str, set]:
+        # Built on the first search only, most callers never search
+        if self._tokens is None:
+            tokens = defaultdict(set)
+            for i, (_, title) in enumerate(self.index["papers"]):
+                for token in tokenize(title):
+                    tokens[token].add(i)
+            self._tokens = tokens
+        return self._tokens
+
+    def _paper(self, i: int) -> Dict:
+        key, title = self.index["papers"][i]
+        return {"id": key, "title": title}
+
+    def topics(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {topic: {sub: len(ids) for sub, ids in sorted(subs.items())} for topic, subs in sorted(self.tree.items())}
+
+    def cluster(self, topic: str, sub_topic: str = "") -> Optional[List[Dict]]:
+        with self._lock:
+            ids = self.tree.get(topic, {}).get(sub_topic)
+            return None if ids is None else [self._paper(i) for i in ids]
+
+    def clusters_of(self, paper_id: str) -> Optional[List[Dict]]:
+        with self._lock:
+            i = self.ids.get(paper_id)
+            if i is None:
+                return None
+            return [{"topic": topic, "sub_topic": sub} for topic, sub in self.memberships[i]]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Papers whose title contains every query word, the last one as a prefix (search as you type).
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            tokens = self._token_index()
+            *whole, last = words
+            matches = set.union(*(tokens[t] for t in tokens if t.startswith(last))) if any(
+                t.startswith(last) for t in tokens) else set()
+            for word in whole:
+                matches &= tokens.get(word, set())
+            ranked = sorted(matches, key=lambda i: (len(self.index["papers"][i][1]), i))[:limit]
+            return [{**self._paper(i), "clusters": [{"topic": t, "sub_topic": s} for t, s in self.memberships[i]]}
+                    for i in ranked]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"papers": len(self.index["papers"]), "clusters": len(self.index["files"]),
+                    "topics": len(self.tree), "built": self.index["built"], "index_path": self.index_path}
+
+
+class ClusterIndexHandler(BaseHTTPRequestHandler):
+    index: ClusterIndex = None
+    refresh_interval = 5.0
+    last_refresh = 0.0
+    refresh_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _maybe_refresh(self):
+        cls = type(self)
+        if time.time() - cls.last_refresh < cls.refresh_interval or not cls.refresh_lock.acquire(blocking=False):
+            return
+        try:
+            cls.last_refresh = time.time()
+            stats = self.index.refresh()
+            if stats:
+                print(f"[↻] Index rebuilt: {stats}")
+        finally:
+            cls.refresh_lock.release()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        path = url.path.rstrip("/")
+        self._maybe_refresh()
+
+        if path == "/topics":
+            self._send(200, self.index.topics())
+        elif path == "/cluster" and "topic" in query:
+            papers = self.index.cluster(query["topic"], query.get("sub_topic", ""))
+            if papers is None:
+                self._send(404, {"error": f"No cluster {query['topic']} / {query.get('sub_topic', '')}"})
+            else:
+                self._send(200, {"topic": query["topic"], "sub_topic": query.get("sub_topic", ""), "papers": papers})
+        elif path == "/paper" and "id" in query:
+            clusters = self.index.clusters_of(query["id"])
+            if clusters is None:
+                self._send(404, {"error": f"Unknown paper {query['id']}"})
+            else:
+                self._send(200, {"id": query["id"], "clusters": clusters})
+        elif path == "/search" and "q" in query:
+            try:
+                limit = int(query.get("limit", 20))
+            except ValueError:
+                self._send(400, {"error": "limit must be an integer"})
+                return
+            self._send(200, {"query": query["q"], "papers": self.index.search(query["q"], limit)})
+        elif path in ("/stats", "/health"):
+            self._send(200, self.index.stats())
+        else:
+            self._send(404, {"error": f"Unknown path {url.path}; use /topics, /cluster?topic=&sub_topic=, "
+                                      "/paper?id=, /search?q=&limit= or /stats"})
+
+
+def serve(index: ClusterIndex, host: str = "127.0.0.1", port: int = 8766, refresh_interval: float = 5.0):
+    """
+    Serve the index as JSON in a background thread and return the server; stop it with server.shutdown().
+    """
+    handler = type("Handler", (ClusterIndexHandler,), {"index": index, "refresh_interval": refresh_interval,
+                                                       "refresh_lock": threading.Lock()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile and query an index of paper_classifier.py cluster folders.")
+    parser.add_argument("-d", "--cluster-dir", required=True, help="Output folder of paper_classifier.py")
+    parser.add_argument("--index", help=f"Index file (default: <cluster-dir>/{INDEX_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Build or incrementally update the index")
+    commands.add_parser("topics", help="Print topics and sub-topics with paper counts")
+    cluster_parser = commands.add_parser("cluster", help="Print the papers of one cluster")
+    cluster_parser.add_argument("topic")
+    cluster_parser.add_argument("sub_topic", nargs="?", default="")
+    paper_parser = commands.add_parser("paper", help="Print the clusters containing a paper id")
+    paper_parser.add_argument("id")
+    search_parser = commands.add_parser("search", help="Search paper titles")
+    search_parser.add_argument("query")
+    search_parser.add_argument("-n", "--limit", type=int, default=20)
+    serve_parser = commands.add_parser("serve", help="Serve the index as a JSON HTTP API")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8766, help="Port (default: 8766)")
+    serve_parser.add_argument("--refresh-interval", type=float, default=5.0,
+                              help="Seconds between checks of the cluster files for changes (default: 5)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = ClusterIndex(args.cluster_dir, args.index)
+    loaded = time.perf_counter() - start
+
+    if args.command == "build":
+        stats = index.refresh() or index.last_build
+        print(f"[✓] {index.index_path}: {index.stats()['papers']} papers in {index.stats()['clusters']} clusters "
+              f"({stats['parsed']} files parsed, {stats['reused']} reused, {stats['removed']} removed) "
+              f"in {time.perf_counter() - start:.3f}s")
+    elif args.command == "serve":
+        server = serve(index, args.host, args.port, args.refresh_interval)
+        print(f"Cluster index on http://{args.host}:{args.port} ({index.stats()['papers']} papers, loaded in "
+              f"{1000 * loaded:.1f}ms); endpoints /topics, /cluster, /paper, /search, /stats")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        result = {
+            "topics": lambda: index.topics(),
+            "cluster": lambda: index.cluster(args.topic, args.sub_topic),
+            "paper": lambda: index.clusters_of(args.id),
+            "search": lambda: index.search(args.query, args.limit),
+        }[args.command]()
+        print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,281 @@
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.cluster_index import ClusterIndex
+from common.journal import paper_key
+from common.yaml_stream import iter_papers
+
+DEFAULT_BATCH_SIZE = 2000
+UNCLASSIFIED = "Unclassified"
+
+# Columns of the website-v2 papers table (migrations/20240514000000_create_papers_table.js) the loader writes
+COLUMNS = ("source_key", "title", "abstract", "arxiv_id", "authors", "venue", "year", "category", "subcategory",
+           "is_demo", "metadata", "updated_at")
+# knex table.string() is varchar(255) on Postgres
+STRING_LIMIT = 255
+_ARXIV_ID_RE = re.compile(r"arxiv\.org/(?:abs|pdf)/(\d{4})\.(\d{4,5})")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    abstract TEXT NOT NULL,
+    arxiv_id VARCHAR(255),
+    authors VARCHAR(255) NOT NULL,
+    venue VARCHAR(255),
+    year INTEGER,
+    category VARCHAR(255) NOT NULL,
+    subcategory VARCHAR(255) NOT NULL,
+    is_demo BOOLEAN NOT NULL DEFAULT 0,
+    metadata JSON DEFAULT '{}',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME,
+    source_key VARCHAR(255)
+);
+CREATE INDEX IF NOT EXISTS papers_category_subcategory_index ON papers (category, subcategory);
+CREATE INDEX IF NOT EXISTS papers_arxiv_id_index ON papers (arxiv_id);
+CREATE INDEX IF NOT EXISTS papers_is_demo_index ON papers (is_demo);
+"""
+
+
+def _clip(value: Optional[str]) -> Optional[str]:
+    return value[:STRING_LIMIT] if isinstance(value, str) else value
+
+
+def paper_row(paper: Dict, clusters: List[Tuple[str, str]], loaded_at: str) -> Tuple:
+    """
+    papers table row of a pipeline paper. The first cluster becomes category/subcategory and every cluster
+    is kept in metadata, since the table has one category per paper.
+    """
+    url = paper.get("url", "")
+    match = _ARXIV_ID_RE.search(url) or _ARXIV_ID_RE.search(str(paper.get("id", "")))
+    arxiv_id = f"{match.group(1)}.{match.group(2)}" if match else None
+    year = paper.get("year") or (2000 + int(match.group(1)[:2]) if match else None)
+    authors = paper.get("authors") or ""
+    if isinstance(authors, list):
+        authors = ", ".join(authors)
+    category, subcategory = clusters[0] if clusters else (UNCLASSIFIED, "")
+    metadata = {
+        "url": url,
+        "keywords": paper.get("keywords", ""),
+        "clusters": [{"topic": t, "sub_topic": s} for t, s in clusters],
+        **({"aliases": paper["aliases"]} if paper.get("aliases") else {}),
+    }
+    return (_clip(paper_key(paper)), _clip(paper.get("title", "")), paper.get("abstract") or "", arxiv_id,
+            _clip(authors), _clip(paper.get("venue") or ("arXiv" if arxiv_id else None)), year, _clip(category),
+            _clip(subcategory), False, json.dumps(metadata, ensure_ascii=False), loaded_at)
+
+
+def pipeline_rows(papers_yaml: Optional[str] = None, qualified_yaml: Optional[str] = None,
+                  cluster_dir: Optional[str] = None) -> Iterator[Tuple]:
+    """
+    Rows for every qualified paper.
+
+    Args:
+        papers_yaml: Full paper records (pipeline papers.yaml or a marker_runner.py/ACM yaml), streamed for
+                     abstracts and urls
+        qualified_yaml: qualified_papers.yaml of merge_filter.py; without it every paper is loaded
+        cluster_dir: Output folder of paper_classifier.py, read through its cluster index
+    """
+    if not papers_yaml and not qualified_yaml:
+        raise ValueError("Need papers_yaml, qualified_yaml or both")
+    memberships = {}
+    if cluster_dir:
+        index = ClusterIndex(cluster_dir)
+        index.refresh()
+        memberships = {key: [tuple(c) for c in index.memberships[i]] for key, i in index.ids.items()}
+    loaded_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+    qualified = None
+    if qualified_yaml:
+        # Only the qualified records are held in memory; they carry no documents
+        qualified = {paper_key(p): p for p in iter_papers(qualified_yaml)}
+    if not papers_yaml:
+        # The filter's records have titles but no abstracts
+        for key, paper in qualified.items():
+            yield paper_row(paper, memberships.get(key, []), loaded_at)
+        return
+    for paper in iter_papers(papers_yaml):
+        key = paper_key(paper)
+        if qualified is None or key in qualified:
+            if qualified and qualified[key].get("aliases"):
+                paper = {**paper, "aliases": qualified[key]["aliases"]}
+            yield paper_row(paper, memberships.get(key, []), loaded_at)
+
+
+def batches(rows: Iterable[Tuple], batch_size: int) -> Iterator[List[Tuple]]:
+    # Keyed by source_key so a batch never upserts the same paper twice (Postgres rejects that)
+    batch = {}
+    for row in rows:
+        batch[row[0]] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _changed_sql(dialect: str, column: str) -> str:
+    if dialect != "postgres":
+        return f"papers.{column} IS NOT excluded.{column}"
+    if column == "metadata":
+        # The knex migration makes metadata a json column, which has no equality operator
+        return f"papers.{column}::jsonb IS DISTINCT FROM excluded.{column}::jsonb"
+    return f"papers.{column} IS DISTINCT FROM excluded.{column}"
+
+
+def _upsert_sql(dialect: str, values: str) -> str:
+    changed = " OR ".join(_changed_sql(dialect, c) for c in COLUMNS if c not in ("source_key", "updated_at"))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS if c != "source_key")
+    # Unchanged rows are skipped, so a re-run writes nothing and keeps updated_at
+    return (f"INSERT INTO papers ({', '.join(COLUMNS)}) {values} "
+            f"ON CONFLICT (source_key) DO UPDATE SET {updates} WHERE {changed}")
+
+
+class SQLiteLoader:
+    """
+    Upserts rows into a SQLite papers table, one transaction and one multi-row INSERT per batch.
+    """
+
+    dialect = "sqlite"
+    # SQLite allows 32766 bound parameters per statement since 3.32
+    max_rows_per_statement = 32766 // len(COLUMNS)
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+    def ensure_schema(self):
+        self.conn.executescript(SQLITE_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        if "source_key" not in columns:
+            self.conn.execute("ALTER TABLE papers ADD COLUMN source_key VARCHAR(255)")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS papers_source_key_unique ON papers (source_key)")
+
+    def upsert(self, rows: List[Tuple]) -> int:
+        before = self.conn.total_changes
+        placeholders = "(" + ", ".join("?" * len(COLUMNS)) + ")"
+        self.conn.execute("BEGIN")
+        try:
+            for start in range(0, len(rows), self.max_rows_per_statement):
+                chunk = rows[start:start + self.max_rows_per_statement]
+                sql = _upsert_sql(self.dialect, "VALUES " + ", ".join([placeholders] * len(chunk)))
+                self.conn.execute(sql, [value for row in chunk for value in row])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.conn.total_changes - before
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresLoader:
+    """
+    Upserts rows into the website's Postgres papers table: each batch is COPYed into a temporary staging
+    table and merged with one INSERT ... SELECT ... ON CONFLICT in the same transaction.
+
+    The table comes from the knex migrations (including 20240516000000_add_papers_source_key.js); ids of
+    existing papers are kept, so matches and reviews that reference them stay valid.
+    """
+
+    dialect = "postgres"
+
+    def __init__(self, dsn: str):
+        # Imported here so SQLite loads work without a Postgres driver installed
+        import psycopg2
+        self.conn = psycopg2.connect(dsn)
+
+    def ensure_schema(self):
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM information_schema.columns WHERE table_name = 'papers' AND column_name = 'source_key'")
+            if cur.fetchone() is None:
+                # knexfile.js points at src/migrations, the papers table migrations live in migrations/
+                raise RuntimeError("papers.source_key is missing; run `npx knex migrate:latest --migrations-directory "
+                                   "migrations` in website-v2/server")
+
+    def upsert(self, rows: List[Tuple]) -> int:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["\\N" if v is None else v for v in row])
+        buffer.seek(0)
+        select = ", ".join(f"{c}::json" if c == "metadata" else c for c in COLUMNS)
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute(f"CREATE TEMP TABLE papers_staging ON COMMIT DROP AS SELECT {', '.join(COLUMNS)} FROM papers "
+                        "WITH NO DATA")
+            cur.execute("ALTER TABLE papers_staging ALTER COLUMN metadata TYPE text")
+            cur.copy_expert(f"COPY papers_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                            buffer)
+            cur.execute(_upsert_sql(self.dialect, f"SELECT {select} FROM papers_staging"))
+            return cur.rowcount
+
+    def count(self) -> int:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM papers")
+            return cur.fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_loader(database: str):
+    """
+    PostgresLoader for postgres:// URLs, otherwise SQLiteLoader on a database file.
+    """
+    if database.startswith(("postgres://", "postgresql://")):
+        return PostgresLoader(database)
+    return SQLiteLoader(database)
+
+
+def load(rows: Iterable[Tuple], database: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """
+    Upsert rows into the papers table in batches.
+
+    Returns:
+        {"rows": rows read, "written": rows inserted or changed, "seconds": s, "rows_per_s": n, "total": table size}
+    """
+    loader = open_loader(database)
+    try:
+        loader.ensure_schema()
+        start = time.perf_counter()
+        read = written = 0
+        for batch in batches(rows, batch_size):
+            written += loader.upsert(batch)
+            read += len(batch)
+        elapsed = time.perf_counter() - start
+        return {"rows": read, "written": written, "seconds": round(elapsed, 3),
+                "rows_per_s": round(read / elapsed, 1) if elapsed else 0.0, "total": loader.count()}
+    finally:
+        loader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load pipeline outputs into the website-v2 papers table.")
+    parser.add_argument("--papers", help="Full paper records, e.g. the pipeline's papers.yaml")
+    parser.add_argument("--qualified", help="qualified_papers.yaml from merge_filter.py; other papers are skipped")
+    parser.add_argument("--clusters", help="Output folder of paper_classifier.py")
+    parser.add_argument("--database", default="papers.sqlite3",
+                        help="SQLite file or postgresql:// URL (default: papers.sqlite3)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per transaction (default: {DEFAULT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    result = load(pipeline_rows(args.papers, args.qualified, args.clusters), args.database, args.batch_size)
+    print(f"[✓] {result['rows']} papers upserted ({result['written']} inserted or changed) in {result['seconds']}s, "
+          f"{result['rows_per_s']:.0f} rows/s; {result['total']} papers in {args.database}")
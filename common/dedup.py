@@ -0,0 +1,285 @@
+import argparse
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import yaml
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.journal import paper_key
+from common.metrics import METRICS
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_WORDS = 5
+THRESHOLD = 0.8
+
+# Only the head of long documents is shingled; duplicates already agree on their first pages
+MAX_DOCUMENT_CHARS = 20_000
+
+# LLM calls one paper costs downstream: one short prompt per merge_filter criterion, a topic and up to
+# two sub-topic calls in paper_classifier. Full-text fallbacks are extra, so these are lower bounds.
+FILTER_CALLS_PER_PAPER = 4
+CLASSIFIER_CALLS_PER_PAPER = 3
+
+_EMPTY = np.uint64(1 << 32)
+_GRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_ARXIV_RE = re.compile(r"(?<![\d.])(\d{4}\.\d{4,5})(?:v(\d+))?(?![\d.])")
+_DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s?#]+)", re.IGNORECASE)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def arxiv_id(paper: Dict) -> Optional[Tuple[str, int]]:
+    """
+    arXiv base id and version (0 when unversioned) from an arXiv url or a bare arXiv id.
+    """
+    url = str(paper.get("url") or "")
+    match = _ARXIV_RE.search(url) if "arxiv" in url.lower() else None
+    match = match or _ARXIV_RE.fullmatch(str(paper.get("id") or ""))
+    if match:
+        return match.group(1), int(match.group(2) or 0)
+    return None
+
+
+def doi(paper: Dict) -> Optional[str]:
+    match = _DOI_RE.search(str(paper.get("url") or ""))
+    return match.group(1).lower().rstrip("/.") if match else None
+
+
+def shingles(text: str, words: int = SHINGLE_WORDS) -> np.ndarray:
+    """
+    Distinct hashes of the word n-grams of normalized text.
+
+    Each distinct word is hashed once with CRC32 and the n-gram hashes are combined from those with a
+    vectorized polynomial hash, instead of hashing every joined n-gram string.
+    """
+    tokens = _WORD_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    # Papers reuse a small vocabulary, so only distinct words go through CRC32
+    codes = {}
+    positions = np.fromiter((codes.setdefault(t, len(codes)) for t in tokens), dtype=np.int64, count=len(tokens))
+    vocabulary = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in codes), dtype=np.uint64, count=len(codes))
+    token_hashes = vocabulary[positions]
+    count = max(1, len(tokens) - words + 1)
+    grams = token_hashes[:count].copy()
+    for k in range(1, min(words, len(tokens))):
+        grams = grams * _GRAM_MULTIPLIER + token_hashes[k:k + count]
+    return np.unique(grams >> np.uint64(32))
+
+
+class MinHasher:
+    """
+    MinHash signatures using multiply-shift hashes ((a * x + b) mod 2^64) >> 32 over 32-bit shingle hashes.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Odd multipliers; uint64 arithmetic wraps, which is the mod 2^64 of the hash family
+        self.a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+        self.num_perm = num_perm
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        # Chunked so a long document never builds a huge num_perm x shingles matrix
+        for start in range(0, len(hashes), 4096):
+            chunk = hashes[start:start + 4096]
+            values = (self.a[:, None] * chunk[None, :] + self.b[:, None]) >> np.uint64(32)
+            np.minimum(signature, values.min(axis=1), out=signature)
+        return signature
+
+
+class UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int = BANDS, mask: Optional[np.ndarray] = None,
+                   max_bucket: int = 50) -> set:
+    """
+    Pairs of rows sharing at least one identical band; expected cost is linear in the corpus size.
+    Rows outside mask (e.g. empty texts) are ignored, as are buckets larger than max_bucket, which only
+    boilerplate shared by many papers produces.
+    """
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    indices = np.flatnonzero(mask) if mask is not None else np.arange(len(signatures))
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[indices, band * rows:(band + 1) * rows])
+        for i, row in zip(indices.tolist(), block):
+            buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            if 1 < len(members) <= max_bucket:
+                pairs.update((members[a], members[b]) for a in range(len(members)) for b in range(a + 1, len(members)))
+    return pairs
+
+
+def canonical_index(papers: List[Dict], members: List[int]) -> int:
+    """
+    Record kept for a duplicate group: the one with the longest converted document, then the latest arXiv
+    version, then the earliest in the input.
+    """
+    def rank(i):
+        version = (arxiv_id(papers[i]) or ("", 0))[1]
+        return (-len(papers[i].get("document") or ""), -version, i)
+    return min(members, key=rank)
+
+
+def merge_group(papers: List[Dict], members: List[int]) -> Dict:
+    keep = canonical_index(papers, members)
+    canonical = dict(papers[keep])
+    aliases = list(canonical.get("aliases") or [])
+    for i in sorted(members):
+        if i == keep:
+            continue
+        other = papers[i]
+        aliases.append({"id": other.get("id", ""), "title": other.get("title", ""), "url": other.get("url", "")})
+        aliases.extend(other.get("aliases") or [])
+        # Fill fields the canonical record lacks, e.g. keywords of an ACM copy for an arXiv conversion
+        for field, value in other.items():
+            if field != "aliases" and value and not canonical.get(field):
+                canonical[field] = value
+    canonical["aliases"] = aliases
+    return canonical
+
+
+def deduplicate(papers: List[Dict], threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                verbose: bool = True) -> Tuple[List[Dict], Dict]:
+    """
+    Collapse near-duplicate papers into one canonical record each, listing the others under "aliases".
+
+    Papers sharing an arXiv base id (any version) or DOI are duplicates outright. Otherwise candidate pairs
+    come from MinHash LSH over title+abstract shingles and over title+abstract+document shingles, and are
+    confirmed when the estimated Jaccard similarity reaches threshold on title+abstract and, when both have
+    a document, on the full text as well. This keeps arXiv/ACM copies together even though only one of
+    them has a converted document.
+
+    Args:
+        papers: Paper records in input order
+        threshold: Minimum estimated Jaccard similarity of duplicates
+        num_perm: MinHash signature length
+        bands: LSH bands; num_perm / bands rows each
+
+    Returns:
+        (deduplicated papers in input order of their first member, report dict)
+    """
+    n = len(papers)
+    groups = UnionFind(n)
+
+    exact = defaultdict(list)
+    for i, paper in enumerate(papers):
+        found = arxiv_id(paper)
+        if found:
+            exact["arxiv:" + found[0]].append(i)
+        if doi(paper):
+            exact["doi:" + doi(paper)].append(i)
+    exact_pairs = 0
+    for members in exact.values():
+        for j in members[1:]:
+            exact_pairs += groups.find(members[0]) != groups.find(j)
+            groups.union(members[0], j)
+
+    hasher = MinHasher(num_perm)
+    head = np.empty((n, num_perm), dtype=np.uint64)
+    full = np.empty((n, num_perm), dtype=np.uint64)
+    has_head = np.zeros(n, dtype=bool)
+    has_document = np.zeros(n, dtype=bool)
+    for i, paper in enumerate(papers):
+        head_hashes = shingles(f"{paper.get('title', '')} {paper.get('abstract', '')}")
+        document_hashes = shingles((paper.get("document") or "")[:MAX_DOCUMENT_CHARS])
+        has_head[i] = len(head_hashes) > 0
+        has_document[i] = len(document_hashes) > 0
+        head[i] = hasher.signature(head_hashes)
+        full[i] = hasher.signature(np.union1d(head_hashes, document_hashes))
+
+    candidates = lsh_candidates(head, bands, has_head) | lsh_candidates(full, bands, has_head | has_document)
+    near_pairs = 0
+    for i, j in sorted(candidates):
+        if groups.find(i) == groups.find(j):
+            continue
+        both_head = has_head[i] and has_head[j]
+        both_document = has_document[i] and has_document[j]
+        if not both_head and not both_document:
+            continue
+        if both_head and np.mean(head[i] == head[j]) < threshold:
+            continue
+        if both_document and np.mean(full[i] == full[j]) < threshold:
+            continue
+        groups.union(i, j)
+        near_pairs += 1
+
+    members = defaultdict(list)
+    for i in range(n):
+        members[groups.find(i)].append(i)
+
+    output = []
+    duplicate_groups = []
+    for root in sorted(members):
+        group = members[root]
+        if len(group) == 1:
+            output.append(papers[group[0]])
+            continue
+        keep = canonical_index(papers, group)
+        output.append(merge_group(papers, group))
+        duplicate_groups.append({"canonical": paper_key(papers[keep]),
+                                 "aliases": [paper_key(papers[i]) for i in group if i != keep]})
+
+    removed = n - len(output)
+    report = {
+        "papers_in": n,
+        "papers_out": len(output),
+        "duplicates_removed": removed,
+        "duplicate_groups": len(duplicate_groups),
+        "exact_id_merges": exact_pairs,
+        "near_duplicate_merges": near_pairs,
+        "lsh_candidate_pairs": len(candidates),
+        "llm_calls_avoided": {"merge_filter": removed * FILTER_CALLS_PER_PAPER,
+                              "paper_classifier": removed * CLASSIFIER_CALLS_PER_PAPER},
+        "groups": duplicate_groups,
+    }
+    METRICS.inc("duplicates_removed_total", removed, stage="dedup")
+
+    if verbose:
+        print(f"🧬 Dedup: {n} papers → {len(output)} ({removed} duplicates in {len(duplicate_groups)} groups; "
+              f"{exact_pairs} by arXiv id/DOI, {near_pairs} by MinHash from {len(candidates)} LSH candidates)")
+        if removed:
+            print(f"   LLM calls avoided: ≥{report['llm_calls_avoided']['merge_filter']} in merge_filter, "
+                  f"≤{report['llm_calls_avoided']['paper_classifier']} in paper_classifier")
+    return output, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate papers (arXiv versions, arXiv/ACM copies, re-ingested folders).")
+    parser.add_argument("-i", "--input", required=True, help="Input papers YAML")
+    parser.add_argument("-o", "--output", required=True, help="Deduplicated papers YAML, duplicates listed under 'aliases'")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"Minimum Jaccard similarity (default: {THRESHOLD})")
+    parser.add_argument("--report", help="Optional YAML file for the duplicate groups and LLM calls avoided")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    papers, report = deduplicate(data["papers"], args.threshold)
+    with open(args.output, "w", encoding="utf-8") as f:
+        yaml.dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            yaml.safe_dump(report, f, allow_unicode=True, sort_keys=False)
+    print(f"[✓] Wrote {len(papers)} papers to {args.output}")
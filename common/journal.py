@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+
+from typing import Dict, Optional
+
+
+def paper_key(paper: Dict) -> str:
+    """
+    Stable key of a paper record: its id, falling back to the title for records without one.
+    """
+    return str(paper.get("id") or paper.get("title", ""))
+
+
+def read_journal(path: str) -> Dict[str, Dict]:
+    """
+    Records of a journal file keyed by paper key, without opening it for writing.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records.setdefault(record["key"], {}).update(record)
+    return records
+
+
+def journal_conflict(path: str, resume: bool = False, fresh: bool = False) -> Optional[str]:
+    """
+    Why a Journal cannot be opened at path with these flags, or None. Lets scripts reject the
+    arguments before any work starts.
+    """
+    if resume or fresh or not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return f"{path} already has records; pass --resume to continue that run or --fresh to discard them"
+
+
+def completed_path(path: str) -> str:
+    """
+    Where complete() moves a journal, e.g. merge_filter_journal.done.jsonl.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.done{ext}"
+
+
+class Journal:
+    """
+    Append-only JSONL journal of per-paper results that survives crashes.
+
+    Every record is flushed and fsynced before append() returns, so a restart with resume=True
+    sees everything that was completed. Later records for the same key are merged over earlier ones.
+    A non-empty journal is only truncated with fresh=True, so forgetting --resume cannot wipe the
+    checkpoint of a crashed run. complete() moves the journal of a finished run out of the way, so the
+    next run starts without either flag.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fresh: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conflict = journal_conflict(path, resume, fresh)
+        if conflict:
+            raise FileExistsError(conflict)
+        existing = os.path.exists(path) and os.path.getsize(path) > 0
+        torn = resume and existing and not self._ends_with_newline(path)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if torn:
+            self._file.write("\n")
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Read all journaled records, keyed by paper key. A torn last line from a crash is ignored.
+        """
+        return read_journal(self.path)
+
+    def append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def complete(self) -> str:
+        """
+        Close the journal and move it to completed_path(), replacing the one of an earlier run.
+        """
+        self.close()
+        done = completed_path(self.path)
+        os.replace(self.path, done)
+        return done
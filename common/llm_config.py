@@ -0,0 +1,91 @@
+import os
+
+from typing import Dict, Optional
+
+
+class LLMConfig:
+    """
+    Model and endpoint used by one pipeline stage.
+
+    Values come from, in order: configure() arguments (CLI flags), CSRA_<STAGE>_MODEL / CSRA_API_BASE /
+    CSRA_LLM_RETRIES environment variables, then the stage default. Pointing CSRA_API_BASE at
+    benchmarks/mock_llm_server.py runs a stage without API spend.
+
+    Setting a cascade model (CSRA_<STAGE>_CASCADE_MODEL) sends every request to it first and only
+    escalates to model when its confidence is below cascade_threshold, see common/cascade.py.
+    """
+
+    def __init__(self, stage: str, default_model: str, default_cascade_threshold: float = 0.9):
+        self.stage = stage
+        self.default_model = default_model
+        self.default_cascade_threshold = default_cascade_threshold
+        self.model = default_model
+        self.api_base = None
+        self.num_retries = 0
+        self.cascade_model = None
+        self.cascade_threshold = default_cascade_threshold
+        self.configure()
+
+    def configure(self, model: Optional[str] = None, api_base: Optional[str] = None, num_retries: Optional[int] = None,
+                  cascade_model: Optional[str] = None, cascade_threshold: Optional[float] = None):
+        prefix = f"CSRA_{self.stage.upper()}"
+        self.model = model or os.environ.get(f"{prefix}_MODEL") or self.default_model
+        self.api_base = api_base or os.environ.get("CSRA_API_BASE") or None
+        if num_retries is None:
+            num_retries = int(os.environ.get("CSRA_LLM_RETRIES", "0"))
+        self.num_retries = num_retries
+        self.cascade_model = cascade_model or os.environ.get(f"{prefix}_CASCADE_MODEL") or None
+        if cascade_threshold is None:
+            cascade_threshold = float(os.environ.get(f"{prefix}_CASCADE_THRESHOLD", self.default_cascade_threshold))
+        self.cascade_threshold = cascade_threshold
+        return self
+
+    def completion_kwargs(self, model: Optional[str] = None) -> Dict:
+        """
+        Keyword arguments for litellm.completion selecting this model (or another tier's) and endpoint.
+        """
+        kwargs = {"model": model or self.model}
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+            # Local OpenAI-compatible servers accept any key, but litellm refuses to send a request without one
+            if not os.environ.get("OPENAI_API_KEY"):
+                kwargs["api_key"] = "local"
+        if self.num_retries:
+            kwargs["num_retries"] = self.num_retries
+        return kwargs
+
+    def describe(self) -> str:
+        models = self.model
+        if self.cascade_model:
+            models = f"{self.cascade_model} → {self.model} below {self.cascade_threshold:.2f} confidence"
+        return f"{models} via {self.api_base}" if self.api_base else models
+
+
+# Filter confidence is the verdict token probability, classifier confidence is self-reported and runs high
+FILTER_LLM = LLMConfig("filter", "gpt-4o", default_cascade_threshold=0.9)
+CLASSIFIER_LLM = LLMConfig("classifier", "gpt-4o-mini", default_cascade_threshold=0.8)
+JUDGE_LLM = LLMConfig("judge", "gpt-4o-mini")
+
+
+def add_llm_arguments(parser, config: LLMConfig, cascade: bool = True):
+    """
+    Add --model, --api-base, --llm-retries and, with cascade, model cascade flags for one stage to an argparse parser.
+    """
+    parser.add_argument("--model", help=f"litellm model name (default: $CSRA_{config.stage.upper()}_MODEL or {config.default_model})")
+    parser.add_argument("--api-base", help="OpenAI-compatible API base URL, e.g. a local mock server (default: $CSRA_API_BASE)")
+    parser.add_argument("--llm-retries", type=int, default=None,
+                        help="litellm retries on rate limits and server errors (default: $CSRA_LLM_RETRIES or 0)")
+    if cascade:
+        add_cascade_arguments(parser, config)
+
+
+def add_cascade_arguments(parser, config: LLMConfig, prefix: str = ""):
+    """
+    Add --[prefix-]cascade-model and --[prefix-]cascade-threshold flags for one stage.
+    """
+    stage = config.stage.upper()
+    parser.add_argument(f"--{prefix}cascade-model",
+                        help=f"Cheaper litellm model asked first; escalates to the main model when unsure (default: $CSRA_{stage}_CASCADE_MODEL, off)")
+    parser.add_argument(f"--{prefix}cascade-threshold", type=float, default=None,
+                        help=f"Confidence below which the cheap model's answer is escalated "
+                             f"(default: $CSRA_{stage}_CASCADE_THRESHOLD or {config.default_cascade_threshold})")
@@ -0,0 +1,151 @@
+import argparse
+import glob
+import os
+import sys
+
+import yaml
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.journal import paper_key
+from common.sharding import SHARD_FILE_RE
+
+
+def load_order(input_yaml: Optional[str]) -> Optional[Dict[str, int]]:
+    """
+    Position of every paper in the original input, used to reproduce single-node output order.
+    """
+    if not input_yaml:
+        return None
+    with open(input_yaml, "r", encoding="utf-8") as f:
+        papers = yaml.safe_load(f)["papers"]
+    return {paper_key(p): i for i, p in enumerate(papers)}
+
+
+def sort_papers(papers: List[Dict], order: Optional[Dict[str, int]]) -> List[Dict]:
+    if order is None:
+        return sorted(papers, key=paper_key)
+    return sorted(papers, key=lambda p: (order.get(paper_key(p), len(order)), paper_key(p)))
+
+
+def group_shard_files(paths: List[str]) -> Dict[str, Dict[int, str]]:
+    """
+    Group shard files by the path they merge into, checking that all shards agree on the shard count.
+    """
+    groups = defaultdict(dict)
+    counts = set()
+    for path in paths:
+        match = SHARD_FILE_RE.search(path)
+        if not match:
+            continue
+        counts.add(int(match.group(2)))
+        groups[path[:match.start()] + match.group(3)][int(match.group(1))] = path
+    if len(counts) > 1:
+        raise ValueError(f"Shard files from runs with different shard counts: {sorted(counts)}")
+    return groups
+
+
+def read_papers(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return (yaml.safe_load(f) or {}).get("papers") or []
+
+
+def write_papers(path: str, papers: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
+
+
+def merge_filter_outputs(directory: str = ".", input_yaml: Optional[str] = None, clean: bool = False):
+    """
+    Merge qualified/disqualified shard outputs of merge_filter.py and print the combined usage statistics.
+
+    Args:
+        directory: Folder containing the *.shard-I-of-N.yaml outputs
+        input_yaml: Original input file, to restore its paper order
+        clean: Delete the shard files after merging
+    """
+    order = load_order(input_yaml)
+    all_papers = []
+
+    for name in ("qualified_papers.yaml", "disqualified_papers.yaml"):
+        stem, ext = os.path.splitext(name)
+        paths = glob.glob(os.path.join(directory, f"{stem}.shard-*-of-*{ext}"))
+        shards = group_shard_files(paths).get(os.path.join(directory, name), {})
+        if not shards:
+            raise FileNotFoundError(f"No shard outputs for {name} in {directory}")
+
+        shard_count = int(SHARD_FILE_RE.search(next(iter(shards.values()))).group(2))
+        missing = sorted(set(range(shard_count)) - set(shards))
+        if missing:
+            raise FileNotFoundError(f"Missing shards {missing} of {shard_count} for {name}")
+
+        papers = sort_papers([p for i in sorted(shards) for p in read_papers(shards[i])], order)
+        write_papers(os.path.join(directory, name), papers)
+        all_papers.extend(papers)
+        print(f"[✓] {name}: {len(papers)} papers from {shard_count} shards")
+
+        if clean:
+            for path in shards.values():
+                os.remove(path)
+
+    if all_papers:
+        tokens = sum(p.get("token_usage", 0) for p in all_papers)
+        seconds = sum(p.get("time_usage", 0.0) for p in all_papers)
+        print(f"\n📊 Avg Total Tokens per Paper: {tokens / len(all_papers):.1f}")
+        print(f"⏱  Avg Total Time per Paper: {seconds / len(all_papers):.2f}s")
+        print(f"Σ  Total Tokens: {tokens}, Total LLM Time: {seconds:.1f}s")
+
+
+def merge_cluster_outputs(output_folder: str, input_yaml: Optional[str] = None, clean: bool = False):
+    """
+    Merge papers.shard-I-of-N.yaml files of paper_classifier.py into one papers.yaml per cluster folder.
+
+    Args:
+        output_folder: Cluster output folder given to paper_classifier.py
+        input_yaml: Original input file, to restore its paper order
+        clean: Delete the shard files after merging
+    """
+    order = load_order(input_yaml)
+    paths = glob.glob(os.path.join(output_folder, "*", "*", "papers.shard-*-of-*.yaml"))
+    groups = group_shard_files(paths)
+    if not groups:
+        raise FileNotFoundError(f"No shard outputs found under {output_folder}")
+
+    shards_seen = set()
+    for merged_path, shards in sorted(groups.items()):
+        shards_seen.update(shards)
+        papers = sort_papers([p for i in sorted(shards) for p in read_papers(shards[i])], order)
+        with open(merged_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
+        if clean:
+            for path in shards.values():
+                os.remove(path)
+
+    shard_count = int(SHARD_FILE_RE.search(paths[0]).group(2))
+    missing = sorted(set(range(shard_count)) - shards_seen)
+    if missing:
+        print(f"[!] No cluster files from shards {missing} of {shard_count}; check that those nodes finished")
+    print(f"[✓] Merged {len(groups)} cluster folders from {shard_count} shards")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge sharded outputs of merge_filter.py or paper_classifier.py.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filter_parser = subparsers.add_parser("filter", help="Merge qualified/disqualified shard outputs")
+    filter_parser.add_argument("-d", "--dir", default=".", help="Folder with the shard outputs (default: .)")
+
+    clusters_parser = subparsers.add_parser("clusters", help="Merge cluster folder shard outputs")
+    clusters_parser.add_argument("-o", "--output", required=True, help="Cluster output folder")
+
+    for sub in (filter_parser, clusters_parser):
+        sub.add_argument("-i", "--input", help="Original input YAML, to keep its paper order")
+        sub.add_argument("--clean", action="store_true", help="Delete shard files after merging")
+
+    args = parser.parse_args()
+    if args.command == "filter":
+        merge_filter_outputs(args.dir, args.input, args.clean)
+    else:
+        merge_cluster_outputs(args.output, args.input, args.clean)
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+METRIC_PREFIX = "csra_"
+
+
+def _usage_value(usage, key):
+    if usage is None:
+        return 0
+    value = usage.get(key, 0) if isinstance(usage, dict) else getattr(usage, key, 0)
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _cached_tokens(usage):
+    if usage is None:
+        return 0
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    return _usage_value(details, "cached_tokens")
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms, labelled by stage and model.
+
+    Every observation is also appended to a JSONL event file when an output directory is configured.
+    finish() writes a Prometheus textfile-collector file next to it and prints a run summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self.histograms: Dict[Tuple[str, Tuple], Dict] = {}
+        self.output_dir: Optional[str] = None
+        self.run_name = "run"
+        self.started = time.time()
+        self._events = None
+
+    def configure(self, output_dir: Optional[str] = None, run_name: str = "run"):
+        """
+        Start a new run. Files are only written when output_dir (or CSRA_METRICS_DIR) is set.
+        """
+        output_dir = output_dir or os.environ.get("CSRA_METRICS_DIR")
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.run_name = run_name
+            self.started = time.time()
+            self.output_dir = output_dir
+            if self._events:
+                self._events.close()
+                self._events = None
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                self._events = open(os.path.join(output_dir, f"{run_name}.metrics.jsonl"), "a", encoding="utf-8")
+
+    def _emit(self, event: Dict):
+        if self._events:
+            event["ts"] = round(time.time(), 3)
+            event["run"] = self.run_name
+            self._events.write(json.dumps(event) + "\n")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+            self._emit({"type": "counter", "name": name, "value": value, "labels": labels})
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0, "max": 0.0}
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["count"] += 1
+            hist["sum"] += value
+            hist["max"] = max(hist["max"], value)
+            self._emit({"type": "histogram", "name": name, "value": round(value, 6), "labels": labels})
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """
+        Time a block of work and count it as one request of the given stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("latency_seconds", time.perf_counter() - start, stage=stage, **labels)
+            self.inc("requests_total", stage=stage, **labels)
+
+    def record_llm_call(self, stage: str, model: str, response, elapsed: float, retries: int = 0):
+        """
+        Record latency, token usage, estimated cost and prompt-cache hits of one litellm completion.
+        """
+        usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+        prompt_tokens = _usage_value(usage, "prompt_tokens")
+        cached_tokens = _cached_tokens(usage)
+
+        self.observe("latency_seconds", elapsed, stage=stage, model=model)
+        self.inc("requests_total", stage=stage, model=model)
+        self.inc("prompt_tokens_total", prompt_tokens, stage=stage, model=model)
+        self.inc("completion_tokens_total", _usage_value(usage, "completion_tokens"), stage=stage, model=model)
+        self.cache_lookup(f"{stage}_prompt", cached_tokens > 0)
+        if retries:
+            self.inc("retries_total", retries, stage=stage, model=model)
+        # Imported here so modules that only count things (dedup, citation_graph) load without litellm;
+        # by the time a completion is recorded the caller has imported it anyway
+        import litellm
+        try:
+            self.inc("cost_usd_total", litellm.completion_cost(completion_response=response), stage=stage, model=model)
+        except Exception:
+            pass
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self.inc("cache_lookups_total", cache=cache)
+        if hit:
+            self.inc("cache_hits_total", cache=cache)
+
+    def _label_str(self, labels: Tuple) -> str:
+        return ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels)
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{METRIC_PREFIX}{name}{{{self._label_str(labels)}}} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                label_str = self._label_str(labels)
+                sep = "," if label_str else ""
+                for bound, count in zip(LATENCY_BUCKETS, hist["buckets"]):
+                    lines.append(f'{METRIC_PREFIX}{name}_bucket{{{label_str}{sep}le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}{name}_bucket{{{label_str}{sep}le="+Inf"}} {hist["count"]}')
+                lines.append(f"{METRIC_PREFIX}{name}_sum{{{label_str}}} {hist['sum']}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{{{label_str}}} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        """
+        Aggregate counters and latencies per (stage, model) plus cache hit rates.
+        """
+        rows = defaultdict(dict)
+        caches = defaultdict(lambda: {"hits": 0, "lookups": 0})
+        with self._lock:
+            for (name, labels), value in self.counters.items():
+                labels = dict(labels)
+                if name.startswith("cache_"):
+                    caches[labels["cache"]]["hits" if name == "cache_hits_total" else "lookups"] += value
+                    continue
+                key = " / ".join(str(labels[k]) for k in ("stage", "model") if k in labels)
+                short = name.removesuffix("_total")
+                rows[key][short] = rows[key].get(short, 0) + value
+            for (name, labels), hist in self.histograms.items():
+                labels = dict(labels)
+                key = " / ".join(str(labels[k]) for k in ("stage", "model") if k in labels)
+                rows[key]["mean_s"] = round(hist["sum"] / hist["count"], 3) if hist["count"] else 0.0
+                rows[key]["max_s"] = round(hist["max"], 3)
+
+        hit_rates = {name: round(c["hits"] / c["lookups"], 3) for name, c in caches.items() if c["lookups"]}
+        return {"wall_clock_s": round(time.time() - self.started, 2), "stages": dict(rows), "cache_hit_rates": hit_rates}
+
+    def finish(self) -> Dict:
+        """
+        Write the Prometheus textfile and a summary event, print the summary and return it.
+        """
+        summary = self.summary()
+        if self.output_dir:
+            prom_path = os.path.join(self.output_dir, f"{self.run_name}.prom")
+            with open(prom_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            # Rename so the node exporter never reads a half-written file
+            os.replace(prom_path + ".tmp", prom_path)
+            with self._lock:
+                self._emit({"type": "summary", **summary})
+                self._events.flush()
+
+        print(f"\n📈 Metrics for {self.run_name} ({summary['wall_clock_s']}s wall clock)")
+        for stage, values in sorted(summary["stages"].items()):
+            parts = [f"{k}={int(v) if float(v).is_integer() else round(v, 4)}" for k, v in sorted(values.items())]
+            print(f"   {stage}: {', '.join(parts)}")
+        for cache, rate in sorted(summary["cache_hit_rates"].items()):
+            print(f"   cache {cache}: {rate:.1%} hit rate")
+        return summary
+
+
+METRICS = Metrics()
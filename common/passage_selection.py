@@ -0,0 +1,179 @@
+import math
+import re
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from common.tokens import count_tokens
+
+# Query terms used to rank passages for each disqualification criterion.
+CRITERION_QUERIES = {
+    "evaluation": ["evaluation", "evaluate", "experiment", "experiments", "experimental", "results", "benchmark",
+                   "benchmarks", "metric", "metrics", "dataset", "datasets", "baseline", "baselines", "accuracy",
+                   "performance", "speedup", "latency", "throughput", "measured", "compare", "comparison", "table", "figure"],
+    "related_work": ["related", "prior", "previous", "existing", "literature", "work", "approaches", "proposed",
+                     "compared", "unlike", "survey", "state", "art", "et", "al", "background"],
+    "novelty": ["propose", "proposed", "novel", "new", "first", "contribution", "contributions", "introduce",
+                "present", "unlike", "knowledge", "approach", "framework", "method", "design"],
+    "review_only": ["survey", "review", "overview", "summarize", "summarizes", "taxonomy", "systematic", "literature",
+                    "propose", "contribution", "contributions", "experiments", "implementation", "novel"],
+}
+
+# Section headings that are almost always relevant for a criterion.
+CRITERION_HEADINGS = {
+    "evaluation": re.compile(r"evaluat|experiment|result|benchmark|measurement|empirical", re.IGNORECASE),
+    "related_work": re.compile(r"related|prior|background|literature|previous", re.IGNORECASE),
+    "novelty": re.compile(r"introduction|contribution|conclusion|overview", re.IGNORECASE),
+    "review_only": re.compile(r"introduction|conclusion|methodology|scope|overview", re.IGNORECASE),
+}
+
+HEADING_BOOST = 2.0
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s+(.*)$", re.MULTILINE)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def criterion_for_prompt(prompt_key: Optional[str]) -> Optional[str]:
+    """
+    Map a prompt key such as "evaluation_prompt_full" to its criterion name ("evaluation").
+    """
+    if not prompt_key:
+        return None
+    name = prompt_key.removesuffix("_full").removesuffix("_prompt")
+    return name if name in CRITERION_QUERIES else None
+
+
+def split_chunks(document_text: str, chunk_tokens: int = 300) -> List[Dict]:
+    """
+    Split a markdown document into sections and then into paragraph-aligned chunks.
+
+    Args:
+        document_text: Markdown text of the paper
+        chunk_tokens: Approximate maximum size of a chunk in tokens
+
+    Returns:
+        List of chunks in document order, each with its heading, text and position
+    """
+    max_chars = chunk_tokens * 4
+    headings = list(_HEADING_RE.finditer(document_text))
+
+    sections = []
+    if not headings or headings[0].start() > 0:
+        end = headings[0].start() if headings else len(document_text)
+        sections.append(("", document_text[:end]))
+    for i, match in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(document_text)
+        sections.append((match.group(1).strip(), document_text[match.start():end]))
+
+    chunks = []
+    for heading, body in sections:
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", body):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            # Very long paragraphs (tables, broken OCR) are cut into fixed-size pieces
+            pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+            for piece in pieces:
+                if current and len(current) + len(piece) > max_chars:
+                    chunks.append({"heading": heading, "text": current})
+                    current = ""
+                current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append({"heading": heading, "text": current})
+
+    for position, chunk in enumerate(chunks):
+        chunk["position"] = position
+    return chunks
+
+
+def bm25_scores(chunks: List[Dict], query_terms: List[str]) -> List[float]:
+    """
+    Score chunks against a bag of query terms with Okapi BM25, using the chunks themselves as the corpus.
+    """
+    tokenized = [_WORD_RE.findall(chunk["text"].lower()) for chunk in chunks]
+    if not tokenized:
+        return []
+
+    avg_len = sum(len(t) for t in tokenized) / len(tokenized) or 1.0
+    doc_freq = Counter()
+    for tokens in tokenized:
+        doc_freq.update(set(tokens))
+
+    n = len(tokenized)
+    query = set(query_terms)
+    idf = {term: math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5)) for term in query}
+
+    scores = []
+    for tokens in tokenized:
+        tf = Counter(t for t in tokens if t in query)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_len)
+        scores.append(sum(idf[t] * f * (BM25_K1 + 1) / (f + norm) for t, f in tf.items()))
+    return scores
+
+
+def select_passages(document_text: str, criterion: str, token_budget: int, model: str = "gpt-4o",
+                    chunk_tokens: int = 300, query_terms: Optional[List[str]] = None, keep_first: bool = True) -> Dict:
+    """
+    Pick the passages of a document most relevant to a criterion, packed up to a token budget.
+
+    The first chunk (title, authors, abstract) is always kept. The remaining budget is filled with the
+    highest scoring chunks that match at least one query term, which are then emitted in document order
+    under their section headings.
+
+    Args:
+        document_text: Markdown text of the paper
+        criterion: One of the CRITERION_QUERIES keys
+        token_budget: Maximum number of tokens for the selected text
+        model: Model whose tokenizer is used for counting
+        chunk_tokens: Approximate chunk size in tokens
+        query_terms: Override for the criterion's query terms
+        keep_first: Always keep the first chunk (title, authors, abstract)
+
+    Returns:
+        Dictionary with the selected "text", "tokens_before", "tokens_after" and number of "chunks" kept
+    """
+    tokens_before = count_tokens(document_text, model)
+    if tokens_before <= token_budget:
+        return {"text": document_text, "tokens_before": tokens_before, "tokens_after": tokens_before,
+                "chunks": None}
+
+    chunks = split_chunks(document_text, chunk_tokens)
+    terms = query_terms if query_terms is not None else CRITERION_QUERIES.get(criterion, [])
+    scores = bm25_scores(chunks, terms)
+
+    heading_re = CRITERION_HEADINGS.get(criterion)
+    for chunk, score in zip(chunks, scores):
+        chunk["score"] = score
+        if heading_re and heading_re.search(chunk["heading"]):
+            chunk["score"] += HEADING_BOOST
+        chunk["tokens"] = count_tokens(chunk["text"], model)
+
+    selected = []
+    used = 0
+    pinned = 1 if keep_first else 0
+    ranked = chunks[:pinned] + sorted(chunks[pinned:], key=lambda c: c["score"], reverse=True)
+    for i, chunk in enumerate(ranked):
+        if used + chunk["tokens"] > token_budget or (i >= pinned and chunk["score"] <= 0):
+            continue
+        selected.append(chunk)
+        used += chunk["tokens"]
+
+    selected.sort(key=lambda c: c["position"])
+    parts = []
+    last_heading = None
+    last_position = -1
+    for chunk in selected:
+        if chunk["position"] != last_position + 1 and parts:
+            parts.append("[...]")
+        if chunk["heading"] and chunk["heading"] != last_heading and not chunk["text"].lstrip().startswith("#"):
+            parts.append(f"## {chunk['heading']}")
+        parts.append(chunk["text"])
+        last_heading = chunk["heading"]
+        last_position = chunk["position"]
+
+    text = "\n\n".join(parts)
+    return {"text": text, "tokens_before": tokens_before, "tokens_after": count_tokens(text, model),
+            "chunks": len(selected)}
@@ -0,0 +1,210 @@
+import glob
+import json
+import os
+
+from collections import defaultdict
+from typing import Dict, Optional
+
+from common.llm_config import LLMConfig
+
+# Used for a stage until a metrics file from an earlier run has calls for it
+DEFAULT_COMPLETION_TOKENS = {"disqualify_short": 40, "disqualify_full": 40, "classify_topic": 150,
+                             "classify_subtopic": 20}
+DEFAULT_ESCALATION_RATE = 0.3
+# Seconds per call without history: request overhead plus output at 50 tokens/s
+DEFAULT_CALL_OVERHEAD_S = 0.5
+DEFAULT_OUTPUT_TOKENS_PER_S = 50.0
+
+
+class History:
+    """
+    Per-stage and per-model LLM call statistics summed over earlier runs' *.metrics.jsonl files
+    (see common/metrics.py), used as the rates of a plan.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self.metrics_dir = metrics_dir or os.environ.get("CSRA_METRICS_DIR")
+        self.counters = defaultdict(float)
+        self.latency = defaultdict(lambda: [0, 0.0])
+        self.files = []
+        if self.metrics_dir:
+            self.files = sorted(glob.glob(os.path.join(self.metrics_dir, "*.metrics.jsonl")))
+        for path in self.files:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._add(event)
+
+    def _add(self, event: Dict):
+        labels = event.get("labels") or {}
+        stage, model = labels.get("stage"), labels.get("model")
+        if event.get("type") == "counter" and stage:
+            if event["name"] == "escalations_total":
+                self.counters[("escalations", stage, None)] += event["value"]
+            elif model:
+                self.counters[(event["name"].removesuffix("_total"), stage, model)] += event["value"]
+        elif event.get("type") == "histogram" and event.get("name") == "latency_seconds" and model:
+            row = self.latency[(stage, model)]
+            row[0] += 1
+            row[1] += event["value"]
+
+    def total(self, name: str, stage: str, model: Optional[str] = None) -> float:
+        return sum(v for (n, s, m), v in self.counters.items() if n == name and s == stage and model in (None, m))
+
+    def calls(self, stage: str, model: Optional[str] = None) -> float:
+        return self.total("requests", stage, model)
+
+    def completion_tokens(self, stage: str) -> float:
+        calls = self.calls(stage)
+        return self.total("completion_tokens", stage) / calls if calls else DEFAULT_COMPLETION_TOKENS.get(stage, 100)
+
+    def requests(self, stage: str) -> float:
+        # Every escalated request made two calls, the others one
+        return self.calls(stage) - self.total("escalations", stage)
+
+    def ratio(self, stage: str, of_stage: str, default: float) -> float:
+        """
+        Requests of stage per request of of_stage, e.g. full-text fallbacks per abstract check.
+        """
+        base = self.requests(of_stage)
+        return self.requests(stage) / base if base > 0 else default
+
+    def escalation_rate(self, stage: str) -> float:
+        escalations = self.total("escalations", stage)
+        requests = self.requests(stage)
+        return escalations / requests if escalations and requests > 0 else DEFAULT_ESCALATION_RATE
+
+    def seconds_per_call(self, stage: str, model: str, completion_tokens: float) -> float:
+        count, total = self.latency.get((stage, model), (0, 0.0))
+        if count:
+            return total / count
+        count = sum(c for (s, _), (c, _) in self.latency.items() if s == stage)
+        if count:
+            return sum(t for (s, _), (_, t) in self.latency.items() if s == stage) / count
+        return DEFAULT_CALL_OVERHEAD_S + completion_tokens / DEFAULT_OUTPUT_TOKENS_PER_S
+
+    def cost_per_token(self, stage: str, model: str) -> Optional[float]:
+        tokens = self.total("prompt_tokens", stage, model) + self.total("completion_tokens", stage, model)
+        cost = self.total("cost_usd", stage, model)
+        return cost / tokens if tokens and cost else None
+
+
+def _price(model: str, prompt_tokens: float, completion_tokens: float) -> Optional[float]:
+    # litellm prices from its cost map; the scripts make it load the bundled copy in --plan mode
+    import litellm
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(model=model, prompt_tokens=int(round(prompt_tokens)),
+                                                              completion_tokens=int(round(completion_tokens)))
+    except Exception:
+        return None
+    return prompt_cost + completion_cost
+
+
+class Plan:
+    """
+    Expected LLM calls, tokens, cost and time of a run, built from the exact prompts it would send.
+
+    add() takes one prompt and the probability that the run sends it (e.g. the full-text fallback rate);
+    with a cascade model configured, the prompt goes to the cheap model and, at the stage's escalation
+    rate, to the main model as well.
+    """
+
+    def __init__(self, history: History):
+        self.history = history
+        self.papers = 0
+        self.skipped = defaultdict(int)
+        self.rows = defaultdict(lambda: {"calls": 0.0, "prompt_tokens": 0.0, "completion_tokens": 0.0})
+
+    def add(self, config: LLMConfig, stage: str, prompt_tokens: int, probability: float = 1.0,
+            completion_tokens: Optional[float] = None):
+        if completion_tokens is None:
+            completion_tokens = self.history.completion_tokens(stage)
+        tiers = [(config.model, probability)]
+        if config.cascade_model:
+            tiers = [(config.cascade_model, probability),
+                     (config.model, probability * self.history.escalation_rate(stage))]
+        for model, p in tiers:
+            row = self.rows[(stage, model)]
+            row["calls"] += p
+            row["prompt_tokens"] += p * prompt_tokens
+            row["completion_tokens"] += p * completion_tokens
+
+    def skip(self, reason: str):
+        self.skipped[reason] += 1
+
+    def summary(self, concurrency: int = 1, requests_per_minute: Optional[float] = None,
+                tokens_per_minute: Optional[float] = None) -> Dict:
+        stages = {}
+        totals = {"calls": 0.0, "tokens": 0.0, "cost_usd": 0.0, "call_seconds": 0.0}
+        unpriced = []
+        for (stage, model), row in sorted(self.rows.items()):
+            calls = row["calls"]
+            mean_completion = row["completion_tokens"] / calls if calls else 0.0
+            seconds = calls * self.history.seconds_per_call(stage, model, mean_completion)
+            cost = _price(model, row["prompt_tokens"], row["completion_tokens"])
+            if cost is None:
+                per_token = self.history.cost_per_token(stage, model)
+                cost = per_token * (row["prompt_tokens"] + row["completion_tokens"]) if per_token else 0.0
+                if not per_token:
+                    unpriced.append(model)
+            stages[f"{stage} / {model}"] = {"calls": round(calls, 1), "prompt_tokens": round(row["prompt_tokens"]),
+                                            "completion_tokens": round(row["completion_tokens"]),
+                                            "cost_usd": round(cost, 4), "call_seconds": round(seconds, 1)}
+            totals["calls"] += calls
+            totals["tokens"] += row["prompt_tokens"] + row["completion_tokens"]
+            totals["cost_usd"] += cost
+            totals["call_seconds"] += seconds
+
+        # The slowest of the three limits sets the pace
+        limits = {"concurrency": totals["call_seconds"] / max(1, concurrency)}
+        if requests_per_minute:
+            limits["requests_per_minute"] = 60 * totals["calls"] / requests_per_minute
+        if tokens_per_minute:
+            limits["tokens_per_minute"] = 60 * totals["tokens"] / tokens_per_minute
+        bound = max(limits, key=limits.get)
+        return {
+            "papers": self.papers,
+            "skipped": dict(self.skipped),
+            "history": self.history.files,
+            "stages": stages,
+            "calls": round(totals["calls"], 1),
+            "tokens": round(totals["tokens"]),
+            "cost_usd": round(totals["cost_usd"], 4),
+            "unpriced_models": sorted(set(unpriced)),
+            "wall_clock_s": round(limits[bound], 1),
+            "bound_by": bound,
+        }
+
+    def report(self, concurrency: int = 1, requests_per_minute: Optional[float] = None,
+               tokens_per_minute: Optional[float] = None) -> Dict:
+        summary = self.summary(concurrency, requests_per_minute, tokens_per_minute)
+        skipped = ", ".join(f"{n} {reason}" for reason, n in sorted(summary["skipped"].items()))
+        print(f"\n🧮 Plan for {summary['papers']} papers" + (f" ({skipped})" if skipped else ""))
+        print(f"   Rates from {len(summary['history'])} metrics files" if summary["history"]
+              else "   No metrics history, using default rates (set --metrics-dir or $CSRA_METRICS_DIR)")
+        print(f"   {'stage / model':<40} {'calls':>9} {'prompt tok':>12} {'output tok':>11} {'cost $':>9} {'call s':>9}")
+        for name, row in summary["stages"].items():
+            print(f"   {name:<40} {row['calls']:>9.1f} {row['prompt_tokens']:>12} {row['completion_tokens']:>11} "
+                  f"{row['cost_usd']:>9.2f} {row['call_seconds']:>9.0f}")
+        seconds = summary["wall_clock_s"]
+        duration = f"{seconds / 3600:.1f}h" if seconds >= 3600 else f"{seconds / 60:.1f}min" if seconds >= 60 else f"{seconds:.0f}s"
+        print(f"   Total: {summary['calls']:.0f} calls, {summary['tokens']} tokens, ${summary['cost_usd']:.2f}, "
+              f"{duration} wall clock at concurrency {concurrency}, bound by {summary['bound_by'].replace('_', ' ')}")
+        if summary["unpriced_models"]:
+            print(f"   No price known for {', '.join(summary['unpriced_models'])}; counted as $0")
+        return summary
+
+
+def add_plan_arguments(parser):
+    """
+    Add --plan and the concurrency and rate limit flags its wall-clock projection uses.
+    """
+    parser.add_argument("--plan", action="store_true",
+                        help="Build every prompt and project calls, tokens, cost and wall clock without calling the LLM")
+    parser.add_argument("--plan-concurrency", type=int, default=1,
+                        help="Concurrent LLM calls assumed by --plan (default: 1)")
+    parser.add_argument("--plan-rpm", type=float, help="Requests per minute rate limit assumed by --plan")
+    parser.add_argument("--plan-tpm", type=float, help="Tokens per minute rate limit assumed by --plan")
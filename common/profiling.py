@@ -0,0 +1,180 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+PROFILE_MODES = ("spans", "cprofile", "collapsed")
+SAMPLE_INTERVAL = 0.005
+
+# Shared by every span while profiling is off, so a disabled span costs one attribute check
+_DISABLED = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "wall", "cpu")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+        return False
+
+
+class Profiler:
+    """
+    Opt-in wall/CPU span timers for pipeline stages, plus an optional cProfile or sampled collapsed-stack file.
+
+    Modes: "spans" only aggregates spans; "cprofile" also writes <run>.prof (main thread, for snakeviz or
+    pstats); "collapsed" also samples every thread's stack and writes <run>.collapsed.txt for flamegraph.pl
+    or speedscope. CPU time is per thread, so it stays meaningful when stages run in worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.mode: Optional[str] = None
+        self.output_dir = "profiles"
+        self.run_name = "run"
+        self.spans: Dict[str, Dict] = {}
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._samples: Counter = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def configure(self, mode: Optional[str] = None, run_name: str = "run", output_dir: Optional[str] = None):
+        """
+        Start profiling a run. mode falls back to $CSRA_PROFILE ("1" means spans); None or "" disables it.
+        """
+        mode = mode or os.environ.get("CSRA_PROFILE") or None
+        if mode in ("1", "true", "yes"):
+            mode = "spans"
+        if mode and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.enabled = bool(mode)
+        self.run_name = run_name
+        self.output_dir = output_dir or os.environ.get("CSRA_PROFILE_DIR") or "profiles"
+        self.spans = defaultdict(lambda: {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_s": 0.0})
+        self._samples.clear()
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        if mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif mode == "collapsed":
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+        return self
+
+    def span(self, name: str):
+        """
+        Context manager timing one stage of work, e.g. `with PROFILER.span("yaml_load"):`.
+        """
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, name)
+
+    def add(self, name: str, wall: float, cpu: float):
+        with self._lock:
+            span = self.spans[name]
+            span["count"] += 1
+            span["wall_s"] += wall
+            span["cpu_s"] += cpu
+            span["max_s"] = max(span["max_s"], wall)
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self._samples[";".join(reversed(stack))] += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            spans = {name: {"count": s["count"], "wall_s": round(s["wall_s"], 4), "cpu_s": round(s["cpu_s"], 4),
+                            "mean_ms": round(1000 * s["wall_s"] / s["count"], 3) if s["count"] else 0.0,
+                            "max_s": round(s["max_s"], 4)}
+                     for name, s in self.spans.items()}
+        return {
+            "wall_clock_s": round(time.perf_counter() - self.started, 3),
+            "process_cpu_s": round(time.process_time() - self.started_cpu, 3),
+            "spans": spans,
+        }
+
+    def finish(self) -> Optional[Dict]:
+        """
+        Stop profiling, write <run>.profile.json (and the .prof or .collapsed.txt file) and print the spans.
+        """
+        if not self.enabled:
+            return None
+        self.enabled = False
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+        summary = self.summary()
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.run_name)
+        with open(base + ".profile.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        written = [base + ".profile.json"]
+        if self._cprofile:
+            self._cprofile.dump_stats(base + ".prof")
+            self._cprofile = None
+            written.append(base + ".prof")
+        if self.mode == "collapsed":
+            with open(base + ".collapsed.txt", "w", encoding="utf-8") as f:
+                for stack, count in self._samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            written.append(base + ".collapsed.txt")
+
+        wall = summary["wall_clock_s"]
+        print(f"\n🔬 Profile of {self.run_name}: {wall}s wall, {summary['process_cpu_s']}s CPU")
+        print(f"   {'span':<24} {'count':>7} {'wall s':>9} {'cpu s':>9} {'mean ms':>9} {'% wall':>7}")
+        for name, s in sorted(summary["spans"].items(), key=lambda item: -item[1]["wall_s"]):
+            share = s["wall_s"] / wall if wall else 0.0
+            print(f"   {name:<24} {s['count']:>7} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} {s['mean_ms']:>9.2f} {share:>7.1%}")
+        print(f"   Written: {', '.join(written)}")
+        return summary
+
+
+PROFILER = Profiler()
+
+
+def add_profile_arguments(parser):
+    """
+    Add --profile [MODE] and --profile-dir to an argparse parser.
+    """
+    parser.add_argument("--profile", nargs="?", const="spans", choices=PROFILE_MODES,
+                        help="Time download, conversion, parsing, classification, LLM and YAML spans; 'cprofile' "
+                             "also writes a .prof file, 'collapsed' a flamegraph stack file (default: $CSRA_PROFILE)")
+    parser.add_argument("--profile-dir", help="Folder for profile files (default: $CSRA_PROFILE_DIR or profiles)")
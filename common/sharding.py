@@ -0,0 +1,46 @@
+import hashlib
+import os
+import re
+
+from typing import Dict, List, Optional
+
+from common.journal import paper_key
+
+SHARD_FILE_RE = re.compile(r"\.shard-(\d+)-of-(\d+)(\.[^.]+)$")
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    """
+    Deterministic shard of a key. Uses SHA-1 rather than hash() so every node and run agrees.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def check_shard_args(shard_index: Optional[int], shard_count: Optional[int]):
+    if shard_count is None and shard_index is None:
+        return
+    if shard_count is None or shard_index is None:
+        raise ValueError("--shard-index and --shard-count must be given together")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {shard_index} of {shard_count}")
+
+
+def select_shard(papers: List[Dict], shard_index: Optional[int], shard_count: Optional[int]) -> List[Dict]:
+    """
+    Keep only the papers of one shard, partitioned by a stable hash of their id (or title without one).
+    """
+    check_shard_args(shard_index, shard_count)
+    if not shard_count:
+        return papers
+    return [p for p in papers if shard_of(paper_key(p), shard_count) == shard_index]
+
+
+def shard_path(path: str, shard_index: Optional[int], shard_count: Optional[int]) -> str:
+    """
+    Insert a ".shard-I-of-N" marker before the extension, e.g. papers.yaml -> papers.shard-0-of-4.yaml.
+    """
+    if not shard_count:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard_index}-of-{shard_count}{ext}"
@@ -0,0 +1,104 @@
+import hashlib
+import re
+
+import numpy as np
+
+from typing import Dict
+
+from common.metrics import METRICS
+
+TEXT_STATS_VERSION = 2
+
+# Documents longer than this are sampled in fixed-size windows instead of scanned in full
+SAMPLE_THRESHOLD = 1_000_000
+SAMPLE_WINDOWS = 64
+SAMPLE_WINDOW_CHARS = 8192
+
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s+\S", re.MULTILINE)
+_REFERENCES_RE = re.compile(
+    r"^\s*#{1,6}\s*(?:[\*\_]*\s*)?(?:references|bibliography)\b.*?$\n(.*?)(?=^\s*#{1,6}\s|\Z)",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL,
+)
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()[:16]
+
+
+def _sample(text: str) -> str:
+    if len(text) <= SAMPLE_THRESHOLD:
+        return text
+    starts = np.linspace(0, len(text) - SAMPLE_WINDOW_CHARS, SAMPLE_WINDOWS).astype(int)
+    return "".join(text[s:s + SAMPLE_WINDOW_CHARS] for s in starts)
+
+
+def compute_text_stats(text: str, references=None) -> Dict:
+    """
+    Compute cheap triage statistics for a document in a single vectorized pass over its code points.
+
+    Args:
+        text: Markdown text of the paper
+        references: Optional list of reference strings already extracted for the paper
+
+    Returns:
+        Dictionary with length, letter ratios, section count and reference count
+    """
+    sample = _sample(text)
+    # Lone surrogates from broken PDF extraction are valid str content but not encodable as-is
+    codepoints = np.frombuffer(sample.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+
+    lowered = codepoints | 0x20
+    ascii_letters = int(np.count_nonzero((lowered >= 0x61) & (lowered <= 0x7A)))
+
+    non_ascii = codepoints[codepoints >= 0x80]
+    # Only the distinct non-ASCII code points need a Unicode category lookup
+    values, counts = np.unique(non_ascii, return_counts=True)
+    non_ascii_letters = int(sum(int(n) for v, n in zip(values.tolist(), counts) if chr(v).isalpha()))
+
+    total = len(codepoints)
+    letters = ascii_letters + non_ascii_letters
+
+    if references is None:
+        match = _REFERENCES_RE.search(text)
+        reference_count = sum(1 for line in match.group(1).splitlines() if line.strip()) if match else 0
+    else:
+        reference_count = len(references)
+
+    return {
+        "version": TEXT_STATS_VERSION,
+        "chars": len(text),
+        "fingerprint": _fingerprint(text),
+        "sampled": len(sample) != len(text),
+        "letters": letters,
+        "ascii_letter_ratio": ascii_letters / letters if letters else 0.0,
+        "non_ascii_ratio": round(len(non_ascii) / total, 4) if total else 0.0,
+        "section_count": len(_HEADING_RE.findall(text)),
+        "reference_count": reference_count,
+    }
+
+
+def get_text_stats(paper: Dict) -> Dict:
+    """
+    Return the text statistics of a paper record, computing and caching them under "text_stats" if needed.
+
+    Cached statistics are reused as long as they were computed by the same version of this stage over a
+    document with the same length and content hash, so an edited document of unchanged length is recomputed.
+    """
+    document_text = paper.get("document", "") or ""
+    cached = paper.get("text_stats")
+    hit = (bool(cached) and cached.get("version") == TEXT_STATS_VERSION and cached.get("chars") == len(document_text)
+           and cached.get("fingerprint") == _fingerprint(document_text))
+    METRICS.cache_lookup("text_stats", hit)
+    if hit:
+        return cached
+
+    stats = compute_text_stats(document_text, paper.get("references"))
+    paper["text_stats"] = stats
+    return stats
+
+
+def is_english_stats(stats: Dict, threshold: float = 0.8) -> bool:
+    """
+    Treat a document as English if at least `threshold` of its letters are ASCII.
+    """
+    return stats["letters"] > 0 and stats["ascii_letter_ratio"] >= threshold
@@ -0,0 +1,48 @@
+import json
+
+from typing import Dict, List
+
+import litellm
+
+DEFAULT_TOKEN_MODEL = "gpt-4o"
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """
+    Count the tokens a model would see for a piece of text, without any network calls.
+
+    Args:
+        text: Text to count
+        model: Model whose tokenizer should be used
+
+    Returns:
+        Number of tokens, or a characters/4 estimate when no local tokenizer is available
+    """
+    if not text:
+        return 0
+    try:
+        return litellm.token_counter(model=model, text=text)
+    except Exception:
+        return max(1, len(text) // 4)
+
+
+def count_message_tokens(messages: List[Dict], model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """
+    Count the prompt tokens of chat messages, with plain-string or [{"type": "text", ...}] content.
+    """
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content)
+        # Role and separators of the chat format
+        total += MESSAGE_OVERHEAD_TOKENS + count_tokens(content, model)
+    return total
+
+
+def count_schema_tokens(schema, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """
+    Approximate prompt tokens a pydantic response_format adds, counted on its JSON schema.
+    """
+    return count_tokens(json.dumps(schema.model_json_schema()), model)
@@ -0,0 +1,31 @@
+import yaml
+
+from typing import Dict, Iterator, List
+
+
+def iter_papers(path: str, chunk: int = 256) -> Iterator[Dict]:
+    """
+    Paper records of a {"papers": [...]} YAML file, parsed a chunk of records at a time.
+
+    Files written by yaml.dump start every list item with "- " in the first column, so items can be split
+    off without parsing and a corpus with full documents never has to fit in memory. Other layouts are
+    loaded whole.
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if first.rstrip() != "papers:":
+            f.seek(0)
+            yield from (yaml.load(f, Loader=loader) or {}).get("papers") or []
+            return
+        lines: List[str] = []
+        items = 0
+        for line in f:
+            if line.startswith("- "):
+                if items == chunk:
+                    yield from yaml.load("".join(lines), Loader=loader)
+                    lines, items = [], 0
+                items += 1
+            lines.append(line)
+        if items:
+            yield from yaml.load("".join(lines), Loader=loader)
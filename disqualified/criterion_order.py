@@ -0,0 +1,81 @@
+import threading
+
+from collections import Counter
+
+# Beta prior on each criterion's disqualification rate and a token prior for criteria not yet seen
+PRIOR_DISQUALIFIED = 1.0
+PRIOR_QUALIFIED = 9.0
+PRIOR_TOKENS = 1500.0
+
+
+class AdaptiveCriterionOrder:
+    """
+    Orders disqualification criteria to minimize the expected LLM spend per paper under early exit.
+
+    With early exit a paper stops at its first confirmed disqualification, so checking criteria in
+    increasing order of expected_cost / disqualification_rate minimizes the expected cost. Both values are
+    running estimates over the papers checked so far in this run, smoothed by a prior.
+    """
+
+    def __init__(self, criteria):
+        self.criteria = list(criteria)
+        self._lock = threading.Lock()
+        self.checked = Counter()
+        self.disqualified = Counter()
+        self.tokens = Counter()
+        self.calls = Counter()
+        self.orderings = Counter()
+        self.calls_avoided = 0.0
+        self.tokens_saved = 0.0
+
+    def _expected_tokens(self, criterion):
+        if self.checked[criterion]:
+            return self.tokens[criterion] / self.checked[criterion]
+        return PRIOR_TOKENS
+
+    def _expected_calls(self, criterion):
+        if self.checked[criterion]:
+            return self.calls[criterion] / self.checked[criterion]
+        return 1.0
+
+    def _disqualify_rate(self, criterion):
+        return (self.disqualified[criterion] + PRIOR_DISQUALIFIED) / (
+            self.checked[criterion] + PRIOR_DISQUALIFIED + PRIOR_QUALIFIED)
+
+    def order(self):
+        """
+        Return the criteria in the order the next paper should check them.
+        """
+        with self._lock:
+            ordered = sorted(self.criteria, key=lambda c: (self._expected_tokens(c) / self._disqualify_rate(c),
+                                                          self.criteria.index(c)))
+            self.orderings[tuple(ordered)] += 1
+        return ordered
+
+    def record(self, criterion, disqualified, tokens, calls):
+        with self._lock:
+            self.checked[criterion] += 1
+            self.disqualified[criterion] += int(disqualified)
+            self.tokens[criterion] += tokens
+            self.calls[criterion] += calls
+
+    def record_skipped(self, skipped):
+        """
+        Account for criteria that early exit did not have to check, at their current expected cost.
+        """
+        with self._lock:
+            for criterion in skipped:
+                self.calls_avoided += self._expected_calls(criterion)
+                self.tokens_saved += self._expected_tokens(criterion)
+
+    def report(self):
+        print("\n🧮 Criterion ordering (early exit)")
+        with self._lock:
+            for criterion in self.criteria:
+                n = self.checked[criterion]
+                rate = self.disqualified[criterion] / n if n else 0.0
+                print(f"   {criterion}: checked {n}, disqualify rate {rate:.1%}, "
+                      f"avg tokens {self._expected_tokens(criterion):.0f}")
+            for ordering, count in self.orderings.most_common(3):
+                print(f"   order used for {count} papers: {' → '.join(ordering)}")
+            print(f"   ≈ {self.calls_avoided:.0f} LLM calls avoided, ≈ {self.tokens_saved:.0f} tokens saved")
@@ -1,12 +1,35 @@
 import yaml
-import litellm
 import os
 import re
 import argparse
-import time
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if __name__ == "__main__" and "--plan" in sys.argv:
+    # litellm downloads its cost map on import unless this is set, and --plan makes no network calls
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+from criterion_order import AdaptiveCriterionOrder
+from common.cascade import CASCADE, cascade_completion, response_content, verdict_confidence
+from common.dedup import deduplicate
+from common.journal import Journal, completed_path, journal_conflict, paper_key, read_journal
+from common.llm_config import FILTER_LLM, add_llm_arguments
+from common.metrics import METRICS
+from common.planner import History, Plan, add_plan_arguments
+from common.sharding import select_shard, shard_of, shard_path
+from common.profiling import PROFILER, add_profile_arguments
+from common.passage_selection import criterion_for_prompt, select_passages
+from common.text_stats import compute_text_stats, get_text_stats, is_english_stats
+from common.tokens import count_message_tokens
+from common.yaml_stream import iter_papers
+
+DEFAULT_FULL_TEXT_BUDGET = 8000
+# Share of abstract checks that fall back to the full text, until metrics history has both stages
+DEFAULT_FALLBACK_RATE = 0.3
+# Share of papers one criterion disqualifies, for criteria without journaled verdicts (--plan with early exit)
+DEFAULT_DISQUALIFY_RATE = 0.1
 
 # === Load disqualification prompts from YAML ===
-with open("merge_prompts.yaml", "r", encoding="utf-8") as f:
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "merge_prompts.yaml"), "r", encoding="utf-8") as f:
     full_prompts = yaml.safe_load(f)
 
 prompts = full_prompts
@@ -58,13 +81,25 @@ def extract_introduction(document_text, abstract_text=""):
 
     return ""
 
-def is_disqualified(paper, prompt_text, prompt_key=None, use_full_text=False):
+def build_prompt(paper, prompt_text, prompt_key=None, use_full_text=False, token_budget=DEFAULT_FULL_TEXT_BUDGET):
+    """
+    The prompt sent for one criterion, and the passage selection of a full-text prompt (None otherwise).
+    The prompt is None when the paper has neither an abstract nor an introduction.
+    """
     abstract_text = paper.get("abstract", "").strip()
     document_text = paper.get("document", "")
 
+    selection = None
     if use_full_text:
         markdown_text = document_text
         scope_desc = "Full paper"
+        criterion = criterion_for_prompt(prompt_key)
+        if token_budget and criterion:
+            with PROFILER.span("passage_selection"):
+                selection = select_passages(document_text, criterion, token_budget)
+            markdown_text = selection["text"]
+            if selection["chunks"] is not None:
+                scope_desc = "Selected passages of the full paper"
     else:
         if not abstract_text:
             abstract_match = re.search(r"(?i)^#{1,3}\s*abstract\s*\n+(.*?)(?=^#{1,3}\s|\Z)", document_text, flags=re.DOTALL | re.MULTILINE)
@@ -75,7 +110,8 @@ def is_disqualified(paper, prompt_text, prompt_key=None, use_full_text=False):
                 if fallback_match:
                     abstract_text = fallback_match.group(1).strip()
 
-        intro_text = extract_introduction(document_text, abstract_text)
+        with PROFILER.span("section_parsing"):
+            intro_text = extract_introduction(document_text, abstract_text)
 
         markdown_text = ""
         if abstract_text:
@@ -84,7 +120,7 @@ def is_disqualified(paper, prompt_text, prompt_key=None, use_full_text=False):
             markdown_text += f"## Introduction\n{intro_text}"
 
         if not markdown_text:
-            return "Disqualified: No abstract or introduction found."
+            return None, None
 
         scope_desc = "Abstract + Introduction"
 
@@ -98,104 +134,221 @@ Answer using one of:
 - Qualified. Reason: <brief explanation>
 - Disqualified: <reason>. Reason: <brief explanation>
 """
-    start_time = time.time()
-    response = litellm.completion(
-        model="gpt-4o",
+    return prompt, selection
+
+def is_disqualified(paper, prompt_text, prompt_key=None, use_full_text=False, token_budget=DEFAULT_FULL_TEXT_BUDGET,
+                    previous=None):
+    prompt, selection = build_prompt(paper, prompt_text, prompt_key, use_full_text, token_budget)
+    if selection:
+        paper.setdefault("full_text_tokens_before", 0)
+        paper["full_text_tokens_before"] += selection["tokens_before"]
+        paper.setdefault("full_text_tokens_after", 0)
+        paper["full_text_tokens_after"] += selection["tokens_after"]
+    if prompt is None:
+        return "Disqualified: No abstract or introduction found."
+
+    disagrees = None
+    if previous is not None:
+        # A cheap model overturning the abstract-level verdict on the full text gets a second opinion
+        disagrees = lambda r: is_qualified_decision(verdict_text(r)) != is_qualified_decision(previous)
+    response, elapsed, tokens_used = cascade_completion(
+        FILTER_LLM,
+        "disqualify_full" if use_full_text else "disqualify_short",
+        verdict_confidence,
+        disagrees,
+        {"logprobs": True},
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
-        max_tokens=200
+        max_tokens=200,
     )
-    elapsed = time.time() - start_time
-    tokens_used = response.get("usage", {}).get("total_tokens", 0)
 
     paper.setdefault("token_usage", 0)
-    paper["token_usage"] += tokens_used if isinstance(tokens_used, int) else 0
+    paper["token_usage"] += tokens_used
 
     paper.setdefault("time_usage", 0.0)
     paper["time_usage"] += elapsed
 
-    return response["choices"][0]["message"]["content"].strip().strip('"').strip("'")
+    return verdict_text(response)
+
+def verdict_text(response):
+    return response_content(response).strip().strip('"').strip("'")
 
 # === Detect is EN ===
 def is_english(text):
-    ascii_letters = sum(c.isascii() and c.isalpha() for c in text)
-    total_letters = sum(c.isalpha() for c in text)
+    # If more than 80% of letters are ASCII, treat as English
+    return is_english_stats(compute_text_stats(text))
 
-    if total_letters == 0:
-        return False
+def has_verdict(decision):
+    return bool(decision) and not decision.startswith("ERROR:")
 
-    ratio = ascii_letters / total_letters
+def is_qualified_decision(decision):
+    return decision.lower().lstrip("-•: ").strip().startswith("qualified")
 
-    # If more than 80% of letters are ASCII, treat as English
-    return ratio >= 0.8
+def is_disqualified_decision(decision):
+    return has_verdict(decision) and not is_qualified_decision(decision)
 
-def run_all_checks(papers):
-    for paper in papers:
-        if "decisions" not in paper:
-            paper["decisions"] = {}
+def check_paper(paper, full_text_budget=DEFAULT_FULL_TEXT_BUDGET, criterion_order=None):
+    """
+    Run the language check and every undecided criterion on one paper.
+
+    When criterion_order is given, criteria are checked in its adaptive order and the paper stops at
+    its first confirmed disqualification (early exit).
+    """
+    decisions = paper.setdefault("decisions", {})
+
+    with PROFILER.span("text_stats"):
+        english = is_english_stats(get_text_stats(paper))
+    if not english:
+        decisions["language"] = "Disqualified: Not English. Reason: Paper is not primarily written in English."
+        print(f"[LANGUAGE] {paper['title']} → Disqualified (not English)")
+        return paper
+    else:
+        decisions["language"] = "- Qualified. Reason: English Paper"
+
+    prompt_keys = dict(key for key, _ in PROMPT_ORDER)
+    ordered = criterion_order.order() if criterion_order else list(prompt_keys)
+
+    for i, short_key in enumerate(ordered):
+        if criterion_order and any(is_disqualified_decision(decisions.get(k, "")) for k in prompt_keys):
+            skipped = [k for k in ordered[i:] if not has_verdict(decisions.get(k))]
+            criterion_order.record_skipped(skipped)
+            print(f"[EARLY EXIT] {paper['title']} → skipped {', '.join(skipped)}")
+            break
 
-        document_text = paper.get("document", "")
-        if not is_english(document_text):
-            paper["decisions"]["language"] = "Disqualified: Not English. Reason: Paper is not primarily written in English."
-            print(f"[LANGUAGE] {paper['title']} → Disqualified (not English)")
+        # Criteria decided by an earlier run are kept, only errors are retried
+        if has_verdict(decisions.get(short_key)):
             continue
-        else:
-            paper["decisions"]["language"] = "- Qualified. Reason: English Paper"
-
-        for (short_key, full_key), _ in PROMPT_ORDER:
-            short_prompt = prompts[short_key]
-            full_prompt = prompts[full_key]
-
-            try:
-                result = is_disqualified(paper, short_prompt, short_key, use_full_text=False)
-                print(f"[CHECK] {paper['title']} → {short_key}: {result}")
-                normalized = result.lower().lstrip("-: ").strip()
-                if not normalized.startswith("qualified"):
-                    result = is_disqualified(paper, full_prompt, full_key, use_full_text=True)
-                    print(f"[FALLBACK] {paper['title']} → {full_key}: {result}")
-                paper["decisions"][short_key] = result
-            except Exception as e:
-                error_msg = f"ERROR: {str(e)}"
-                print(f"[ERROR] {paper['title']} → {short_key}: {error_msg}")
-                paper["decisions"][short_key] = error_msg
+
+        full_key = prompt_keys[short_key]
+        short_prompt = prompts[short_key]
+        full_prompt = prompts[full_key]
+        tokens_before = paper.get("token_usage", 0)
+        calls = 1
+
+        try:
+            result = is_disqualified(paper, short_prompt, short_key, use_full_text=False)
+            print(f"[CHECK] {paper['title']} → {short_key}: {result}")
+            normalized = result.lower().lstrip("-: ").strip()
+            if not normalized.startswith("qualified"):
+                calls += 1
+                result = is_disqualified(paper, full_prompt, full_key, use_full_text=True, token_budget=full_text_budget,
+                                         previous=result)
+                print(f"[FALLBACK] {paper['title']} → {full_key}: {result}")
+            decisions[short_key] = result
+            if criterion_order:
+                criterion_order.record(short_key, is_disqualified_decision(result),
+                                       paper.get("token_usage", 0) - tokens_before, calls)
+        except Exception as e:
+            error_msg = f"ERROR: {str(e)}"
+            print(f"[ERROR] {paper['title']} → {short_key}: {error_msg}")
+            METRICS.inc("errors_total", stage="disqualify", criterion=short_key)
+            decisions[short_key] = error_msg
+
+    return paper
+
+def journal_record(paper):
+    return {
+        "key": paper_key(paper),
+        "id": paper.get("id", ""),
+        "title": paper.get("title", ""),
+        "decisions": paper.get("decisions", {}),
+        "token_usage": paper.get("token_usage", 0),
+        "time_usage": paper.get("time_usage", 0.0),
+        "full_text_tokens_before": paper.get("full_text_tokens_before", 0),
+        "full_text_tokens_after": paper.get("full_text_tokens_after", 0),
+        "text_stats": paper.get("text_stats", {}),
+    }
+
+def restore_from_journal(papers, records):
+    restored = 0
+    for paper in papers:
+        record = records.get(paper_key(paper))
+        if not record:
+            continue
+        paper.setdefault("decisions", {}).update(record.get("decisions", {}))
+        for field in ("token_usage", "time_usage", "full_text_tokens_before", "full_text_tokens_after", "text_stats"):
+            if field in record:
+                paper[field] = record[field]
+        restored += 1
+    return restored
+
+def is_complete(paper, early_exit=False):
+    decisions = paper.get("decisions", {})
+    if decisions.get("language", "").startswith("Disqualified"):
+        return True
+    if early_exit and any(is_disqualified_decision(decisions.get(short_key, "")) for (short_key, _), _ in PROMPT_ORDER):
+        return True
+    return all(has_verdict(decisions.get(short_key)) for (short_key, _), _ in PROMPT_ORDER)
+
+def run_all_checks(papers, full_text_budget=DEFAULT_FULL_TEXT_BUDGET, journal=None, criterion_order=None):
+    for paper in papers:
+        if is_complete(paper, early_exit=criterion_order is not None):
+            continue
+        check_paper(paper, full_text_budget, criterion_order)
+        if journal:
+            journal.append(journal_record(paper))
 
     return papers
 
 def is_fully_qualified(paper):
     for (short_key, _), _ in PROMPT_ORDER:
         decision = paper.get("decisions", {}).get(short_key, "")
-        cleaned = decision.lower().lstrip("-• ").strip()
-        if not cleaned.startswith("qualified"):
+        if not is_qualified_decision(decision):
             return False
     return True
 
-def main(input_yaml):
-    qualified_output_yaml = "qualified_papers.yaml"
-    disqualified_output_yaml = "disqualified_papers.yaml"
-
-    with open(input_yaml, "r", encoding="utf-8") as f:
+def minimal_record(p):
+    return {
+        "title": p.get("title", ""),
+        "id": p.get("id", ""),
+        "decisions": p.get("decisions", {}),
+        "token_usage": p.get("token_usage", 0),
+        "time_usage": round(p.get("time_usage", 0.0), 2),
+        "text_stats": p.get("text_stats", {}),
+        **({"aliases": p["aliases"]} if p.get("aliases") else {})
+    }
+
+def main(input_yaml, full_text_budget=DEFAULT_FULL_TEXT_BUDGET, metrics_dir=None, journal_path=None, resume=False,
+         early_exit=False, shard_index=None, shard_count=None, model=None, api_base=None, llm_retries=None, dedup=False,
+         cascade_model=None, cascade_threshold=None, fresh=False):
+    METRICS.configure(metrics_dir, shard_path("merge_filter", shard_index, shard_count))
+    FILTER_LLM.configure(model, api_base, llm_retries, cascade_model, cascade_threshold)
+    print(f"🤖 Model: {FILTER_LLM.describe()}")
+    qualified_output_yaml = shard_path("qualified_papers.yaml", shard_index, shard_count)
+    disqualified_output_yaml = shard_path("disqualified_papers.yaml", shard_index, shard_count)
+    journal_path = shard_path(journal_path or "merge_filter_journal.jsonl", shard_index, shard_count)
+
+    with open(input_yaml, "r", encoding="utf-8") as f, PROFILER.span("yaml_load"):
         data = yaml.safe_load(f)
 
-    papers = data["papers"]
-    papers = run_all_checks(papers)
+    if dedup:
+        # Runs on the whole input so every shard agrees on the canonical records
+        data["papers"], _ = deduplicate(data["papers"])
+
+    papers = select_shard(data["papers"], shard_index, shard_count)
+    if shard_count:
+        print(f"🧩 Shard {shard_index} of {shard_count}: {len(papers)} of {len(data['papers'])} papers")
+
+    journal = Journal(journal_path, resume=resume, fresh=fresh)
+    if resume:
+        restored = restore_from_journal(papers, journal.load())
+        remaining = sum(not is_complete(p, early_exit) for p in papers)
+        print(f"🔁 Resuming from {journal_path}: {restored} papers restored, {remaining} left to check")
+
+    criterion_order = AdaptiveCriterionOrder(short_key for (short_key, _), _ in PROMPT_ORDER) if early_exit else None
+    try:
+        papers = run_all_checks(papers, full_text_budget, journal, criterion_order)
+    finally:
+        journal.close()
 
     qualified = [p for p in papers if is_fully_qualified(p)]
     disqualified = [p for p in papers if not is_fully_qualified(p)]
 
-    def minimal(p):
-        return {
-            "title": p.get("title", ""),
-            "id": p.get("id", ""),
-            "decisions": p.get("decisions", {}),
-            "token_usage": p.get("token_usage", 0),
-            "time_usage": round(p.get("time_usage", 0.0), 2)
-        }
-
-    with open(qualified_output_yaml, "w", encoding="utf-8") as f:
-        yaml.dump({"papers": [minimal(p) for p in qualified]}, f, allow_unicode=True, sort_keys=False)
+    with open(qualified_output_yaml, "w", encoding="utf-8") as f, PROFILER.span("yaml_dump"):
+        yaml.dump({"papers": [minimal_record(p) for p in qualified]}, f, allow_unicode=True, sort_keys=False)
 
-    with open(disqualified_output_yaml, "w", encoding="utf-8") as f:
-        yaml.dump({"papers": [minimal(p) for p in disqualified]}, f, allow_unicode=True, sort_keys=False)
+    with open(disqualified_output_yaml, "w", encoding="utf-8") as f, PROFILER.span("yaml_dump"):
+        yaml.dump({"papers": [minimal_record(p) for p in disqualified]}, f, allow_unicode=True, sort_keys=False)
 
     print(f"\n🎉 Qualified papers saved to {qualified_output_yaml}")
     print(f"❌ Disqualified papers (with reasons) saved to {disqualified_output_yaml}")
@@ -208,13 +361,140 @@ def main(input_yaml):
     if time_vals:
         print(f"⏱  Avg Total Time per Paper: {sum(time_vals) / len(time_vals):.2f}s")
 
+    before = sum(p.get("full_text_tokens_before", 0) for p in papers)
+    after = sum(p.get("full_text_tokens_after", 0) for p in papers)
+    if before:
+        print(f"✂  Full-text fallback tokens: {before} before passage selection → {after} sent ({100 * (1 - after / before):.1f}% saved)")
+
+    if criterion_order:
+        criterion_order.report()
+    CASCADE.report()
+
     for _, filename in PROMPT_ORDER:
         if os.path.exists(filename):
             os.remove(filename)
             print(f"🗑 Deleted: {filename}")
 
+    # Only a run with every verdict in moves its journal aside; otherwise --resume still has work to do
+    if all(is_complete(p, early_exit) for p in papers):
+        print(f"🗂  Journal moved to {journal.complete()}")
+    else:
+        print(f"🔁 Some checks failed; rerun with --resume to retry them from {journal_path}")
+
+    METRICS.finish()
+
+def disqualification_rates(records):
+    """
+    Share of journaled verdicts of each criterion that disqualified the paper.
+    """
+    rates = {}
+    for (short_key, _), _ in PROMPT_ORDER:
+        verdicts = [r["decisions"][short_key] for r in records.values() if has_verdict(r.get("decisions", {}).get(short_key))]
+        if verdicts:
+            rates[short_key] = sum(not is_qualified_decision(v) for v in verdicts) / len(verdicts)
+    return rates
+
+def plan_paper(plan, paper, full_text_budget=DEFAULT_FULL_TEXT_BUDGET, fallback_rate=DEFAULT_FALLBACK_RATE,
+               disqualify_rates=None):
+    """
+    Add the prompts check_paper would send for one paper to a plan, without calling the LLM.
+
+    With disqualify_rates (early exit), each later criterion only counts with the probability that no
+    earlier one disqualified the paper.
+    """
+    decisions = paper.get("decisions", {})
+    if not is_english_stats(get_text_stats(paper)):
+        plan.skip("not English")
+        return
+    tokens = lambda prompt: count_message_tokens([{"role": "user", "content": prompt}], FILTER_LLM.model)
+    reached = 1.0
+    for (short_key, full_key), _ in PROMPT_ORDER:
+        if has_verdict(decisions.get(short_key)):
+            continue
+        short_prompt, _ = build_prompt(paper, prompts[short_key], short_key)
+        full_prompt, _ = build_prompt(paper, prompts[full_key], full_key, use_full_text=True,
+                                      token_budget=full_text_budget)
+        if short_prompt is None:
+            # No abstract or introduction is an immediate disqualification, confirmed on the full text
+            plan.add(FILTER_LLM, "disqualify_full", tokens(full_prompt), reached)
+        else:
+            plan.add(FILTER_LLM, "disqualify_short", tokens(short_prompt), reached)
+            plan.add(FILTER_LLM, "disqualify_full", tokens(full_prompt), reached * fallback_rate)
+        if disqualify_rates is not None:
+            reached *= 1 - disqualify_rates.get(short_key, DEFAULT_DISQUALIFY_RATE)
+
+def plan_run(input_yaml, full_text_budget=DEFAULT_FULL_TEXT_BUDGET, metrics_dir=None, journal_path=None, resume=False,
+             early_exit=False, shard_index=None, shard_count=None, model=None, dedup=False, cascade_model=None,
+             cascade_threshold=None, concurrency=1, requests_per_minute=None, tokens_per_minute=None):
+    """
+    Dry run of main(): stream the input, build every prompt, count its tokens locally and print the projected
+    calls, tokens, cost and wall clock. Fallback, escalation and latency rates come from earlier runs' metrics
+    in metrics_dir, early-exit rates from the journal; nothing is sent to the LLM.
+    """
+    FILTER_LLM.configure(model, None, None, cascade_model, cascade_threshold)
+    print(f"🤖 Model: {FILTER_LLM.describe()}")
+    history = History(metrics_dir)
+    fallback_rate = history.ratio("disqualify_full", "disqualify_short", DEFAULT_FALLBACK_RATE)
+    journal_path = shard_path(journal_path or "merge_filter_journal.jsonl", shard_index, shard_count)
+    records = read_journal(journal_path)
+    # Early-exit rates fall back to the journal of the last completed run
+    disqualify_rates = disqualification_rates(records or read_journal(completed_path(journal_path))) if early_exit else None
+
+    if dedup:
+        papers, _ = deduplicate(list(iter_papers(input_yaml)))
+    else:
+        papers = iter_papers(input_yaml)
+
+    plan = Plan(history)
+    for paper in papers:
+        if shard_count and shard_of(paper_key(paper), shard_count) != shard_index:
+            continue
+        plan.papers += 1
+        if resume:
+            restore_from_journal([paper], records)
+            if is_complete(paper, early_exit):
+                plan.skip("already in the journal")
+                continue
+        plan_paper(plan, paper, full_text_budget, fallback_rate, disqualify_rates)
+
+    print(f"↪ Full-text fallback rate {fallback_rate:.1%}" + (" (default)" if not history.requests("disqualify_short") else ""))
+    return plan.report(concurrency, requests_per_minute, tokens_per_minute)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Filter papers by qualification status.")
     parser.add_argument("input_yaml", help="YAML file containing papers to filter")
+    parser.add_argument("--full-text-budget", type=int, default=DEFAULT_FULL_TEXT_BUDGET,
+                        help=f"Token budget for passages sent on full-text fallback, 0 sends the whole paper (default: {DEFAULT_FULL_TEXT_BUDGET})")
+    parser.add_argument("--metrics-dir", help="Directory for JSONL and Prometheus metrics (default: $CSRA_METRICS_DIR)")
+    parser.add_argument("--journal", default="merge_filter_journal.jsonl",
+                        help="Append-only per-paper decision journal (default: merge_filter_journal.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse decisions from the journal and only check missing or ERROR criteria")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard a non-empty journal and start over (without --resume or --fresh it is an error)")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="Stop checking a paper at its first confirmed disqualification, ordering criteria adaptively by cost")
+    parser.add_argument("--shard-index", type=int, help="Index of the shard of papers to check on this node (0-based)")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards; merge outputs with common/merge_shards.py")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Collapse near-duplicate papers (common/dedup.py) before checking, so each is checked once")
+    add_llm_arguments(parser, FILTER_LLM)
+    add_plan_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
-    main(args.input_yaml)
+    conflict = None if args.plan else journal_conflict(shard_path(args.journal, args.shard_index, args.shard_count),
+                                                       args.resume, args.fresh)
+    if conflict:
+        parser.error(conflict)
+    if args.plan:
+        plan_run(args.input_yaml, args.full_text_budget, args.metrics_dir, args.journal, args.resume, args.early_exit,
+                 args.shard_index, args.shard_count, args.model, args.dedup, args.cascade_model,
+                 args.cascade_threshold, args.plan_concurrency, args.plan_rpm, args.plan_tpm)
+        sys.exit(0)
+    PROFILER.configure(args.profile, "merge_filter", args.profile_dir)
+    try:
+        main(args.input_yaml, args.full_text_budget, args.metrics_dir, args.journal, args.resume, args.early_exit,
+             args.shard_index, args.shard_count, args.model, args.api_base, args.llm_retries, args.dedup,
+             args.cascade_model, args.cascade_threshold, args.fresh)
+    finally:
+        PROFILER.finish()
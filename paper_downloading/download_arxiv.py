@@ -5,11 +5,11 @@ import os
 import argparse
 import yaml
 import re
+import sys
 
-# Comment these out if you don't need markdown conversion
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS
+from common.profiling import PROFILER, add_profile_arguments
 
 
 # Query for CS papers from 2024
@@ -40,7 +40,8 @@ def download_arxiv_pdf(limit, output_dir, start_date, end_date, category):
             break
 
         url = f"{BASE_URL}{query}&start={start}&max_results={min(max_results, limit - start)}"
-        response = requests.get(url)
+        with METRICS.timer("arxiv_query"), PROFILER.span("arxiv_query"):
+            response = requests.get(url)
         feed = feedparser.parse(response.text)
 
         if not feed.entries:
@@ -54,7 +55,9 @@ def download_arxiv_pdf(limit, output_dir, start_date, end_date, category):
             print(pdf_url)
             if not os.path.exists(pdf_filepath):
                 #print(f"Downloading {pdf_filepath}")
-                pdf = requests.get(pdf_url + ".pdf")
+                with METRICS.timer("pdf_download"), PROFILER.span("download"):
+                    pdf = requests.get(pdf_url + ".pdf")
+                METRICS.inc("bytes_downloaded_total", len(pdf.content), stage="pdf_download")
 
                 if pdf.status_code == 404:
                     print(f"{paper_id}: Paper does not have a PDF; Skipping")
@@ -86,6 +89,11 @@ def download_arxiv_md(limit, output_dir, start_date, end_date, category):
     start = 0
     max_results = min(100, limit)
 
+    # Imported here so the PDF-only download and the text utilities work without marker installed
+    from marker.converters.pdf import PdfConverter
+    from marker.models import create_model_dict
+    from marker.output import text_from_rendered
+
     converter = PdfConverter(
         artifact_dict=create_model_dict(),
     )
@@ -96,7 +104,8 @@ def download_arxiv_md(limit, output_dir, start_date, end_date, category):
             break
 
         url = f"{BASE_URL}{query}&start={start}&max_results={min(max_results, limit - start)}"
-        response = requests.get(url)
+        with METRICS.timer("arxiv_query"), PROFILER.span("arxiv_query"):
+            response = requests.get(url)
         feed = feedparser.parse(response.text)
 
         if not feed.entries:
@@ -111,7 +120,9 @@ def download_arxiv_md(limit, output_dir, start_date, end_date, category):
             
             if not os.path.exists(pdf_filepath):
                 print(f"Downloading {pdf_filepath}")
-                pdf = requests.get(pdf_url + ".pdf")
+                with METRICS.timer("pdf_download"), PROFILER.span("download"):
+                    pdf = requests.get(pdf_url + ".pdf")
+                METRICS.inc("bytes_downloaded_total", len(pdf.content), stage="pdf_download")
 
                 if pdf.status_code == 404:
                     print(f"{paper_id}: Paper does not have a PDF; Skipping")
@@ -122,8 +133,10 @@ def download_arxiv_md(limit, output_dir, start_date, end_date, category):
 
                 print(f"Converting {pdf_filepath} to {md_filepath}")
                 with open(md_filepath, 'w', encoding="utf-8") as m:
-                    rendered = converter(pdf_filepath)
-                    text, _, _ = text_from_rendered(rendered)
+                    with METRICS.timer("conversion"), PROFILER.span("conversion"):
+                        rendered = converter(pdf_filepath)
+                        text, _, _ = text_from_rendered(rendered)
+                    METRICS.inc("bytes_converted_total", len(text.encode("utf-8")), stage="conversion")
                     m.write(text)
 
                 # Delete pdf after conversion
@@ -189,6 +202,11 @@ def generate_yaml(limit, output_dir, start_date, end_date, category):
     start = 0
     max_results = min(100, limit)
 
+    # Imported here so the PDF-only download and the text utilities work without marker installed
+    from marker.converters.pdf import PdfConverter
+    from marker.models import create_model_dict
+    from marker.output import text_from_rendered
+
     converter = PdfConverter(
         artifact_dict=create_model_dict(),
     )
@@ -200,7 +218,8 @@ def generate_yaml(limit, output_dir, start_date, end_date, category):
             break
 
         url = f"{BASE_URL}{query}&start={start}&max_results={min(max_results, limit - start)}"
-        response = requests.get(url)
+        with METRICS.timer("arxiv_query"), PROFILER.span("arxiv_query"):
+            response = requests.get(url)
         feed = feedparser.parse(response.text)
 
         if not feed.entries:
@@ -215,7 +234,9 @@ def generate_yaml(limit, output_dir, start_date, end_date, category):
             
             if not os.path.exists(pdf_filepath):
                 print(f"Downloading {pdf_filepath}")
-                pdf = requests.get(pdf_url + ".pdf")
+                with METRICS.timer("pdf_download"), PROFILER.span("download"):
+                    pdf = requests.get(pdf_url + ".pdf")
+                METRICS.inc("bytes_downloaded_total", len(pdf.content), stage="pdf_download")
                 
                 if pdf.status_code == 404:
                     print(f"{paper_id}: Paper does not have a PDF; Skipping")
@@ -225,10 +246,13 @@ def generate_yaml(limit, output_dir, start_date, end_date, category):
                     p.write(pdf.content)
 
                 print(f"Converting {pdf_filepath} to {md_filepath}")
-                rendered = converter(pdf_filepath)
-                text, _, _ = text_from_rendered(rendered)
-                keywords = extract_metadata({}, text)
-                document = trim_document(text)
+                with METRICS.timer("conversion"), PROFILER.span("conversion"):
+                    rendered = converter(pdf_filepath)
+                    text, _, _ = text_from_rendered(rendered)
+                METRICS.inc("bytes_converted_total", len(text.encode("utf-8")), stage="conversion")
+                with PROFILER.span("section_parsing"):
+                    keywords = extract_metadata({}, text)
+                    document = trim_document(text)
                 papers.append({
                     "title": entry.title,
                     "abstract": entry.summary,
@@ -246,7 +270,7 @@ def generate_yaml(limit, output_dir, start_date, end_date, category):
         time.sleep(3)
 
     output = {"papers": papers}
-    with open(f"{output_dir}/papers.yaml", "w", encoding="utf-8") as f:
+    with open(f"{output_dir}/papers.yaml", "w", encoding="utf-8") as f, PROFILER.span("yaml_dump"):
         yaml.dump(output, f, allow_unicode=True, sort_keys=False)
 
     try:
@@ -282,12 +306,24 @@ if __name__ == "__main__":
         "--category", "-c", type=str, default="*",
         help="arXiv CS category ID (example: AR) (default: *)"
     )
+    parser.add_argument(
+        "--metrics-dir", type=str, default=None,
+        help="Directory for JSONL and Prometheus metrics (default: $CSRA_METRICS_DIR)"
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    METRICS.configure(args.metrics_dir, "download_arxiv")
+    PROFILER.configure(args.profile, "download_arxiv", args.profile_dir)
 
-    if args.format == "pdf":
-        download_arxiv_pdf(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
-    elif args.format == "md":
-        download_arxiv_md(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
-    else:
-        generate_yaml(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
\ No newline at end of file
+    try:
+        if args.format == "pdf":
+            download_arxiv_pdf(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
+        elif args.format == "md":
+            download_arxiv_md(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
+        else:
+            generate_yaml(args.limit, args.output_dir, args.start_date, args.end_date, args.category)
+
+        METRICS.finish()
+    finally:
+        PROFILER.finish()
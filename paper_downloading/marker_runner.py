@@ -1,17 +1,18 @@
 # Usage: keep all link that you want the pdf link in pdf_link.txt, then python or python3 the marker_runner.py
 import os
 import re
+import sys
 import yaml
 import urllib.request
 from collections import OrderedDict
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
-from marker.config.parser import ConfigParser
 import requests
 import feedparser
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS
+from common.profiling import PROFILER, add_profile_arguments
+
 
 # === Configuration ===
 pdf_link_file = "pdf_link.txt"
@@ -19,15 +20,33 @@ output_yaml = "papers.yaml"
 
 
 # === Marker configuration ===
+# Built on first use, so the text utilities below can be imported without loading the marker models
 config = {"output_format": "markdown"}
-config_parser = ConfigParser(config)
-converter = PdfConverter(
-    config=config_parser.generate_config_dict(),
-    artifact_dict=create_model_dict(),
-    processor_list=config_parser.get_processors(),
-    renderer=config_parser.get_renderer(),
-    llm_service=config_parser.get_llm_service()
-)
+_converter = None
+
+def get_converter():
+    global _converter
+    if _converter is None:
+        from marker.converters.pdf import PdfConverter
+        from marker.models import create_model_dict
+        from marker.config.parser import ConfigParser
+
+        config_parser = ConfigParser(config)
+        _converter = PdfConverter(
+            config=config_parser.generate_config_dict(),
+            artifact_dict=create_model_dict(),
+            processor_list=config_parser.get_processors(),
+            renderer=config_parser.get_renderer(),
+            llm_service=config_parser.get_llm_service()
+        )
+    return _converter
+
+def convert_pdf(pdf_path):
+    from marker.output import text_from_rendered
+
+    rendered = get_converter()(pdf_path)
+    markdown_text, _, _ = text_from_rendered(rendered)
+    return markdown_text
 
 # === Utility functions ===
 def extract_id_from_url(url):
@@ -43,7 +62,9 @@ def download_pdf(url, save_dir):
     local_path = os.path.join(save_dir, f"{paper_id}.pdf")
     if not os.path.exists(local_path):
         print(f"  [↓] Downloading {url} ...")
-        urllib.request.urlretrieve(url, local_path)
+        with METRICS.timer("pdf_download"), PROFILER.span("download"):
+            urllib.request.urlretrieve(url, local_path)
+        METRICS.inc("bytes_downloaded_total", os.path.getsize(local_path), stage="pdf_download")
     return local_path
 
 def split_sections(markdown_text):
@@ -146,7 +167,76 @@ def normalize(text):
 def make_unique_id(title, authors):
     return f"{normalize(title)}_{normalize(authors)}"
 
-def main(input_path, output_yaml):
+def fetch_arxiv_metadata(pdf_urls):
+    """
+    Title, abstract and abs-page url of each arXiv PDF link, keyed by unversioned arXiv id.
+    """
+    paper_ids = [pid.split('v')[0] for pid in map(extract_id_from_url, pdf_urls) if pid]
+    id_to_metadata = {}
+    # The export API returns at most max_results entries per query
+    for start in range(0, len(paper_ids), 100):
+        id_query = "+OR+".join([f"id:{pid}" for pid in paper_ids[start:start + 100]])
+        with METRICS.timer("arxiv_query"), PROFILER.span("arxiv_query"):
+            feed = feedparser.parse(requests.get(
+                f"http://export.arxiv.org/api/query?search_query={id_query}&start=0&max_results=100"
+            ).text)
+
+        for entry in feed.entries:
+            paper_id = entry.id.split('/')[-1]
+            paper_id_base = paper_id.split('v')[0]
+            id_to_metadata[paper_id_base] = {
+                "title": entry.title.strip(),
+                "abstract": entry.summary.strip(),
+                "url": entry.id
+            }
+    return id_to_metadata
+
+def build_paper(markdown_text, paper_id, metadata=None):
+    """
+    Paper record of a converted PDF.
+
+    Args:
+        markdown_text: marker output
+        paper_id: arXiv id or file name, the title of last resort
+        metadata: arXiv API metadata for downloaded links ({} when the API had none), None for local PDFs
+                  whose title and abstract are taken from the text
+    """
+    sections = split_sections(markdown_text)
+    if metadata is None:
+        keywords = extract_metadata(sections, markdown_text)
+        title, abstract = extract_title_abstract(markdown_text, sections, paper_id)
+    else:
+        keywords = extract_metadata({}, markdown_text)
+        title = metadata.get("title", paper_id)
+        abstract = metadata.get("abstract", "")
+    author_line = extract_authors(markdown_text, title)
+
+    paper = {
+        "id": make_unique_id(title, author_line),
+        "title": title,
+        "abstract": abstract,
+    }
+    if metadata is not None:
+        paper["url"] = metadata.get("url", "")
+    paper.update({
+        "keywords": keywords,
+        "document": markdown_text,
+        "references": extract_references(sections)
+    })
+    return paper
+
+def convert_paper(local_pdf_path, paper_id, metadata=None):
+    """
+    Convert one PDF with marker and build its paper record.
+    """
+    with METRICS.timer("conversion"), PROFILER.span("conversion"):
+        markdown_text = convert_pdf(local_pdf_path)
+    METRICS.inc("bytes_converted_total", len(markdown_text.encode("utf-8")), stage="conversion")
+    with PROFILER.span("section_parsing"):
+        return build_paper(markdown_text, paper_id, metadata)
+
+def main(input_path, output_yaml, metrics_dir=None):
+    METRICS.configure(metrics_dir, "marker_runner")
     papers = []
 
     if input_path.endswith(".txt"):
@@ -157,22 +247,7 @@ def main(input_path, output_yaml):
         with open(pdf_link_file, "r", encoding="utf-8") as f:
             pdf_urls = [line.strip() for line in f if line.strip()]
 
-        paper_ids = [extract_id_from_url(url) for url in pdf_urls]
-        id_query = "+OR+".join([f"id:{pid.split('v')[0]}" for pid in paper_ids if pid]) 
-
-        feed = feedparser.parse(requests.get(
-            f"http://export.arxiv.org/api/query?search_query={id_query}&start=0&max_results=100"
-        ).text)
-
-        id_to_metadata = {}
-        for entry in feed.entries:
-            paper_id = entry.id.split('/')[-1]
-            paper_id_base = paper_id.split('v')[0]
-            id_to_metadata[paper_id_base] = {
-                "title": entry.title.strip(),
-                "abstract": entry.summary.strip(),
-                "url": entry.id
-            }
+        id_to_metadata = fetch_arxiv_metadata(pdf_urls)
 
         seen_ids = set()
         for url in pdf_urls:
@@ -187,30 +262,8 @@ def main(input_path, output_yaml):
                 print(f"[->] Converting {paper_id}")
 
                 local_pdf_path = download_pdf(url, download_dir)
-                rendered = converter(local_pdf_path)
-                markdown_text, _, _ = text_from_rendered(rendered)
-
-                keywords = extract_metadata({}, markdown_text)
-
-                metadata = id_to_metadata.get(paper_id_base, {})
-                title = metadata.get("title", paper_id)
-                abstract = metadata.get("abstract", "")
-                arxiv_url = metadata.get("url", url)
-                author_line = extract_authors(markdown_text, title)
-                unique_id = make_unique_id(title, author_line)
-
-                sections = split_sections(markdown_text)
-                references = extract_references(sections)
-                
-                papers.append({
-                    "id": unique_id,
-                    "title": title,
-                    "abstract": abstract,
-                    "url": arxiv_url,
-                    "keywords": keywords,
-                    "document": markdown_text,
-                    "references": references
-                })
+                metadata = {"url": url, **id_to_metadata.get(paper_id_base, {})}
+                papers.append(convert_paper(local_pdf_path, paper_id, metadata))
 
                 print(f"[✓] Added: {paper_id}")
 
@@ -227,34 +280,18 @@ def main(input_path, output_yaml):
                 print(f"[->] Converting {pdf_filename}")
 
                 local_pdf_path = os.path.join(download_dir, pdf_filename)
-                rendered = converter(local_pdf_path)
-                markdown_text, _, _ = text_from_rendered(rendered)
-
-                sections = split_sections(markdown_text)
-                keywords = extract_metadata(sections, markdown_text)
-                title, abstract = extract_title_abstract(markdown_text, sections, paper_id)
-                author_line = extract_authors(markdown_text, title)
-                unique_id = make_unique_id(title, author_line)
-                references = extract_references(sections)
-
-                papers.append({
-                    "id": unique_id,
-                    "title": title,
-                    "abstract": abstract,
-                    "keywords": keywords,
-                    "document": markdown_text,
-                    "references": references
-                })
+                papers.append(convert_paper(local_pdf_path, paper_id))
 
                 print(f"[✓] Added: {paper_id}")
 
             except Exception as e:
                 print(f"[✗] Failed to convert {pdf_filename}: {e}")
 
-    with open(output_yaml, "w", encoding="utf-8") as f:
+    with open(output_yaml, "w", encoding="utf-8") as f, PROFILER.span("yaml_dump"):
         yaml.dump({"papers": papers}, f, allow_unicode=True, sort_keys=False)
 
     print(f"\n✅ All done! YAML saved to {output_yaml}")
+    METRICS.finish()
 
 if __name__ == "__main__":
     from multiprocessing import freeze_support
@@ -263,6 +300,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract and convert arXiv papers to YAML.")
     parser.add_argument("-f", "--file", required=True, help="Path to folder (PDFs) or file (URLs)")
     parser.add_argument("-o", "--output", required=True, help="Output YAML file")
+    parser.add_argument("--metrics-dir", help="Directory for JSONL and Prometheus metrics (default: $CSRA_METRICS_DIR)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
-    main(args.file, args.output)
+    PROFILER.configure(args.profile, "marker_runner", args.profile_dir)
+    try:
+        main(args.file, args.output, args.metrics_dir)
+    finally:
+        PROFILER.finish()
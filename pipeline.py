@@ -0,0 +1,387 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import yaml
+
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for folder in ("", "clustering", "disqualified", "paper_downloading"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from marker_runner import convert_paper, download_pdf, extract_id_from_url, fetch_arxiv_metadata
+from merge_filter import (DEFAULT_FULL_TEXT_BUDGET, PROMPT_ORDER, check_paper, is_complete, is_fully_qualified,
+                          journal_record, minimal_record, restore_from_journal)
+from criterion_order import AdaptiveCriterionOrder
+from paper_classifier import classify_paper, paper_clusters, write_cluster
+from common.journal import Journal, journal_conflict, paper_key
+from common.cascade import CASCADE
+from common.llm_config import CLASSIFIER_LLM, FILTER_LLM, add_cascade_arguments
+from common.metrics import METRICS
+
+_DONE = object()
+
+
+class Stage:
+    """
+    Pool of worker threads fed by a bounded queue.
+
+    function maps a job to the job passed on to the next stage, or None to drop it there. The input
+    closes once every producer (the upstream stage and the source feeder) has called close_input(), and
+    the last worker to drain it closes the next stage's input in turn.
+    """
+
+    def __init__(self, name: str, function: Callable[[Dict], Optional[Dict]], workers: int, queue_size: int):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.next: Optional["Stage"] = None
+        self.producers = 0
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.max_queued = 0
+        self.first_done: Optional[float] = None
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, job: Dict):
+        self.inbox.put(job)
+        self.max_queued = max(self.max_queued, self.inbox.qsize())
+
+    def close_input(self):
+        with self._lock:
+            self.producers -= 1
+            last = self.producers == 0
+        if last:
+            for _ in range(self.workers):
+                self.inbox.put(_DONE)
+
+    def start(self):
+        self.running = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            job = self.inbox.get()
+            if job is _DONE:
+                break
+            start = time.time()
+            try:
+                result = self.function(job)
+            except Exception as e:
+                print(f"[✗] {self.name} failed for {job['key']}: {e}")
+                METRICS.inc("errors_total", stage=f"pipeline_{self.name}")
+                result = None
+                failed = True
+            else:
+                failed = False
+            elapsed = time.time() - start
+            with self._lock:
+                self.busy += elapsed
+                self.processed += 1
+                self.failed += failed
+                if self.first_done is None and not failed:
+                    self.first_done = time.time()
+            if result is not None and self.next:
+                self.next.submit(result)
+
+        with self._lock:
+            self.running -= 1
+            last = self.running == 0
+        if last and self.next:
+            self.next.close_input()
+
+
+class Pipeline:
+    """
+    Download → convert → filter → classify, with every stage running concurrently.
+
+    Papers are checked by merge_filter while later ones are still converting, and classified and written to
+    their cluster as soon as they qualify. Every finished step is journaled, so a rerun with resume=True
+    picks each paper up at the first step it had not completed.
+    """
+
+    def __init__(self, input_path: str, output_dir: str, workers: Dict[str, int], queue_size: int = 8,
+                 full_text_budget: int = DEFAULT_FULL_TEXT_BUDGET, early_exit: bool = False,
+                 api_key: Optional[str] = None, resume: bool = False, fresh: bool = False):
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.cluster_dir = os.path.join(output_dir, "clusters")
+        self.download_dir = os.path.join(output_dir, "downloaded_pdfs")
+        self.full_text_budget = full_text_budget
+        self.api_key = api_key
+        self.criterion_order = AdaptiveCriterionOrder(short_key for (short_key, _), _ in PROMPT_ORDER) if early_exit else None
+
+        self.journal_path = os.path.join(output_dir, "pipeline_journal.jsonl")
+        self.journal = Journal(self.journal_path, resume=resume, fresh=fresh)
+        self.records = self.journal.load() if resume else {}
+
+        self.converting = not input_path.endswith((".yaml", ".yml"))
+        self.stages: List[Stage] = []
+        if input_path.endswith(".txt"):
+            self.stages.append(Stage("download", self.download, workers["download"], queue_size))
+        if self.converting:
+            self.stages.append(Stage("convert", self.convert, workers["convert"], queue_size))
+        self.stages.append(Stage("filter", self.filter, workers["filter"], queue_size))
+        self.stages.append(Stage("classify", self.classify, workers["classify"], queue_size))
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.next = downstream
+            downstream.producers += 1
+        for stage in self.stages:
+            stage.producers += 1  # the feeder, which also enqueues resumed papers past their finished stages
+
+        self.papers: Dict[int, Dict] = {}
+        self.classified: Dict[int, Dict] = {}
+        self.clusters = defaultdict(list)
+        self.resumed = defaultdict(int)
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    # === Stages ===
+    def download(self, job: Dict) -> Dict:
+        job["pdf"] = download_pdf(job["url"], self.download_dir)
+        return job
+
+    def convert(self, job: Dict) -> Dict:
+        print(f"[->] Converting {job['paper_id']}")
+        job["paper"] = convert_paper(job["pdf"], job["paper_id"], job.get("metadata"))
+        self.journal.append({"key": job["key"], "paper": job["paper"]})
+        with self._lock:
+            self.papers[job["index"]] = job["paper"]
+        return job
+
+    def filter(self, job: Dict) -> Optional[Dict]:
+        paper = job["paper"]
+        if not is_complete(paper, early_exit=self.criterion_order is not None):
+            check_paper(paper, self.full_text_budget, self.criterion_order)
+            self.journal.append({**journal_record(paper), "key": job["key"]})
+        return job if is_fully_qualified(paper) else None
+
+    def classify(self, job: Dict) -> None:
+        classified_paper = classify_paper(job["paper"], self.api_key)
+        self.journal.append({"key": job["key"], "classified": classified_paper})
+        self._add_classified(job["index"], classified_paper)
+        print(f"[✓] Clustered: {classified_paper['title']}")
+
+    def _add_classified(self, index: int, classified_paper: Dict):
+        with self._lock:
+            self.classified[index] = classified_paper
+            # Rewrite only the clusters this paper joined, so results show up while the run continues
+            for cluster in paper_clusters(classified_paper):
+                self.clusters[cluster].append((index, classified_paper))
+                write_cluster(self.cluster_dir, *cluster, [p for _, p in self.clusters[cluster]])
+
+    # === Source ===
+    def source_jobs(self) -> List[Dict]:
+        if self.input_path.endswith(".txt"):
+            with open(self.input_path, "r", encoding="utf-8") as f:
+                pdf_urls = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+            pending = [url for url in pdf_urls if "paper" not in self.records.get(url, {})]
+            id_to_metadata = fetch_arxiv_metadata(pending) if pending else {}
+            jobs = []
+            for url in pdf_urls:
+                paper_id = extract_id_from_url(url)
+                metadata = {"url": url, **id_to_metadata.get((paper_id or "").split('v')[0], {})}
+                jobs.append({"key": url, "url": url, "paper_id": paper_id, "metadata": metadata})
+            return jobs
+
+        if self.converting:
+            pdf_files = sorted(f for f in os.listdir(self.input_path) if f.lower().endswith(".pdf"))
+            return [{"key": pdf_filename, "pdf": os.path.join(self.input_path, pdf_filename),
+                     "paper_id": os.path.splitext(pdf_filename)[0]} for pdf_filename in pdf_files]
+
+        with open(self.input_path, "r", encoding="utf-8") as f:
+            papers = yaml.safe_load(f)["papers"]
+        return [{"key": paper_key(paper), "paper": paper} for paper in papers]
+
+    def feed(self):
+        stages = {stage.name: stage for stage in self.stages}
+        early_exit = self.criterion_order is not None
+        try:
+            for index, job in enumerate(self.source_jobs()):
+                job["index"] = index
+                record = self.records.get(job["key"], {})
+                if "paper" in record and self.converting:
+                    job["paper"] = record["paper"]
+                    self.resumed["converted"] += 1
+                if "paper" not in job:
+                    self.stages[0].submit(job)
+                    continue
+
+                paper = job["paper"]
+                self.papers[index] = paper
+                restore_from_journal([paper], {paper_key(paper): record})
+                if "classified" in record:
+                    self.resumed["classified"] += 1
+                    self._add_classified(index, record["classified"])
+                elif not is_complete(paper, early_exit):
+                    stages["filter"].submit(job)
+                elif is_fully_qualified(paper):
+                    self.resumed["filtered"] += 1
+                    stages["classify"].submit(job)
+                else:
+                    self.resumed["filtered"] += 1
+        finally:
+            for stage in self.stages:
+                stage.close_input()
+
+    # === Run ===
+    def run(self) -> Dict:
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.stages[0].name == "download":
+            os.makedirs(self.download_dir, exist_ok=True)
+        if self.records:
+            print(f"🔁 Resuming from {self.journal_path}: {len(self.records)} papers journaled")
+
+        for stage in self.stages:
+            stage.start()
+        try:
+            self.feed()
+            for stage in self.stages:
+                stage.join()
+        finally:
+            self.journal.close()
+        return self.finish()
+
+    def finish(self) -> Dict:
+        wall = time.time() - self.started
+        # Final outputs are rewritten in input order, so they match regardless of completion order
+        for cluster, members in self.clusters.items():
+            write_cluster(self.cluster_dir, *cluster, [p for _, p in sorted(members, key=lambda m: m[0])])
+
+        # Papers that failed to download or convert never reach the filter
+        filtered = [self.papers[i] for i in sorted(self.papers) if self.papers[i].get("decisions")]
+        qualified = [p for p in filtered if is_fully_qualified(p)]
+        disqualified = [p for p in filtered if not is_fully_qualified(p)]
+        if self.converting:
+            with open(os.path.join(self.output_dir, "papers.yaml"), "w", encoding="utf-8") as f:
+                yaml.dump({"papers": [self.papers[i] for i in sorted(self.papers)]}, f, allow_unicode=True, sort_keys=False)
+        with open(os.path.join(self.output_dir, "qualified_papers.yaml"), "w", encoding="utf-8") as f:
+            yaml.dump({"papers": [minimal_record(p) for p in qualified]}, f, allow_unicode=True, sort_keys=False)
+        with open(os.path.join(self.output_dir, "disqualified_papers.yaml"), "w", encoding="utf-8") as f:
+            yaml.dump({"papers": [minimal_record(p) for p in disqualified]}, f, allow_unicode=True, sort_keys=False)
+
+        summary = {
+            "wall_s": round(wall, 2),
+            "papers_converted": len(self.papers) if self.converting else None,
+            "papers_qualified": len(qualified),
+            "papers_disqualified": len(disqualified),
+            "papers_clustered": len(self.classified),
+            "clusters": len(self.clusters),
+            "resumed": dict(self.resumed),
+            "stages": {},
+        }
+        for stage in self.stages:
+            summary["stages"][stage.name] = {
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "failed": stage.failed,
+                "busy_s": round(stage.busy, 2),
+                "utilization": round(stage.busy / (stage.workers * wall), 3) if wall else 0.0,
+                "max_queued": stage.max_queued,
+                "first_done_s": round(stage.first_done - self.started, 2) if stage.first_done else None,
+            }
+        summary["time_to_first_clustered_s"] = summary["stages"]["classify"]["first_done_s"]
+
+        print(f"\n✅ Pipeline finished in {summary['wall_s']}s: {summary['papers_clustered']} papers in "
+              f"{summary['clusters']} clusters, {len(disqualified)} disqualified")
+        if self.resumed:
+            print(f"🔁 Taken from the journal: {', '.join(f'{n} {step}' for step, n in self.resumed.items())}")
+        if summary["time_to_first_clustered_s"] is not None:
+            print(f"⏱  First clustered paper after {summary['time_to_first_clustered_s']}s")
+        print(f"{'stage':<10} {'workers':>7} {'done':>6} {'failed':>6} {'busy':>9} {'util':>6} {'max queued':>10} {'first':>8}")
+        for name, stats in summary["stages"].items():
+            first = f"{stats['first_done_s']}s" if stats["first_done_s"] is not None else "-"
+            print(f"{name:<10} {stats['workers']:>7} {stats['processed']:>6} {stats['failed']:>6} {stats['busy_s']:>8}s "
+                  f"{stats['utilization']:>6.0%} {stats['max_queued']:>10} {first:>8}")
+        if self.criterion_order:
+            self.criterion_order.report()
+        summary["cascade"] = CASCADE.report()
+
+        with open(os.path.join(self.output_dir, "pipeline_summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        # A run with failed papers or ERROR verdicts keeps its journal so --resume can retry them
+        early_exit = self.criterion_order is not None
+        if any(stage.failed for stage in self.stages) or not all(is_complete(p, early_exit) for p in filtered):
+            print(f"🗂  Clusters in {self.cluster_dir}, journal in {self.journal_path} (rerun with --resume to retry failures)")
+        else:
+            print(f"🗂  Clusters in {self.cluster_dir}, journal moved to {self.journal.complete()}")
+        return summary
+
+
+def main(input_path: str, output_dir: str, workers: Dict[str, int], queue_size: int = 8,
+         full_text_budget: int = DEFAULT_FULL_TEXT_BUDGET, early_exit: bool = False, api_key: Optional[str] = None,
+         resume: bool = False, metrics_dir: Optional[str] = None, filter_model: Optional[str] = None,
+         classifier_model: Optional[str] = None, api_base: Optional[str] = None, llm_retries: Optional[int] = None,
+         filter_cascade_model: Optional[str] = None, filter_cascade_threshold: Optional[float] = None,
+         classifier_cascade_model: Optional[str] = None, classifier_cascade_threshold: Optional[float] = None,
+         fresh: bool = False) -> Dict:
+    METRICS.configure(metrics_dir, "pipeline")
+    FILTER_LLM.configure(filter_model, api_base, llm_retries, filter_cascade_model, filter_cascade_threshold)
+    CLASSIFIER_LLM.configure(classifier_model, api_base, llm_retries, classifier_cascade_model, classifier_cascade_threshold)
+    print(f"🤖 Filter: {FILTER_LLM.describe()}, classifier: {CLASSIFIER_LLM.describe()}")
+
+    summary = Pipeline(input_path, output_dir, workers, queue_size, full_text_budget, early_exit, api_key, resume,
+                       fresh).run()
+    METRICS.finish()
+    return summary
+
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+    freeze_support()
+
+    parser = argparse.ArgumentParser(description="Download, convert, filter and classify papers in one streaming run.")
+    parser.add_argument("input", help="File of arXiv PDF links (.txt), folder of PDFs, or papers YAML to filter and classify")
+    parser.add_argument("-o", "--output-dir", default="pipeline_output", help="Output folder (default: pipeline_output)")
+    parser.add_argument("--download-workers", type=int, default=4, help="Concurrent PDF downloads (default: 4)")
+    parser.add_argument("--convert-workers", type=int, default=1,
+                        help="Concurrent marker conversions; they share one model, so raise only with spare GPU/CPU (default: 1)")
+    parser.add_argument("--filter-workers", type=int, default=8, help="Papers checked by merge_filter concurrently (default: 8)")
+    parser.add_argument("--classify-workers", type=int, default=8, help="Papers classified concurrently (default: 8)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Papers waiting between two stages at most (default: 8)")
+    parser.add_argument("--full-text-budget", type=int, default=DEFAULT_FULL_TEXT_BUDGET,
+                        help=f"Token budget for passages sent on full-text fallback, 0 sends the whole paper (default: {DEFAULT_FULL_TEXT_BUDGET})")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="Stop checking a paper at its first confirmed disqualification, ordering criteria adaptively by cost")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from <output-dir>/pipeline_journal.jsonl")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard a non-empty pipeline_journal.jsonl and start over (without --resume or --fresh it is an error)")
+    parser.add_argument("-a", "--key", help="OpenAI API key")
+    parser.add_argument("--metrics-dir", help="Directory for JSONL and Prometheus metrics (default: $CSRA_METRICS_DIR)")
+    parser.add_argument("--filter-model", help=f"litellm model for merge_filter (default: $CSRA_FILTER_MODEL or {FILTER_LLM.default_model})")
+    parser.add_argument("--classifier-model",
+                        help=f"litellm model for paper_classifier (default: $CSRA_CLASSIFIER_MODEL or {CLASSIFIER_LLM.default_model})")
+    parser.add_argument("--api-base", help="OpenAI-compatible API base URL, e.g. a local mock server (default: $CSRA_API_BASE)")
+    parser.add_argument("--llm-retries", type=int, default=None,
+                        help="litellm retries on rate limits and server errors (default: $CSRA_LLM_RETRIES or 0)")
+    add_cascade_arguments(parser, FILTER_LLM, "filter-")
+    add_cascade_arguments(parser, CLASSIFIER_LLM, "classifier-")
+    args = parser.parse_args()
+    conflict = journal_conflict(os.path.join(args.output_dir, "pipeline_journal.jsonl"), args.resume, args.fresh)
+    if conflict:
+        parser.error(conflict)
+
+    workers = {"download": args.download_workers, "convert": args.convert_workers,
+               "filter": args.filter_workers, "classify": args.classify_workers}
+    main(args.input, args.output_dir, workers, args.queue_size, args.full_text_budget, args.early_exit, args.key,
+         args.resume, args.metrics_dir, args.filter_model, args.classifier_model, args.api_base, args.llm_retries,
+         args.filter_cascade_model, args.filter_cascade_threshold, args.classifier_cascade_model,
+         args.classifier_cascade_threshold, args.fresh)
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import litellm
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.journal import Journal, paper_key
+from common.llm_config import JUDGE_LLM, LLMConfig
+from common.metrics import METRICS
+from common.passage_selection import select_passages
+from common.tokens import count_tokens
+
+DEFAULT_JUDGE_MODEL = JUDGE_LLM.default_model
+DEFAULT_DIGEST_TOKENS = 1500
+# Attempts per comparison before it falls back to an uncached "equal" verdict
+JUDGE_ATTEMPTS = 3
+
+JUDGE_INSTRUCTIONS = """You are a senior program committee member comparing two research papers from the same area.
+Judge which paper is the stronger contribution overall, considering novelty, significance, clarity and evaluation.
+If the two are of comparable quality answer "equal". Independently, flag a paper as "sucks" only if it is
+fundamentally flawed (no real contribution, no credible evaluation, or clearly not a research paper)."""
+
+
+class comparison_structure(BaseModel):
+    better_paper: str
+    paper_a_sucks: bool
+    paper_b_sucks: bool
+    reasoning: str
+
+
+def build_digest(paper: Dict, token_budget: int = DEFAULT_DIGEST_TOKENS, model: str = DEFAULT_JUDGE_MODEL) -> str:
+    """
+    Token-budgeted digest of a paper: title, abstract, then its contribution and evaluation passages.
+    """
+    title = paper.get("title", "")
+    abstract = (paper.get("abstract") or "").strip()
+    document = paper.get("document") or ""
+
+    head = f"Title: {title}\n\nAbstract: {abstract}"
+    remaining = token_budget - count_tokens(head, model)
+    if not document or remaining <= 0:
+        return head
+    if count_tokens(document, model) <= remaining:
+        return f"Title: {title}\n\n{document}"
+
+    # The head already carries the abstract, so the document's copy is neither pinned nor selectable again
+    if abstract:
+        document = document.replace(abstract, "", 1)
+    contributions = select_passages(document, "novelty", remaining // 2, model, keep_first=not abstract)["text"]
+    evaluation = select_passages(document, "evaluation", remaining // 2, model, keep_first=False)["text"]
+    return f"{head}\n\n## Contributions\n{contributions}\n\n## Evaluation summary\n{evaluation}"
+
+
+class PairwiseJudge:
+    """
+    LLM comparison callback for TrueSkillRanker that keeps prompt prefixes warm.
+
+    Pending pairs are grouped around anchor papers so consecutive requests share the same system prompt
+    (instructions + anchor digest), which provider-side prompt caching reuses. Pairs keep the ranker's
+    randomized A/B orientation, so an anchor has one prefix per slot it appears in. The first request of
+    every anchor group is sent before the rest of the group so the cache is populated. Digests are computed once
+    per paper and verdicts are cached symmetrically, keyed by model and digest fingerprints, both optionally
+    persisted to JSONL files. A comparison that still fails after JUDGE_ATTEMPTS counts as "equal" and is
+    not cached, so one bad response does not abort the batch.
+
+    Args:
+        papers: Paper records with id, title, abstract and document (marker_runner.py output)
+        config: Model, endpoint and retries of the judge (default JUDGE_LLM, see common/llm_config.py)
+        digest_tokens: Token budget of each paper digest
+        max_workers: Concurrent requests
+        digest_cache: Optional JSONL file caching digests across runs
+        verdict_cache: Optional JSONL file caching verdicts across runs
+    """
+
+    def __init__(self, papers: List[Dict], config: LLMConfig = JUDGE_LLM, digest_tokens: int = DEFAULT_DIGEST_TOKENS,
+                 max_workers: int = 8, digest_cache: Optional[str] = None, verdict_cache: Optional[str] = None):
+        self.papers = {paper_key(p): p for p in papers}
+        self.config = config
+        self.model = config.model
+        self.digest_tokens = digest_tokens
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+
+        self.digests: Dict[str, Dict] = {}
+        self._digest_journal = Journal(digest_cache, resume=True) if digest_cache else None
+        if self._digest_journal:
+            self.digests = self._digest_journal.load()
+
+        self.verdicts: Dict[str, Dict] = {}
+        self._verdict_journal = Journal(verdict_cache, resume=True) if verdict_cache else None
+        if self._verdict_journal:
+            self.verdicts = self._verdict_journal.load()
+
+        self.stats = Counter()
+        self.cost = 0.0
+
+    def fingerprint(self, pid: str) -> str:
+        paper = self.papers[pid]
+        return hashlib.sha1((paper.get("document") or paper.get("abstract") or "").encode("utf-8")).hexdigest()[:16]
+
+    def digest(self, pid: str) -> str:
+        paper = self.papers[pid]
+        fingerprint = self.fingerprint(pid)
+        cached = self.digests.get(pid)
+        if cached and cached.get("fingerprint") == fingerprint and cached.get("budget") == self.digest_tokens:
+            return cached["digest"]
+
+        record = {"key": pid, "fingerprint": fingerprint, "budget": self.digest_tokens,
+                  "digest": build_digest(paper, self.digest_tokens, self.model)}
+        with self._lock:
+            self.digests[pid] = record
+        if self._digest_journal:
+            self._digest_journal.append(record)
+        return record["digest"]
+
+    @staticmethod
+    def _pair_key(a: str, b: str) -> str:
+        return "\x1f".join(sorted((a, b)))
+
+    def _verdict_key(self, a: str, b: str) -> str:
+        # A new model or a changed document must not reuse old verdicts
+        papers = sorted(f"{pid}@{self.fingerprint(pid)}" for pid in (a, b))
+        return "\x1f".join([self.model, *papers])
+
+    @staticmethod
+    def _verdict_for(a: str, b: str, result: Dict) -> Tuple[str, bool, bool]:
+        """
+        Convert a stored {"winner", "sucks"} result into a ranker (verdict, sucks_a, sucks_b) for paper a
+        against paper b. The outcome always follows the winner; "sucks" flags only add strikes.
+        """
+        verdict = "winner" if result["winner"] == a else "loser" if result["winner"] == b else "equal"
+        return verdict, a in result["sucks"], b in result["sucks"]
+
+    def schedule(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        """
+        Group pairs around anchors, greedily taking the paper with the most pending pairs first.
+        Returns (anchor, pairs) groups; pairs keep their (a, b) orientation.
+        """
+        pending = list(pairs)
+        groups = []
+        while pending:
+            counts = Counter(p for pair in pending for p in pair)
+            anchor = max(sorted(counts), key=counts.get)
+            groups.append((anchor, [pair for pair in pending if anchor in pair]))
+            pending = [pair for pair in pending if anchor not in pair]
+        return groups
+
+    def _messages(self, a: str, b: str, anchor: str) -> List[Dict]:
+        # The anchor digest goes in the cached system prompt under the label of its slot in the pair
+        anchor_slot, other_slot, other = ("A", "B", b) if anchor == a else ("B", "A", a)
+        system_text = f"{JUDGE_INSTRUCTIONS}\n\nPaper {anchor_slot}:\n\"\"\"{self.digest(anchor)}\"\"\""
+        system_part = {"type": "text", "text": system_text}
+        if self.model.startswith(("anthropic/", "claude")):
+            system_part["cache_control"] = {"type": "ephemeral"}
+        return [
+            {"role": "system", "content": [system_part]},
+            {"role": "user", "content": [{"type": "text", "text": (
+                f"Paper {other_slot}:\n\"\"\"{self.digest(other)}\"\"\"\n\n"
+                "Which paper is stronger? Set better_paper to \"A\", \"B\" or \"equal\", flag each paper that "
+                "sucks, and give a one-sentence reasoning.")}]},
+        ]
+
+    def _judge(self, a: str, b: str, anchor: str) -> Dict:
+        key = self._verdict_key(a, b)
+        with self._lock:
+            if key in self.verdicts:
+                self.stats["verdict_cache_hits"] += 1
+                return self.verdicts[key]
+
+        messages = self._messages(a, b, anchor)
+        for attempt in range(JUDGE_ATTEMPTS):
+            try:
+                start_time = time.time()
+                response = litellm.completion(messages=messages, response_format=comparison_structure, temperature=0,
+                                              **self.config.completion_kwargs())
+                METRICS.record_llm_call("pairwise_judge", self.model, response, time.time() - start_time)
+                answer = json.loads(response["choices"][0]["message"]["content"])
+                break
+            except Exception as e:
+                print(f"[!] Judge attempt {attempt + 1} for {a} vs {b} failed: {e}")
+                if attempt + 1 < JUDGE_ATTEMPTS:
+                    time.sleep(2 ** attempt)
+        else:
+            METRICS.inc("judge_failures_total", stage="pairwise_judge")
+            with self._lock:
+                self.stats["failures"] += 1
+            return {"key": key, "winner": None, "sucks": [], "reasoning": "Judge failed; counted as equal."}
+
+        better = answer.get("better_paper", "").strip().upper()
+        result = {
+            "key": key,
+            "winner": a if better == "A" else b if better == "B" else None,
+            "sucks": [p for p, flag in ((a, answer.get("paper_a_sucks")), (b, answer.get("paper_b_sucks"))) if flag],
+            "reasoning": answer.get("reasoning", ""),
+        }
+        try:
+            cost = litellm.completion_cost(completion_response=response)
+        except Exception:
+            cost = 0.0
+
+        with self._lock:
+            self.verdicts[key] = result
+            self.stats["llm_calls"] += 1
+            self.cost += cost
+        if self._verdict_journal:
+            self._verdict_journal.append(result)
+        return result
+
+    def __call__(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, bool, bool]]:
+        """
+        Judge a batch of (a, b) pairs and return ranker (verdict for a, a sucks, b sucks) tuples, in input order.
+        """
+        self.stats["comparisons"] += len(pairs)
+        groups = self.schedule(pairs)
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # The first request of each group warms the anchor's prefix, the rest then hit the cache
+            first = [(*group[0], anchor) for anchor, group in groups]
+            rest = [(*pair, anchor) for anchor, group in groups for pair in group[1:]]
+            for batch in (first, rest):
+                for (a, b, _), result in zip(batch, pool.map(lambda job: self._judge(*job), batch)):
+                    results[self._pair_key(a, b)] = result
+        return [self._verdict_for(a, b, results[self._pair_key(a, b)]) for a, b in pairs]
+
+    def report(self):
+        calls = self.stats["llm_calls"]
+        comparisons = self.stats["comparisons"]
+        print(f"⚖  Judge {self.model}: {comparisons} comparisons, {calls} LLM calls, "
+              f"{self.stats['verdict_cache_hits']} verdict cache hits, {self.stats['failures']} failed (counted as equal)")
+        if comparisons:
+            print(f"   ${self.cost:.4f} total, ${self.cost / comparisons:.5f} per comparison")
+
+    def close(self):
+        for journal in (self._digest_journal, self._verdict_journal):
+            if journal:
+                journal.close()
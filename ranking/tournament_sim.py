@@ -0,0 +1,317 @@
+import argparse
+import json
+import time
+import zlib
+
+import numpy as np
+
+from typing import Callable, Dict, Tuple
+
+from trueskill_math import DRAW, LOSS, MU, SIGMA, WIN, rate
+
+SUCKS_LIMIT = 2
+# Only papers in this bottom fraction of true strength can be judged "sucks"
+SUCKS_QUANTILE = 0.1
+
+
+class Judge:
+    """
+    Vectorized noisy judge over the latent strengths of T parallel tournaments.
+
+    Args:
+        strength: (T, n) latent strengths
+        noise: Standard deviation of the per-comparison judge noise
+        tie_rate: Probability that a comparison is called "equal"
+        sucks_rate: Probability that a losing paper from the bottom SUCKS_QUANTILE is called "sucks"
+        rng: NumPy random generator
+    """
+
+    def __init__(self, strength: np.ndarray, noise: float, tie_rate: float, sucks_rate: float, rng: np.random.Generator):
+        self.strength = strength
+        self.noise = noise
+        self.tie_rate = tie_rate
+        self.sucks_rate = sucks_rate
+        self.rng = rng
+        self.weak = strength <= np.quantile(strength, SUCKS_QUANTILE, axis=1, keepdims=True)
+        self.sucks = np.zeros(strength.shape, dtype=np.int32)
+        self.comparisons = np.zeros(strength.shape[0], dtype=np.int64)
+
+    def __call__(self, a: np.ndarray, b: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Judge pairs a[t, m] vs b[t, m]. Returns WIN/DRAW/LOSS for a; masked-out pairs are not judged (DRAW).
+        """
+        if mask is None:
+            mask = np.ones(a.shape, dtype=bool)
+        s_a = np.take_along_axis(self.strength, a, axis=1)
+        s_b = np.take_along_axis(self.strength, b, axis=1)
+        diff = s_a - s_b + self.noise * self.rng.standard_normal(a.shape)
+        outcome = np.where(diff > 0, WIN, LOSS)
+        outcome = np.where(self.rng.random(a.shape) < self.tie_rate, DRAW, outcome)
+        outcome = np.where(mask, outcome, DRAW)
+
+        loser = np.where(outcome == WIN, b, a)
+        sucks = mask & (outcome != DRAW) & np.take_along_axis(self.weak, loser, axis=1) & (
+            self.rng.random(a.shape) < self.sucks_rate)
+        rows = np.broadcast_to(np.arange(a.shape[0])[:, None], a.shape)
+        np.add.at(self.sucks, (rows[sucks], loser[sucks]), 1)
+        self.comparisons += mask.sum(axis=1)
+        return outcome
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self.sucks < SUCKS_LIMIT
+
+    def play(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Judge pairs between papers still in the tournament. A pair with an eliminated paper is not judged:
+        the other paper wins by walkover, and a pair of two eliminated papers is a DRAW.
+        """
+        alive_a = np.take_along_axis(self.alive, a, axis=1)
+        alive_b = np.take_along_axis(self.alive, b, axis=1)
+        outcome = self(a, b, alive_a & alive_b)
+        return np.where(alive_a & alive_b, outcome, np.where(alive_a, WIN, np.where(alive_b, LOSS, DRAW)))
+
+    def final_scores(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Push papers eliminated by the "two sucks" rule to the bottom of a ranking.
+        """
+        return np.where(self.sucks >= SUCKS_LIMIT, -np.inf, scores)
+
+
+def _tiebreak(shape, rng):
+    # Tiny random jitter so equal scores are ordered randomly instead of by index
+    return rng.random(shape) * 1e-6
+
+
+def _points(outcome: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    points_a = np.where(outcome == WIN, 1.0, np.where(outcome == DRAW, 0.5, 0.0))
+    return points_a, 1.0 - points_a
+
+
+def _add(scores, idx, values):
+    rows = np.broadcast_to(np.arange(scores.shape[0])[:, None], idx.shape)
+    np.add.at(scores, (rows, idx), values)
+
+
+def run_trueskill(judge: Judge, rng: np.random.Generator, rounds: int = 8) -> np.ndarray:
+    """
+    TrueSkill with adaptive pairing: each round sorts by mu and pairs neighbours, alternating the offset.
+    """
+    t, n = judge.strength.shape
+    mu = np.full((t, n), MU)
+    sigma = np.full((t, n), SIGMA)
+    for r in range(rounds):
+        alive = judge.sucks < SUCKS_LIMIT
+        key = np.where(alive, mu, -np.inf) + _tiebreak(mu.shape, rng)
+        order = np.argsort(-key, axis=1)
+        offset = r % 2
+        m = (n - offset) // 2
+        a = order[:, offset:offset + 2 * m:2]
+        b = order[:, offset + 1:offset + 2 * m:2]
+        mask = np.take_along_axis(alive, a, axis=1) & np.take_along_axis(alive, b, axis=1)
+        outcome = judge(a, b, mask)
+
+        mu_a, sigma_a = np.take_along_axis(mu, a, axis=1), np.take_along_axis(sigma, a, axis=1)
+        mu_b, sigma_b = np.take_along_axis(mu, b, axis=1), np.take_along_axis(sigma, b, axis=1)
+        new_mu_a, new_sigma_a, new_mu_b, new_sigma_b = rate(mu_a, sigma_a, mu_b, sigma_b, outcome)
+        np.put_along_axis(mu, a, np.where(mask, new_mu_a, mu_a), axis=1)
+        np.put_along_axis(sigma, a, np.where(mask, new_sigma_a, sigma_a), axis=1)
+        np.put_along_axis(mu, b, np.where(mask, new_mu_b, mu_b), axis=1)
+        np.put_along_axis(sigma, b, np.where(mask, new_sigma_b, sigma_b), axis=1)
+    return judge.final_scores(mu - 3 * sigma)
+
+
+def _swiss_scores(judge: Judge, rng: np.random.Generator, rounds: int) -> np.ndarray:
+    """
+    Classification rounds from docs/ranking.md: first 1 vs 2, 3 vs 4 in random order, then by current
+    score 1 vs last, 2 vs last-1, ... Eliminated papers sort last and sit out, so the pairing folds over
+    the papers still alive. Returns raw points, used as seeding by the other formats.
+    """
+    t, n = judge.strength.shape
+    scores = np.zeros((t, n))
+    m = n // 2
+    slot = np.arange(m)[None, :]
+    for r in range(rounds):
+        alive = judge.alive
+        if r == 0:
+            order = np.argsort(np.where(alive, rng.random((t, n)), np.inf), axis=1)
+            a, b = order[:, 0:2 * m:2], order[:, 1:2 * m:2]
+            mask = np.take_along_axis(alive, a, axis=1) & np.take_along_axis(alive, b, axis=1)
+        else:
+            order = np.argsort(-np.where(alive, scores + _tiebreak(scores.shape, rng), -np.inf), axis=1)
+            count = alive.sum(axis=1, keepdims=True)
+            partner = count - 1 - slot
+            a, b = order[:, :m], np.take_along_axis(order, np.clip(partner, 0, n - 1), axis=1)
+            mask = slot < partner
+        points_a, points_b = _points(judge(a, b, mask))
+        _add(scores, a, np.where(mask, points_a, 0.0))
+        _add(scores, b, np.where(mask, points_b, 0.0))
+    return scores + _tiebreak(scores.shape, rng)
+
+
+def run_swiss(judge: Judge, rng: np.random.Generator, rounds: int = 4) -> np.ndarray:
+    """
+    Swiss classification ranked by points, with two-sucks eliminations last.
+    """
+    return judge.final_scores(_swiss_scores(judge, rng, rounds))
+
+
+def run_groups(judge: Judge, rng: np.random.Generator, rounds: int = 4, group_size: int = 4) -> np.ndarray:
+    """
+    Swiss classification, then single round-robin groups filled in classification order: the paper at
+    position p goes to group p % groups. Papers are ranked by group position first, then by classification
+    score; papers left over when n is not a multiple of group_size rank after every group. Games against
+    eliminated papers are walkovers.
+    """
+    t, n = judge.strength.shape
+    seed_scores = _swiss_scores(judge, rng, rounds)
+    order = np.argsort(-seed_scores, axis=1)
+    groups = n // group_size
+    members = np.stack([order[:, g:groups * group_size:groups] for g in range(groups)], axis=1)  # (t, groups, size)
+
+    group_points = np.zeros((t, n))
+    for i in range(group_size):
+        for j in range(i + 1, group_size):
+            a, b = members[:, :, i], members[:, :, j]
+            points_a, points_b = _points(judge.play(a, b))
+            _add(group_points, a, points_a)
+            _add(group_points, b, points_b)
+
+    # Position inside the group dominates, classification score breaks ties
+    group_rank = np.full((t, n), float(group_size))
+    points = np.take_along_axis(group_points, members.reshape(t, -1), axis=1).reshape(members.shape)
+    tie = np.take_along_axis(seed_scores, members.reshape(t, -1), axis=1).reshape(members.shape)
+    position = np.argsort(np.argsort(-(points * 1000 + tie), axis=2), axis=2)
+    np.put_along_axis(group_rank, members.reshape(t, -1), position.reshape(t, -1), axis=1)
+    return judge.final_scores(-group_rank * 1e6 + group_points * 1e3 + seed_scores)
+
+
+def run_knockout(judge: Judge, rng: np.random.Generator, rounds: int = 4, seeded: bool = True) -> np.ndarray:
+    """
+    Single-elimination bracket. Seeded brackets use Swiss classification order (1 vs last, ...); draws go
+    to the better seed, and a paper facing an eliminated one advances by walkover. Papers are ranked by the
+    round they reached, then by seed.
+    """
+    t, n = judge.strength.shape
+    if seeded:
+        seed_scores = _swiss_scores(judge, rng, rounds)
+    else:
+        seed_scores = rng.random((t, n))
+    alive = np.argsort(-seed_scores, axis=1)
+    reached = np.zeros((t, n))
+    stage = 0
+    while alive.shape[1] > 1:
+        m = alive.shape[1] // 2
+        a, b = alive[:, :m], alive[:, ::-1][:, :m]
+        outcome = judge.play(a, b)
+        winners = np.where(outcome == LOSS, b, a)
+        stage += 1
+        np.put_along_axis(reached, winners, stage, axis=1)
+        byes = alive[:, m:alive.shape[1] - m]
+        np.put_along_axis(reached, byes, stage, axis=1)
+        nxt = np.concatenate([winners, byes], axis=1)
+        # Keep bracket order by seed for the next round
+        alive = np.take_along_axis(nxt, np.argsort(-np.take_along_axis(seed_scores, nxt, axis=1), axis=1), axis=1)
+    return judge.final_scores(reached * 1e6 + seed_scores)
+
+
+FORMATS: Dict[str, Callable] = {
+    "trueskill": run_trueskill,
+    "swiss": run_swiss,
+    "swiss+groups": run_groups,
+    "knockout": lambda judge, rng, rounds: run_knockout(judge, rng, rounds, seeded=False),
+    "swiss+knockout": run_knockout,
+}
+
+
+def kendall_tau(scores: np.ndarray, strength: np.ndarray, chunk: int = 64) -> np.ndarray:
+    """
+    Kendall tau-a between predicted scores and true strengths, per tournament.
+    """
+    t, n = scores.shape
+    result = np.empty(t)
+    iu = np.triu_indices(n, k=1)
+    scores = np.where(np.isfinite(scores), scores, -1e18)
+    for start in range(0, t, chunk):
+        s = scores[start:start + chunk]
+        g = strength[start:start + chunk]
+        pred = np.sign(s[:, :, None] - s[:, None, :])[:, iu[0], iu[1]]
+        true = np.sign(g[:, :, None] - g[:, None, :])[:, iu[0], iu[1]]
+        result[start:start + chunk] = (pred * true).mean(axis=1)
+    return result
+
+
+def top_k_recall(scores: np.ndarray, strength: np.ndarray, k: int) -> np.ndarray:
+    pred = np.argsort(-scores, axis=1)[:, :k]
+    true = np.argsort(-strength, axis=1)[:, :k]
+    hits = (pred[:, :, None] == true[:, None, :]).any(axis=2).sum(axis=1)
+    return hits / k
+
+
+def simulate(format_name: str, tournaments: int = 1000, papers: int = 64, rounds: int = 4, noise: float = 0.5,
+             tie_rate: float = 0.1, sucks_rate: float = 0.05, top_k: int = 8, seed: int = 0) -> Dict:
+    """
+    Run one format over many parallel tournaments and summarize comparisons against ranking accuracy.
+
+    The latent strengths depend only on the seed, so every format is measured on the same papers.
+    """
+    strength = np.random.default_rng(seed).standard_normal((tournaments, papers))
+    rng = np.random.default_rng([seed, zlib.crc32(f"{format_name}:{rounds}".encode())])
+    judge = Judge(strength, noise, tie_rate, sucks_rate, rng)
+
+    start = time.perf_counter()
+    scores = FORMATS[format_name](judge, rng, rounds)
+    elapsed = time.perf_counter() - start
+
+    tau = kendall_tau(scores, strength)
+    recall = top_k_recall(scores, strength, top_k)
+    return {
+        "format": format_name,
+        "rounds": rounds,
+        "comparisons": round(float(judge.comparisons.mean()), 1),
+        "kendall_tau": round(float(tau.mean()), 4),
+        "kendall_tau_std": round(float(tau.std()), 4),
+        f"top_{top_k}_recall": round(float(recall.mean()), 4),
+        "eliminated": round(float((judge.sucks >= SUCKS_LIMIT).sum(axis=1).mean()), 2),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def run_benchmark(tournaments: int, papers: int, noise: float, tie_rate: float, sucks_rate: float, top_k: int,
+                  seed: int, round_grid=(2, 4, 8, 16)):
+    results = []
+    for format_name in FORMATS:
+        if format_name == "knockout":
+            grid = round_grid[:1]  # unseeded bracket, rounds do not apply
+        elif format_name in ("trueskill", "swiss"):
+            grid = round_grid
+        else:
+            grid = round_grid[:2]
+        for rounds in grid:
+            results.append(simulate(format_name, tournaments, papers, rounds, noise, tie_rate, sucks_rate, top_k, seed))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate ranking formats over synthetic paper strengths.")
+    parser.add_argument("-t", "--tournaments", type=int, default=1000, help="Parallel tournaments (default: 1000)")
+    parser.add_argument("-n", "--papers", type=int, default=64, help="Papers per tournament (default: 64)")
+    parser.add_argument("--noise", type=float, default=0.5, help="Judge noise std vs unit strength spread (default: 0.5)")
+    parser.add_argument("--tie-rate", type=float, default=0.1, help="Probability of an 'equal' verdict (default: 0.1)")
+    parser.add_argument("--sucks-rate", type=float, default=0.05,
+                        help="Probability a losing bottom-decile paper is called 'sucks' (default: 0.05)")
+    parser.add_argument("-k", "--top-k", type=int, default=8, help="Top-k for recall (default: 8)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.tournaments, args.papers, args.noise, args.tie_rate, args.sucks_rate, args.top_k, args.seed)
+
+    recall_key = f"top_{args.top_k}_recall"
+    print(f"{'format':<16}{'rounds':>7}{'comparisons':>13}{'kendall tau':>13}{recall_key:>16}{'seconds':>9}")
+    for r in results:
+        print(f"{r['format']:<16}{r['rounds']:>7}{r['comparisons']:>13}{r['kendall_tau']:>13}{r[recall_key]:>16}{r['seconds']:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
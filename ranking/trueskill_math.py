@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+
+# Default TrueSkill environment (Herbrich et al. 2007)
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2
+TAU = SIGMA / 100
+DRAW_PROBABILITY = 0.10
+
+# Outcomes from the point of view of the first paper
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+_SQRT2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def erfc(x):
+    """
+    Vectorized complementary error function (Numerical Recipes erfcc, relative error < 1.2e-7).
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    r = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def pdf(x):
+    x = np.asarray(x, dtype=float)
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def cdf(x):
+    return 0.5 * erfc(-np.asarray(x, dtype=float) / _SQRT2)
+
+
+def draw_margin(draw_probability=DRAW_PROBABILITY, beta=BETA):
+    """
+    Performance difference below which a comparison is a draw, for a given draw probability.
+    """
+    # Inverse normal CDF by bisection (about 1 ms); the default environment's margin is DRAW_MARGIN below
+    target = (draw_probability + 1) / 2
+    lo, hi = -10.0, 10.0
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if float(cdf(mid)) < target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2 * _SQRT2 * beta
+
+
+DRAW_MARGIN = draw_margin(DRAW_PROBABILITY, BETA)
+
+
+def _v_w_win(t, eps):
+    x = t - eps
+    denom = cdf(x)
+    safe = denom > 1e-12
+    v = np.where(safe, pdf(x) / np.where(safe, denom, 1.0), -x)
+    return v, v * (v + x)
+
+
+def _v_w_draw(t, eps):
+    a = eps - t
+    b = -eps - t
+    denom = cdf(a) - cdf(b)
+    safe = denom > 1e-12
+    denom = np.where(safe, denom, 1.0)
+    v = np.where(safe, (pdf(b) - pdf(a)) / denom, -t)
+    w = np.where(safe, v * v + (a * pdf(a) - b * pdf(b)) / denom, 1.0)
+    return v, w
+
+
+def rate(mu_a, sigma_a, mu_b, sigma_b, outcome, beta=BETA, tau=TAU, eps=None):
+    """
+    Two-player TrueSkill update. Works elementwise on scalars or arrays of comparisons.
+
+    Args:
+        mu_a, sigma_a: Rating of the first paper(s)
+        mu_b, sigma_b: Rating of the second paper(s)
+        outcome: WIN, DRAW or LOSS for the first paper
+        beta: Performance noise
+        tau: Dynamics noise added before each update
+        eps: Draw margin, defaults to DRAW_MARGIN (or draw_margin(DRAW_PROBABILITY, beta) for another beta)
+
+    Returns:
+        Updated (mu_a, sigma_a, mu_b, sigma_b)
+    """
+    if eps is None:
+        eps = DRAW_MARGIN if beta == BETA else draw_margin(DRAW_PROBABILITY, beta)
+    mu_a, sigma_a, mu_b, sigma_b = (np.asarray(v, dtype=float) for v in (mu_a, sigma_a, mu_b, sigma_b))
+    outcome = np.asarray(outcome)
+
+    var_a = sigma_a ** 2 + tau ** 2
+    var_b = sigma_b ** 2 + tau ** 2
+    c = np.sqrt(2 * beta ** 2 + var_a + var_b)
+
+    # A loss is a win for the other paper: flip the sign so one formula covers both
+    sign = np.where(outcome == LOSS, -1.0, 1.0)
+    t = sign * (mu_a - mu_b) / c
+    v_win, w_win = _v_w_win(t, eps / c)
+    v_draw, w_draw = _v_w_draw((mu_a - mu_b) / c, eps / c)
+    is_draw = outcome == DRAW
+    v = np.where(is_draw, v_draw, sign * v_win)
+    w = np.where(is_draw, w_draw, w_win)
+
+    new_mu_a = mu_a + var_a / c * v
+    new_mu_b = mu_b - var_b / c * v
+    new_sigma_a = np.sqrt(var_a * np.maximum(1 - var_a / c ** 2 * w, 1e-6))
+    new_sigma_b = np.sqrt(var_b * np.maximum(1 - var_b / c ** 2 * w, 1e-6))
+    return new_mu_a, new_sigma_a, new_mu_b, new_sigma_b
+
+
+def win_probability(mu_a, sigma_a, mu_b, sigma_b, beta=BETA):
+    """
+    Probability that the first paper outperforms the second in a single comparison.
+    """
+    c = np.sqrt(2 * beta ** 2 + np.asarray(sigma_a) ** 2 + np.asarray(sigma_b) ** 2)
+    return cdf((np.asarray(mu_a) - np.asarray(mu_b)) / c)
+
+
+def match_quality(mu_a, sigma_a, mu_b, sigma_b, beta=BETA):
+    """
+    TrueSkill draw probability of a pairing; high when the outcome is most uncertain.
+    """
+    c2 = 2 * beta ** 2 + np.asarray(sigma_a) ** 2 + np.asarray(sigma_b) ** 2
+    diff = np.asarray(mu_a) - np.asarray(mu_b)
+    return np.sqrt(2 * beta ** 2 / c2) * np.exp(-diff ** 2 / (2 * c2))
@@ -0,0 +1,351 @@
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import yaml
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from trueskill_math import DRAW, DRAW_MARGIN, LOSS, MU, SIGMA, WIN, cdf, match_quality, rate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.llm_config import JUDGE_LLM, add_llm_arguments
+
+# Verdicts a comparison callback may return, from the point of view of the first paper of the pair
+VERDICTS = {"winner": WIN, "equal": DRAW, "loser": LOSS, "sucks": LOSS}
+
+# Any paper judged "sucks" this many times is eliminated (docs/ranking.md)
+SUCKS_LIMIT = 2
+
+# A verdict, or (verdict, paper a judged "sucks", paper b judged "sucks") with the strikes kept apart from the outcome
+Verdict = Union[str, Tuple[str, bool, bool]]
+CompareFn = Callable[[List[Tuple[str, str]]], List[Verdict]]
+
+
+class TrueSkillRanker:
+    """
+    Ranks the papers of one cluster with TrueSkill ratings and active matchmaking.
+
+    Ratings are kept in flat (mu, sigma) arrays. Each round picks pairs among the papers that can still
+    affect the top-k, preferring pairs whose outcome is most uncertain, so far fewer comparisons are
+    needed than a round robin. Pairs are disjoint unless max_pairs_per_paper > 1, which lets an LLM judge
+    reuse one paper's prompt prefix across several comparisons of a round. Ranking stops once every top-k paper beats every other paper with at least
+    the target confidence.
+    """
+
+    def __init__(self, paper_ids: Sequence[str], top_k: int = 10, confidence: float = 0.9,
+                 max_comparisons: Optional[int] = None, max_repeats: int = 1, max_pairs_per_paper: int = 1,
+                 seed: int = 0):
+        self.ids = list(paper_ids)
+        n = len(self.ids)
+        self.top_k = min(top_k, n)
+        self.confidence = confidence
+        self.max_comparisons = max_comparisons if max_comparisons is not None else 4 * n * max(1, int(np.log2(max(n, 2))))
+        self.max_repeats = max_repeats
+        self.max_pairs_per_paper = max_pairs_per_paper
+        self.rng = np.random.default_rng(seed)
+
+        self.mu = np.full(n, MU)
+        self.sigma = np.full(n, SIGMA)
+        self.games = np.zeros(n, dtype=np.int32)
+        self.sucks = np.zeros(n, dtype=np.int32)
+        self.pair_counts: Dict[Tuple[int, int], int] = {}
+        self.comparisons = 0
+        self.history: List[Tuple[str, str, str]] = []
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.sucks < SUCKS_LIMIT
+
+    def record(self, a: int, b: int, verdict: str, sucks_a: bool = False, sucks_b: bool = False):
+        """
+        Apply one comparison result. "sucks" counts as a loss for paper a plus one strike against it;
+        sucks_a and sucks_b add a strike against that paper without changing the outcome.
+        """
+        if verdict not in VERDICTS:
+            raise ValueError(f"Unknown verdict {verdict!r}, expected one of {sorted(VERDICTS)}")
+        mu_a, sigma_a, mu_b, sigma_b = rate(self.mu[a], self.sigma[a], self.mu[b], self.sigma[b], VERDICTS[verdict],
+                                              eps=DRAW_MARGIN)
+        self.mu[a], self.sigma[a], self.mu[b], self.sigma[b] = mu_a, sigma_a, mu_b, sigma_b
+        if verdict == "sucks" or sucks_a:
+            self.sucks[a] += 1
+        if sucks_b:
+            self.sucks[b] += 1
+        self.games[a] += 1
+        self.games[b] += 1
+        key = (min(a, b), max(a, b))
+        self.pair_counts[key] = self.pair_counts.get(key, 0) + 1
+        self.comparisons += 1
+        self.history.append((self.ids[a], self.ids[b], verdict))
+
+    def _order(self) -> np.ndarray:
+        """
+        Indices of active papers by conservative score mu - 3 sigma, best first.
+        """
+        candidates = np.flatnonzero(self.active)
+        return candidates[np.argsort(-(self.mu[candidates] - 3 * self.sigma[candidates]), kind="stable")]
+
+    def top_k_confidence(self) -> float:
+        """
+        Smallest probability that a current top-k paper is stronger than a paper outside the top-k.
+        """
+        order = self._order()
+        if len(order) <= self.top_k:
+            return 1.0
+        top, rest = order[:self.top_k], order[self.top_k:]
+        diff = self.mu[top][:, None] - self.mu[rest][None, :]
+        spread = np.sqrt(self.sigma[top][:, None] ** 2 + self.sigma[rest][None, :] ** 2)
+        return float(cdf(diff / spread).min())
+
+    def select_pairs(self, batch_size: int) -> List[Tuple[int, int]]:
+        """
+        Pick up to batch_size pairs for the next round, using each paper in at most max_pairs_per_paper of them.
+        """
+        active = np.flatnonzero(self.active)
+        if len(active) < 2:
+            return []
+
+        # Warm-up: every paper gets one comparison against a random opponent first
+        unplayed = active[self.games[active] == 0]
+        if len(unplayed):
+            self.rng.shuffle(unplayed)
+            pairs = []
+            for i in range(0, min(len(unplayed), 2 * batch_size), 2):
+                a = int(unplayed[i])
+                if i + 1 < len(unplayed):
+                    b = int(unplayed[i + 1])
+                else:
+                    b = int(self.rng.choice(active[active != a]))
+                pairs.append((a, b))
+            return pairs
+
+        # Candidates: papers whose optimistic score could still put them in the top-k. Once their pairs are all
+        # used up, widen to every active paper rather than stopping below the target confidence.
+        upper = self.mu[active] + 2 * self.sigma[active]
+        pool_size = min(len(active), 2 * self.top_k + 8)
+        pool = active[np.argsort(-upper, kind="stable")]
+        pairs = self._best_pairs(pool[:pool_size], batch_size)
+        if not pairs and pool_size < len(active):
+            pairs = self._best_pairs(pool, batch_size)
+        return pairs
+
+    def _best_pairs(self, pool: np.ndarray, batch_size: int) -> List[Tuple[int, int]]:
+        """
+        Highest-gain pairs within pool that have not reached max_repeats.
+        """
+        mu, sigma = self.mu[pool], self.sigma[pool]
+        gain = match_quality(mu[:, None], sigma[:, None], mu[None, :], sigma[None, :]) * (
+            sigma[:, None] ** 2 + sigma[None, :] ** 2)
+        np.fill_diagonal(gain, -np.inf)
+        position = {int(p): i for i, p in enumerate(pool)}
+        for (a, b), count in self.pair_counts.items():
+            if count >= self.max_repeats and a in position and b in position:
+                gain[position[a], position[b]] = gain[position[b], position[a]] = -np.inf
+
+        pairs = []
+        used = np.zeros(len(pool), dtype=np.int32)
+        for flat in np.argsort(-gain, axis=None):
+            i, j = divmod(int(flat), len(pool))
+            if not np.isfinite(gain[i, j]) or len(pairs) >= batch_size:
+                break
+            if i < j and used[i] < self.max_pairs_per_paper and used[j] < self.max_pairs_per_paper:
+                pairs.append((int(pool[i]), int(pool[j])))
+                used[i] += 1
+                used[j] += 1
+        return pairs
+
+    def run(self, compare: CompareFn, batch_size: int = 8, verbose: bool = False) -> List[Dict]:
+        """
+        Compare papers until the top-k is stable with the target confidence or the budget runs out.
+
+        Args:
+            compare: Callback taking a list of (paper_id_a, paper_id_b) pairs and returning one verdict
+                     ("winner", "equal", "loser" or "sucks", for paper a) per pair, optionally as a
+                     (verdict, sucks_a, sucks_b) tuple that flags either paper separately
+            batch_size: Number of pairs sent to the callback per round
+            verbose: Print progress after every round
+
+        Returns:
+            The final ranking, see ranking()
+        """
+        previous_top = None
+        while self.comparisons < self.max_comparisons:
+            pairs = self.select_pairs(min(batch_size, self.max_comparisons - self.comparisons))
+            if not pairs:
+                break
+            # Randomize which paper is presented first so position bias averages out
+            pairs = [(a, b) if self.rng.random() < 0.5 else (b, a) for a, b in pairs]
+            verdicts = compare([(self.ids[a], self.ids[b]) for a, b in pairs])
+            for (a, b), verdict in zip(pairs, verdicts):
+                self.record(a, b, *((verdict,) if isinstance(verdict, str) else verdict))
+
+            top = tuple(self._order()[:self.top_k])
+            confidence = self.top_k_confidence()
+            if verbose:
+                print(f"[RANK] {self.comparisons} comparisons, top-{self.top_k} confidence {confidence:.3f}")
+            if top == previous_top and confidence >= self.confidence and self.games.min() > 0:
+                break
+            previous_top = top
+        return self.ranking()
+
+    def ranking(self) -> List[Dict]:
+        """
+        Papers ordered by conservative score; eliminated papers come last.
+        """
+        order = list(self._order()) + list(np.flatnonzero(~self.active))
+        return [{
+            "id": self.ids[i],
+            "rank": rank + 1,
+            "mu": round(float(self.mu[i]), 3),
+            "sigma": round(float(self.sigma[i]), 3),
+            "score": round(float(self.mu[i] - 3 * self.sigma[i]), 3),
+            "games": int(self.games[i]),
+            "sucks": int(self.sucks[i]),
+            "eliminated": bool(self.sucks[i] >= SUCKS_LIMIT),
+        } for rank, i in enumerate(order)]
+
+
+class SyntheticOracle:
+    """
+    Comparison callback backed by hidden latent strengths, for testing rankers without LLM calls.
+
+    Args:
+        paper_ids: Papers to judge
+        noise: Standard deviation of judge noise relative to unit-variance strengths
+        tie_rate: Probability that a close comparison is called "equal"
+        sucks_rate: Fraction of papers (the weakest) that get "sucks" instead of "loser"
+        seed: Random seed
+    """
+
+    def __init__(self, paper_ids: Sequence[str], noise: float = 0.5, tie_rate: float = 0.1, sucks_rate: float = 0.05,
+                 seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.strength = dict(zip(paper_ids, self.rng.standard_normal(len(paper_ids))))
+        self.noise = noise
+        self.tie_rate = tie_rate
+        values = np.array(list(self.strength.values()))
+        self.sucks_below = np.quantile(values, sucks_rate) if sucks_rate > 0 and len(values) else -np.inf
+        self.calls = 0
+
+    def __call__(self, pairs: List[Tuple[str, str]]) -> List[str]:
+        verdicts = []
+        for a, b in pairs:
+            self.calls += 1
+            diff = self.strength[a] - self.strength[b] + self.noise * self.rng.standard_normal()
+            if abs(diff) < self.noise * self.tie_rate:
+                verdicts.append("equal")
+            elif diff > 0:
+                verdicts.append("winner")
+            else:
+                verdicts.append("sucks" if self.strength[a] <= self.sucks_below else "loser")
+        return verdicts
+
+    def true_ranking(self) -> List[str]:
+        return sorted(self.strength, key=self.strength.get, reverse=True)
+
+
+def load_clusters(cluster_folder: str, qualified_yaml: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Read paper_classifier.py cluster outputs, keyed by "topic/sub_topic".
+
+    Args:
+        cluster_folder: Output folder of paper_classifier.py
+        qualified_yaml: Optional qualified_papers.yaml from merge_filter.py; other papers are dropped
+    """
+    qualified = None
+    if qualified_yaml:
+        with open(qualified_yaml, "r", encoding="utf-8") as f:
+            qualified = {p.get("id") for p in yaml.safe_load(f)["papers"]}
+
+    clusters = {}
+    for path in sorted(glob.glob(os.path.join(cluster_folder, "*", "*", "papers.yaml"))):
+        with open(path, "r", encoding="utf-8") as f:
+            papers = (yaml.safe_load(f) or {}).get("papers") or []
+        if qualified is not None:
+            papers = [p for p in papers if p.get("id") in qualified]
+        sub_dir = os.path.dirname(path)
+        clusters[os.path.relpath(sub_dir, cluster_folder).replace(os.sep, "/")] = papers
+    return clusters
+
+
+def rank_clusters(cluster_folder: str, compare_factory: Callable[[List[Dict]], CompareFn], qualified_yaml: Optional[str] = None,
+                  top_k: int = 10, confidence: float = 0.9, batch_size: int = 8, max_pairs_per_paper: int = 1,
+                  seed: int = 0):
+    """
+    Rank every cluster and write a rankings.yaml next to each papers.yaml.
+
+    Args:
+        compare_factory: Builds the comparison callback for the papers of one cluster
+        max_pairs_per_paper: Comparisons one paper may take part in per round
+    """
+    for name, papers in load_clusters(cluster_folder, qualified_yaml).items():
+        if len(papers) < 2:
+            continue
+        ranker = TrueSkillRanker([p["id"] for p in papers], top_k=top_k, confidence=confidence,
+                                 max_pairs_per_paper=max_pairs_per_paper, seed=seed)
+        ranking = ranker.run(compare_factory(papers), batch_size=batch_size)
+        titles = {p["id"]: p.get("title", "") for p in papers}
+        for entry in ranking:
+            entry["title"] = titles.get(entry["id"], "")
+
+        output_path = os.path.join(cluster_folder, name, "rankings.yaml")
+        with open(output_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump({"comparisons": ranker.comparisons, "top_k_confidence": round(ranker.top_k_confidence(), 4),
+                            "papers": ranking}, f, allow_unicode=True, sort_keys=False)
+        print(f"[✓] {name}: {len(papers)} papers ranked with {ranker.comparisons} comparisons "
+              f"(round robin: {len(papers) * (len(papers) - 1) // 2})")
+        reached = ranker.top_k_confidence()
+        if reached < confidence:
+            reason = ("comparison budget spent" if ranker.comparisons >= ranker.max_comparisons
+                      else f"every pair compared {ranker.max_repeats} time(s)")
+            print(f"[!] {name}: stopped at top-{ranker.top_k} confidence {reached:.3f}, below the target {confidence} "
+                  f"({reason})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank clustered papers with TrueSkill and active matchmaking.")
+    parser.add_argument("-c", "--clusters", required=True, help="Cluster output folder of paper_classifier.py")
+    parser.add_argument("-q", "--qualified", help="qualified_papers.yaml to restrict ranking to qualified papers")
+    parser.add_argument("-k", "--top-k", type=int, default=10, help="Size of the top set to stabilize (default: 10)")
+    parser.add_argument("--confidence", type=float, default=0.9, help="Target top-k confidence (default: 0.9)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Comparisons per round (default: 8)")
+    parser.add_argument("--oracle", choices=["synthetic", "llm"], default="synthetic",
+                        help="Comparison source; 'synthetic' judges with hidden random strengths, 'llm' uses pairwise_judge.py")
+    parser.add_argument("--papers", help="YAML with full paper documents (marker_runner.py output) for the LLM judge digests")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent LLM judge requests (default: 8)")
+    parser.add_argument("--digest-tokens", type=int, default=1500, help="Token budget of each paper digest (default: 1500)")
+    parser.add_argument("--pairs-per-paper", type=int, default=None,
+                        help="Comparisons a paper may join per round (default: 1, or 3 with --oracle llm)")
+    parser.add_argument("--cache-dir", default=".", help="Folder for the judge digest/verdict caches (default: .)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    add_llm_arguments(parser, JUDGE_LLM, cascade=False)
+    args = parser.parse_args()
+
+    if args.oracle == "llm":
+        from pairwise_judge import PairwiseJudge
+
+        documents = {}
+        if args.papers:
+            with open(args.papers, "r", encoding="utf-8") as f:
+                documents = {p.get("id"): p for p in yaml.safe_load(f)["papers"]}
+        JUDGE_LLM.configure(args.model, args.api_base, args.llm_retries)
+        print(f"⚖  Judge model: {JUDGE_LLM.describe()}")
+        judge = PairwiseJudge([], JUDGE_LLM, digest_tokens=args.digest_tokens, max_workers=args.workers,
+                              digest_cache=os.path.join(args.cache_dir, "judge_digests.jsonl"),
+                              verdict_cache=os.path.join(args.cache_dir, "judge_verdicts.jsonl"))
+
+        def compare_factory(papers):
+            judge.papers.update({p["id"]: {**p, **documents.get(p["id"], {})} for p in papers})
+            return judge
+    else:
+        def compare_factory(papers):
+            return SyntheticOracle([p["id"] for p in papers], seed=args.seed)
+
+    pairs_per_paper = args.pairs_per_paper or (3 if args.oracle == "llm" else 1)
+    rank_clusters(args.clusters, compare_factory, args.qualified, args.top_k, args.confidence, args.batch_size,
+                  pairs_per_paper, args.seed)
+    if args.oracle == "llm":
+        judge.report()
+        judge.close()
@@ -0,0 +1,18 @@
+/**
+ * Migration to key papers loaded from the Python pipeline by their pipeline paper id,
+ * so common/db_loader.py can upsert re-runs instead of inserting duplicates
+ */
+exports.up = function(knex) {
+    return knex.schema.alterTable('papers', function(table) {
+        // Paper id from the pipeline YAML (arXiv URL or title); null for papers added by the website
+        table.string('source_key').nullable();
+        table.unique('source_key');
+    });
+};
+
+exports.down = function(knex) {
+    return knex.schema.alterTable('papers', function(table) {
+        table.dropUnique('source_key');
+        table.dropColumn('source_key');
+    });
+};
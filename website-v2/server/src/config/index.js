@@ -14,6 +14,9 @@ module.exports = {
         user: process.env.DB_USER || 'cse-247-admin',
         password: process.env.DB_PASSWORD || 'postgres'
     },
+    clusterIndex: {
+        url: process.env.CLUSTER_INDEX_URL || 'http://localhost:8766'
+    },
     auth: {
         jwt: {
             secret: process.env.JWT_SECRET || 'your-secret-key',
@@ -0,0 +1,75 @@
+'use strict';
+
+const axios = require('axios');
+const config = require('../config');
+
+/**
+ * Client for the compiled cluster index served by `python common/cluster_index.py -d <clusters> serve`.
+ * Lookups hit the in-memory index instead of re-reading every <topic>/<sub_topic>/papers.yaml.
+ */
+class ClusterIndexService {
+    constructor() {
+        this.axiosInstance = axios.create({
+            baseURL: config.clusterIndex.url,
+            timeout: 5000 // 5 second timeout
+        });
+    }
+
+    /**
+     * GET an endpoint, returning null for 404 (unknown cluster or paper)
+     * @param {string} path - Endpoint path
+     * @param {Object} params - Query parameters
+     * @returns {Promise<Object|null>}
+     */
+    async get(path, params = {}) {
+        try {
+            const response = await this.axiosInstance.get(path, { params });
+            return response.data;
+        } catch (error) {
+            if (error.response?.status === 404) return null;
+            throw new Error(`Cluster index request ${path} failed: ${error.response?.data?.error || error.message}`);
+        }
+    }
+
+    /**
+     * Topics with their sub-topics and paper counts
+     * @returns {Promise<Object>} { topic: { subTopic: count } }
+     */
+    async getTopics() {
+        return this.get('/topics');
+    }
+
+    /**
+     * Papers of one cluster; sub-topic is '' for papers filed directly under a topic
+     * @param {string} topic - Topic name
+     * @param {string} subTopic - Sub-topic name
+     * @returns {Promise<Array|null>} Array of { id, title }, or null if the cluster does not exist
+     */
+    async getClusterPapers(topic, subTopic = '') {
+        const data = await this.get('/cluster', { topic, sub_topic: subTopic });
+        return data ? data.papers : null;
+    }
+
+    /**
+     * Clusters a paper was classified into
+     * @param {string} paperId - Paper id (URL or title, as written by the classifier)
+     * @returns {Promise<Array|null>} Array of { topic, sub_topic }, or null for an unknown paper
+     */
+    async getPaperClusters(paperId) {
+        const data = await this.get('/paper', { id: paperId });
+        return data ? data.clusters : null;
+    }
+
+    /**
+     * Search paper titles; the last word matches as a prefix
+     * @param {string} query - Search words
+     * @param {number} limit - Maximum results
+     * @returns {Promise<Array>} Array of { id, title, clusters }
+     */
+    async searchPapers(query, limit = 20) {
+        const data = await this.get('/search', { q: query, limit });
+        return data ? data.papers : [];
+    }
+}
+
+module.exports = new ClusterIndexService();